@@ -0,0 +1,153 @@
+"""
+Rendered-HTML cache for blog post pages, feeds and the sitemap.
+
+Anonymous GETs of post_detail are served as a whole cached page; everyone else
+gets the post body from a cached fragment. Keys combine the post slug, its
+`updated` timestamp and a per-post comment version that blog.signals bumps on
+every comment change, so edits never have to delete entries explicitly.
+
+Feeds and the sitemap are keyed on a blog-wide content version that
+blog.signals bumps on every Post save or delete.
+"""
+import time
+import uuid
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+# Stands in for the per-visitor CSRF token inside cached pages.
+CSRF_PLACEHOLDER = 'csrf-token-placeholder-3f9a7c'
+
+STATS_KEYS = ('page:hits', 'page:misses', 'body:hits', 'body:misses')
+
+
+def _cache():
+    return caches[getattr(settings, 'BLOG_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'BLOG_PAGE_CACHE_TIMEOUT', 60 * 60)
+
+
+def comments_version(post_id):
+    cache = _cache()
+    key = f'blog:comments:{post_id}'
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(key, version, None)
+        version = cache.get(key, version)
+    return version
+
+
+def bump_comments_version(*post_ids):
+    cache = _cache()
+    cache.set_many({f'blog:comments:{post_id}': uuid.uuid4().hex for post_id in post_ids}, None)
+
+
+def _count(name):
+    cache = _cache()
+    key = f'blog:stats:{name}'
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def render_cache_stats():
+    """Return hit/miss counters for the page and body caches."""
+    values = _cache().get_many([f'blog:stats:{name}' for name in STATS_KEYS])
+    return {name: values.get(f'blog:stats:{name}', 0) for name in STATS_KEYS}
+
+
+def reset_render_cache_stats():
+    _cache().delete_many([f'blog:stats:{name}' for name in STATS_KEYS])
+
+
+def page_cache_key(post):
+    return f'blog:page:{post.slug}:{post.updated.timestamp()}:{comments_version(post.pk)}'
+
+
+def get_cached_page(post):
+    html = _cache().get(page_cache_key(post))
+    _count('page:hits' if html is not None else 'page:misses')
+    return html
+
+
+def set_cached_page(post, html):
+    _cache().set(page_cache_key(post), html, _timeout())
+
+
+def rendered_body(post):
+    """Return the rendered post body fragment, from the cache when possible."""
+    cache = _cache()
+    key = f'blog:body:{post.slug}:{post.updated.timestamp()}'
+    html = cache.get(key)
+    if html is None:
+        _count('body:misses')
+        html = render_to_string('blog/post_body.html', {'post': post})
+        cache.set(key, html, _timeout())
+    else:
+        _count('body:hits')
+    return mark_safe(html)
+
+
+CONTENT_VERSION_KEY = 'blog:content'
+
+
+def content_version():
+    """Return (version, modified) for the published content as a whole."""
+    cache = _cache()
+    state = cache.get(CONTENT_VERSION_KEY)
+    if state is None:
+        state = (uuid.uuid4().hex, time.time())
+        cache.add(CONTENT_VERSION_KEY, state, None)
+        state = cache.get(CONTENT_VERSION_KEY, state)
+    return state
+
+
+def bump_content_version():
+    _cache().set(CONTENT_VERSION_KEY, (uuid.uuid4().hex, time.time()), None)
+
+
+def content_etag(request, *args, **kwargs):
+    return content_version()[0]
+
+
+def content_last_modified(request, *args, **kwargs):
+    return datetime.fromtimestamp(content_version()[1], tz=timezone.utc)
+
+
+def cache_per_content_version(kind):
+    """
+    Cache a view's rendered response, body and headers, until the next
+    content change. The view runs (and queries the database) once per content
+    version and host.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            cache = _cache()
+            key = f'blog:{kind}:{request.get_host()}:{request.get_full_path()}:{content_version()[0]}'
+            entry = cache.get(key)
+            if entry is None:
+                response = view(request, *args, **kwargs)
+                if hasattr(response, 'render') and callable(response.render):
+                    response.render()
+                if response.status_code != 200:
+                    return response
+                entry = (response.content, list(response.items()))
+                cache.set(key, entry, getattr(settings, 'BLOG_FEED_CACHE_TIMEOUT', 60 * 60 * 24))
+            content, headers = entry
+            response = HttpResponse(content)
+            for header, value in headers:
+                response[header] = value
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,86 @@
+"""
+ETag/Last-Modified support for the blog views.
+
+Both validators are derived from Post.updated and the latest active
+Comment.updated, fetched once per request and memoized on it, so a repeat
+visitor or crawler gets a 304 without the template being rendered. The ETag
+also covers who is looking (the navigation bar differs per user) and counts
+that change on deletes, which a maximum timestamp alone would miss.
+"""
+import hashlib
+
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+from django.shortcuts import get_object_or_404
+
+from .models import Comment, Post
+
+
+def _viewer(request):
+    return f'user:{request.user.pk}' if request.user.is_authenticated else 'anon'
+
+
+def _etag(*parts):
+    return hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _conditional(request):
+    return request.method in ('GET', 'HEAD')
+
+
+def get_post(request, slug):
+    """
+    Return the post for slug (with author and the latest active comment time),
+    fetching it at most once per request.
+    """
+    post = getattr(request, '_blog_post', None)
+    if post is None or post.slug != slug:
+        latest_comment = Comment.objects.filter(
+            post=OuterRef('pk'), active=True
+        ).order_by('-updated').values('updated')[:1]
+        post = get_object_or_404(
+            Post.objects.select_related('author').annotate(latest_comment=Subquery(latest_comment)),
+            slug=slug,
+        )
+        request._blog_post = post
+    return post
+
+
+def post_detail_last_modified(request, slug):
+    if not _conditional(request):
+        return None
+    post = get_post(request, slug)
+    return max(filter(None, [post.updated, post.latest_comment]))
+
+
+def post_detail_etag(request, slug):
+    if not _conditional(request):
+        return None
+    post = get_post(request, slug)
+    return _etag(_viewer(request), post.pk, post.updated, post.latest_comment, post.active_comment_count)
+
+
+def post_list_state(request):
+    """One aggregate over published posts and their active comments, memoized per request."""
+    state = getattr(request, '_blog_list_state', None)
+    if state is None:
+        state = Post.published.aggregate(
+            updated=Max('updated'),
+            posts=Count('pk', distinct=True),
+            latest_comment=Max('comments__updated', filter=Q(comments__active=True)),
+        )
+        request._blog_list_state = state
+    return state
+
+
+def post_list_last_modified(request, *args, **kwargs):
+    if not _conditional(request):
+        return None
+    state = post_list_state(request)
+    return max(filter(None, [state['updated'], state['latest_comment']]), default=None)
+
+
+def post_list_etag(request, *args, **kwargs):
+    if not _conditional(request):
+        return None
+    state = post_list_state(request)
+    return _etag(_viewer(request), state['updated'], state['posts'], state['latest_comment'])
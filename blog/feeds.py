@@ -0,0 +1,46 @@
+"""
+RSS and Atom feeds of published posts.
+
+The feed views in urls.py are wrapped with blog.cache.cache_per_content_version
+and conditional GET validators, so a poll costs no queries until a post changes.
+"""
+from django.contrib.syndication.views import Feed
+from django.template.defaultfilters import striptags, truncatewords
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from .models import Post
+
+
+class LatestPostsFeed(Feed):
+    title = 'Bougyo No Kan Dojo Blog'
+    description = 'New posts from the Bougyo No Kan Dojo blog.'
+
+    def link(self):
+        return reverse('post_list')
+
+    def items(self):
+        return Post.published.select_related('author').order_by('-publish', '-id')[:20]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return truncatewords(striptags(item.body), 60)
+
+    def item_link(self, item):
+        return reverse('post_detail', kwargs={'slug': item.slug})
+
+    def item_pubdate(self, item):
+        return item.publish
+
+    def item_updateddate(self, item):
+        return item.updated
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+
+class AtomLatestPostsFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
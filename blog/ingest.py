@@ -0,0 +1,309 @@
+"""
+Comment ingestion pipeline for blog.views.post_detail.
+
+Every comment submitted through the site passes three stages:
+
+1. Rate limiting: token buckets per client IP and per post, kept in the cache
+   (BLOG_COMMENT_RATE_LIMITS). An empty bucket raises RateLimited.
+2. Duplicate detection: a fingerprint of the post and the normalized body is
+   remembered for BLOG_COMMENT_DUPLICATE_WINDOW seconds. A repeat raises
+   DuplicateComment.
+3. Writing: with BLOG_COMMENT_QUEUE off the comment is saved at once. With it
+   on, the comment is spooled as a small JSON file under
+   BLOG_COMMENT_SPOOL_DIR and written later in batches with bulk_create, so a
+   burst of submissions never queues request workers on the database write
+   lock. The spool is drained by `manage.py flush_comments` or, when
+   BLOG_COMMENT_FLUSH_INTERVAL is set, by a background thread in each worker.
+
+Spooled comments are always inactive, so skipping the post_save signals in
+bulk_create leaves active comment counts and page caches untouched. Spool
+files that cannot be read, lack a field, or belong to a post deleted since
+they were queued are renamed to .rejected and left for inspection, so one bad
+record never blocks the queue. Files claimed by a drainer that died are
+picked up again after BLOG_COMMENT_CLAIM_TIMEOUT seconds.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Comment, Post
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_LIMITS = {
+    # scope: (bucket capacity, seconds to refill a full bucket)
+    'ip': (5, 60),
+    'post': (30, 60),
+}
+
+RECORD_FIELDS = ('post_id', 'name', 'email', 'body')
+
+
+class RateLimited(Exception):
+    pass
+
+
+class DuplicateComment(Exception):
+    pass
+
+
+def _cache():
+    return caches[getattr(settings, 'BLOG_CACHE_ALIAS', 'default')]
+
+
+class TokenBucket:
+    """
+    A token bucket stored in the cache as (tokens, last refill time). Updates
+    are not atomic across processes; an occasional extra comment slipping
+    through under contention is acceptable for spam control.
+    """
+
+    def __init__(self, key, capacity, period, cache=None):
+        self.key = f'blog:bucket:{key}'
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.period = period
+        self.cache = cache or _cache()
+
+    def consume(self, tokens=1):
+        now = time.time()
+        level, stamp = self.cache.get(self.key, (self.capacity, now))
+        level = min(self.capacity, level + (now - stamp) * self.rate)
+        allowed = level >= tokens
+        if allowed:
+            level -= tokens
+        self.cache.set(self.key, (level, now), self.period)
+        return allowed
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR') or 'unknown'
+
+
+def check_rate_limits(request, post):
+    limits = getattr(settings, 'BLOG_COMMENT_RATE_LIMITS', DEFAULT_RATE_LIMITS)
+    keys = {'ip': f'ip:{client_ip(request)}', 'post': f'post:{post.pk}'}
+    for scope, (capacity, period) in limits.items():
+        if not TokenBucket(keys[scope], capacity, period).consume():
+            raise RateLimited(scope)
+
+
+def normalize_body(body):
+    return re.sub(r'\s+', ' ', body).strip().casefold()
+
+
+def fingerprint(post, body):
+    # post.created keeps fingerprints distinct if a deleted post's id is reused
+    raw = f'{post.pk}|{post.created.isoformat()}|{normalize_body(body)}'
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def check_duplicate(post, body):
+    window = getattr(settings, 'BLOG_COMMENT_DUPLICATE_WINDOW', 60 * 60)
+    if not _cache().add(f'blog:seen:{fingerprint(post, body)}', True, window):
+        raise DuplicateComment()
+
+
+def queue_enabled():
+    return getattr(settings, 'BLOG_COMMENT_QUEUE', False)
+
+
+def spool_dir():
+    return getattr(settings, 'BLOG_COMMENT_SPOOL_DIR', os.path.join(settings.BASE_DIR, 'var', 'comment_spool'))
+
+
+def ingest_comment(request, comment):
+    """
+    Run an unsaved comment through the pipeline. Returns True when it was
+    saved immediately and False when it was queued. Raises RateLimited or
+    DuplicateComment.
+    """
+    check_rate_limits(request, comment.post)
+    check_duplicate(comment.post, comment.body)
+    if not queue_enabled():
+        comment.save()
+        return True
+    spool_comment(comment)
+    _ensure_background_flusher()
+    return False
+
+
+def spool_comment(comment):
+    directory = spool_dir()
+    os.makedirs(directory, exist_ok=True)
+    name = f'{time.time_ns()}-{uuid.uuid4().hex}'
+    tmp = os.path.join(directory, f'{name}.tmp')
+    with open(tmp, 'w') as fh:
+        json.dump({
+            'post_id': comment.post_id,
+            'name': comment.name,
+            'email': comment.email,
+            'body': comment.body,
+        }, fh)
+    os.replace(tmp, os.path.join(directory, f'{name}.json'))
+
+
+def pending_count():
+    directory = spool_dir()
+    if not os.path.isdir(directory):
+        return 0
+    return sum(1 for name in os.listdir(directory) if name.endswith('.json'))
+
+
+def _reclaim(directory):
+    """Return .work files older than BLOG_COMMENT_CLAIM_TIMEOUT to the queue."""
+    cutoff = time.time() - getattr(settings, 'BLOG_COMMENT_CLAIM_TIMEOUT', 10 * 60)
+    for name in os.listdir(directory):
+        if not name.endswith('.work'):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.rename(path, path[:-len('.work')] + '.json')
+                logger.warning('Requeued stale spooled comment %s', path)
+        except FileNotFoundError:
+            continue
+
+
+def _claim(directory, batch_size):
+    """Rename up to batch_size spool files to .work so no other drainer takes them."""
+    _reclaim(directory)
+    claimed = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.json'):
+            continue
+        source = os.path.join(directory, name)
+        target = source[:-len('.json')] + '.work'
+        try:
+            os.rename(source, target)
+            # The claim time, for _reclaim(); rename keeps the spool time
+            os.utime(target)
+        except FileNotFoundError:
+            continue
+        claimed.append(target)
+        if len(claimed) >= batch_size:
+            break
+    return claimed
+
+
+def flush_spool(batch_size=500):
+    """
+    Write one batch of spooled comments with a single bulk_create. Returns the
+    number of comments created; duplicates of comments stored within the
+    duplicate window are dropped.
+    """
+    directory = spool_dir()
+    if not os.path.isdir(directory):
+        return 0
+    claimed = _claim(directory, batch_size)
+    if not claimed:
+        return 0
+
+    records = []
+    for path in claimed:
+        try:
+            with open(path) as fh:
+                record = json.load(fh)
+            if not isinstance(record, dict) or any(field not in record for field in RECORD_FIELDS):
+                raise ValueError('missing fields')
+            if not isinstance(record['post_id'], int) or not isinstance(record['body'], str):
+                raise ValueError('bad post_id or body')
+        except (OSError, ValueError) as exc:
+            _reject(path, exc)
+            continue
+        records.append((path, record))
+
+    # Comments on posts deleted since they were queued would fail the whole insert
+    posts = set(Post.objects.filter(pk__in={r['post_id'] for _, r in records}).values_list('pk', flat=True))
+    for path, record in records:
+        if record['post_id'] not in posts:
+            _reject(path, f'post {record["post_id"]} no longer exists')
+    claimed = [path for path, record in records if record['post_id'] in posts]
+    records = [record for _, record in records if record['post_id'] in posts]
+
+    seen = set()
+    unique = []
+    for record in records:
+        key = (record['post_id'], normalize_body(record['body']))
+        if key not in seen:
+            seen.add(key)
+            unique.append(record)
+    window = getattr(settings, 'BLOG_COMMENT_DUPLICATE_WINDOW', 60 * 60)
+    existing = set(
+        (post_id, normalize_body(body))
+        for post_id, body in Comment.objects.filter(
+            post_id__in={r['post_id'] for r in unique},
+            created__gte=timezone.now() - timedelta(seconds=window),
+        ).values_list('post_id', 'body')
+    )
+    comments = [
+        Comment(post_id=r['post_id'], name=r['name'], email=r['email'], body=r['body'])
+        for r in unique
+        if (r['post_id'], normalize_body(r['body'])) not in existing
+    ]
+
+    try:
+        with transaction.atomic():
+            Comment.objects.bulk_create(comments)
+    except Exception:
+        for path in claimed:
+            os.replace(path, path[:-len('.work')] + '.json')
+        raise
+    for path in claimed:
+        os.remove(path)
+    return len(comments)
+
+
+def _reject(path, reason):
+    logger.warning('Rejected spooled comment %s: %s', path, reason)
+    try:
+        os.replace(path, path[:-len('.work')] + '.rejected')
+    except OSError:
+        pass
+
+
+def flush_all(batch_size=500):
+    total = 0
+    while True:
+        created = flush_spool(batch_size)
+        total += created
+        if created == 0 and pending_count() == 0:
+            return total
+
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def _ensure_background_flusher():
+    global _flusher
+    interval = getattr(settings, 'BLOG_COMMENT_FLUSH_INTERVAL', 0)
+    if not interval or (_flusher is not None and _flusher.is_alive()):
+        return
+    with _flusher_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_flush_forever, args=(interval,), name='comment-flusher', daemon=True)
+            _flusher.start()
+
+
+def _flush_forever(interval):
+    from django.db import close_old_connections
+    while True:
+        time.sleep(interval)
+        try:
+            flush_all()
+        except Exception:
+            logger.exception('Flushing spooled comments failed')
+        finally:
+            close_old_connections()
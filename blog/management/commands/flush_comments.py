@@ -0,0 +1,44 @@
+"""
+Write spooled comments (BLOG_COMMENT_QUEUE) to the database in batches.
+
+Usage:
+  python manage.py flush_comments
+  python manage.py flush_comments --batch-size 1000 --loop 5
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.ingest import flush_all, pending_count
+
+
+class Command(BaseCommand):
+    help = 'Write queued blog comments to the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Comments written per bulk insert (default: 500).',
+        )
+        parser.add_argument(
+            '--loop',
+            type=float,
+            default=0,
+            metavar='SECONDS',
+            help='Keep running, flushing every SECONDS.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            created = flush_all(options['batch_size'])
+            if created or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Wrote {created} comment{"s" if created != 1 else ""} '
+                    f'in {time.monotonic() - started:.2f}s; {pending_count()} pending.'
+                ))
+            if not options['loop']:
+                return
+            time.sleep(options['loop'])
@@ -0,0 +1,20 @@
+"""
+Rebuild the blog post search index from the posts table.
+
+Usage:
+  python manage.py rebuild_search_index
+"""
+from django.core.management.base import BaseCommand
+
+from blog.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the blog post full-text search index.'
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        indexed = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'{type(backend).__name__}: indexed {indexed} post{"s" if indexed != 1 else ""}.'
+        ))
@@ -0,0 +1,32 @@
+"""
+Show hit/miss counters for the blog rendered-HTML cache.
+
+Usage:
+  python manage.py render_cache_stats
+  python manage.py render_cache_stats --reset
+
+Counters live in the cache configured by BLOG_CACHE_ALIAS, so they are only
+visible here when that cache is shared between processes (e.g. file-based).
+"""
+from django.core.management.base import BaseCommand
+
+from blog.cache import render_cache_stats, reset_render_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counters for the blog rendered-HTML cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them.')
+
+    def handle(self, *args, **options):
+        stats = render_cache_stats()
+        for kind in ('page', 'body'):
+            hits = stats[f'{kind}:hits']
+            misses = stats[f'{kind}:misses']
+            total = hits + misses
+            ratio = f'{hits / total:.1%}' if total else 'n/a'
+            self.stdout.write(f'{kind}: {hits} hits, {misses} misses (hit ratio {ratio})')
+        if options['reset']:
+            reset_render_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset.'))
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:33
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_active_comment_count(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    active = Comment.objects.filter(post=OuterRef('pk'), active=True).order_by().values('post')
+    Post.objects.update(
+        active_comment_count=Coalesce(Subquery(active.annotate(n=Count('pk')).values('n')), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_alter_comment_id_alter_post_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='active_comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_active_comment_count, migrations.RunPython.noop),
+    ]
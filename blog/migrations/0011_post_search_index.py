@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:02
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+
+def create_fts_index(apps, schema_editor):
+    """Create and fill the FTS5 shadow table used by blog.search on SQLite."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Post = apps.get_model('blog', 'Post')
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts "
+        "USING fts5(title, body, tokenize='porter unicode61 remove_diacritics 2')"
+    )
+    for pk, title, body in Post.objects.values_list('pk', 'title', 'body').iterator():
+        schema_editor.execute(
+            'INSERT INTO blog_post_fts (rowid, title, body) VALUES (%s, %s, %s)',
+            [pk, title, strip_tags(body)],
+        )
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS blog_post_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_post_active_comment_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
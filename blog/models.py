@@ -1,7 +1,11 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.contrib.auth.models import User
 
+from .cache import bump_comments_version
+
 STATUS = (
     (0, "Draft"),
     (1, "Publish")
@@ -20,6 +24,8 @@ class Post(models.Model):
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
     status = models.IntegerField(choices=STATUS, default=0)
+    # Denormalized count of active comments, kept current by blog.signals and CommentQuerySet.approve()
+    active_comment_count = models.PositiveIntegerField(default=0, editable=False)
     objects = models.Manager()  # The default manager
     published = PublishedManager() # Our custom manager
 
@@ -33,6 +39,22 @@ class Post(models.Model):
     def __str__(self):
         return self.title
 
+def refresh_active_comment_counts(post_ids):
+    """Recompute Post.active_comment_count for the given posts in one UPDATE."""
+    active = Comment.objects.filter(post=OuterRef('pk'), active=True).order_by().values('post')
+    Post.objects.filter(pk__in=set(post_ids)).update(
+        active_comment_count=Coalesce(Subquery(active.annotate(n=Count('pk')).values('n')), 0)
+    )
+
+class CommentQuerySet(models.QuerySet):
+    def approve(self):
+        """Mark comments active and refresh the active comment count on their posts."""
+        post_ids = set(self.values_list('post_id', flat=True))
+        updated = self.update(active=True)
+        refresh_active_comment_counts(post_ids)
+        bump_comments_version(*post_ids)
+        return updated
+
 class Comment(models.Model):
     post = models.ForeignKey(Post,on_delete=models.CASCADE,related_name='comments')
     name = models.CharField(max_length=80)
@@ -41,6 +63,7 @@ class Comment(models.Model):
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
     active = models.BooleanField(default=False)
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created']
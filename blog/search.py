@@ -0,0 +1,203 @@
+"""
+Full-text search for blog posts.
+
+On SQLite the posts are mirrored into an FTS5 table (blog_post_fts, created by
+migration 0011) and ranked with bm25, title matches weighing more than body
+matches. Other databases fall back to DatabaseSearchBackend, which uses plain
+ORM lookups. blog.signals keeps the index in step with Post saves and deletes.
+
+Set BLOG_SEARCH_BACKEND to a dotted path to force a particular backend.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.html import strip_tags
+from django.utils.module_loading import import_string
+
+from .models import Post
+
+FTS_TABLE = 'blog_post_fts'
+
+# bm25() column weights for (title, body)
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+
+def search_terms(query):
+    """Split a user query into plain word terms."""
+    return re.findall(r'\w+', query or '')
+
+
+class BaseSearchBackend:
+    """Interface shared by the search backends."""
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def rebuild(self):
+        """Rebuild the index from scratch. Returns the number of posts indexed."""
+        return 0
+
+    def filter_queryset(self, queryset, query):
+        """Restrict queryset to posts matching query, without ranking."""
+        raise NotImplementedError
+
+    def count(self, query):
+        """Number of published posts matching query."""
+        raise NotImplementedError
+
+    def ranked_ids(self, query, offset, limit):
+        """Ids of published posts matching query, best match first."""
+        raise NotImplementedError
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """Search backed by an FTS5 shadow table ranked with bm25."""
+
+    def match_expression(self, query):
+        # Quote each term so FTS5 operators in user input are taken literally,
+        # and allow prefix matches so "kat" finds "kata".
+        return ' '.join('"%s"*' % term for term in search_terms(query))
+
+    def index_post(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)',
+                [post.pk, post.title, strip_tags(post.body)],
+            )
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+    def rebuild(self):
+        rows = [
+            (pk, title, strip_tags(body))
+            for pk, title, body in Post.objects.values_list('pk', 'title', 'body').iterator()
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)', rows)
+        return len(rows)
+
+    def filter_queryset(self, queryset, query):
+        expression = self.match_expression(query)
+        if not expression:
+            return queryset.none()
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [expression])
+        )
+
+    def count(self, query):
+        expression = self.match_expression(query)
+        if not expression:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {FTS_TABLE} JOIN blog_post ON blog_post.id = {FTS_TABLE}.rowid '
+                f'WHERE {FTS_TABLE} MATCH %s AND blog_post.status = 1',
+                [expression],
+            )
+            return cursor.fetchone()[0]
+
+    def ranked_ids(self, query, offset, limit):
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT {FTS_TABLE}.rowid FROM {FTS_TABLE} JOIN blog_post ON blog_post.id = {FTS_TABLE}.rowid '
+                f'WHERE {FTS_TABLE} MATCH %s AND blog_post.status = 1 '
+                f'ORDER BY bm25({FTS_TABLE}, %s, %s), blog_post.publish DESC '
+                f'LIMIT %s OFFSET %s',
+                [expression, TITLE_WEIGHT, BODY_WEIGHT, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """
+    Database-agnostic search using ORM lookups. Every term must appear in the
+    title or body; posts matching every term in the title rank first.
+    """
+
+    def _matching(self, queryset, terms):
+        for term in terms:
+            queryset = queryset.filter(Q(title__icontains=term) | Q(body__icontains=term))
+        return queryset
+
+    def filter_queryset(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        return self._matching(queryset, terms)
+
+    def count(self, query):
+        return self.filter_queryset(Post.published.all(), query).count()
+
+    def ranked_ids(self, query, offset, limit):
+        terms = search_terms(query)
+        if not terms:
+            return []
+        title_match = Q()
+        for term in terms:
+            title_match &= Q(title__icontains=term)
+        queryset = self._matching(Post.published.all(), terms).annotate(
+            title_rank=Case(When(title_match, then=Value(1)), default=Value(0), output_field=IntegerField())
+        ).order_by('-title_rank', '-publish')
+        return list(queryset.values_list('pk', flat=True)[offset:offset + limit])
+
+
+def fts5_available():
+    if connection.vendor != 'sqlite':
+        return False
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'BLOG_SEARCH_BACKEND', None)
+        if path:
+            _backend = import_string(path)()
+        elif fts5_available():
+            _backend = SQLiteFTS5Backend()
+        else:
+            _backend = DatabaseSearchBackend()
+    return _backend
+
+
+class SearchResults:
+    """
+    Lazily evaluated, ranked search results over published posts. Supports
+    count() and slicing so it can be handed straight to a Paginator.
+    """
+
+    def __init__(self, query, backend=None):
+        self.query = query
+        self.backend = backend or get_backend()
+
+    def count(self):
+        return self.backend.count(self.query)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        offset = key.start or 0
+        ids = self.backend.ranked_ids(self.query, offset, key.stop - offset)
+        posts = Post.published.select_related('author').in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search_posts(query):
+    return SearchResults(query)
@@ -0,0 +1,41 @@
+"""
+Keep Post.active_comment_count and the rendered-page comment version in step
+with individual Comment saves and deletes, and the search index and the
+feed/sitemap content version in step with Post saves and deletes. Bulk
+approvals go through CommentQuerySet.approve(), which refreshes the count and
+comment version itself.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import search
+from .cache import bump_comments_version, bump_content_version
+from .models import Comment, Post, refresh_active_comment_counts
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def update_active_comment_count(sender, instance, **kwargs):
+    refresh_active_comment_counts([instance.post_id])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_rendered_comments(sender, instance, **kwargs):
+    bump_comments_version(instance.post_id)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.get_backend().index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.get_backend().remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_feeds(sender, **kwargs):
+    bump_content_version()
@@ -0,0 +1,35 @@
+from django.contrib.sitemaps import Sitemap
+from django.urls import reverse
+
+from .models import Post
+
+
+class PostSitemap(Sitemap):
+    changefreq = 'weekly'
+    priority = 0.6
+
+    def items(self):
+        return Post.published.only('slug', 'updated').order_by('-publish', '-id')
+
+    def location(self, item):
+        return reverse('post_detail', kwargs={'slug': item.slug})
+
+    def lastmod(self, item):
+        return item.updated
+
+
+class StaticPageSitemap(Sitemap):
+    changefreq = 'monthly'
+    priority = 0.4
+
+    def items(self):
+        return ['home', 'about', 'post_list']
+
+    def location(self, item):
+        return reverse(item)
+
+
+sitemaps = {
+    'static': StaticPageSitemap,
+    'posts': PostSitemap,
+}
@@ -314,6 +314,8 @@ class PostDetailViewTests(TestCase):
     """Test cases for post_detail view"""
 
     def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
         self.client = Client()
         self.user = User.objects.create_user(
             username='testuser',
@@ -435,3 +437,488 @@ class PostDetailViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         # Check that no comment was created
         self.assertEqual(Comment.objects.count(), 0)
+
+
+class ActiveCommentCountTests(TestCase):
+    """Test cases for the denormalized Post.active_comment_count"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.post = Post.objects.create(
+            title='Test Post', slug='test-post', author=self.user, body='Test body', status=1
+        )
+
+    def _count(self):
+        self.post.refresh_from_db()
+        return self.post.active_comment_count
+
+    def _comment(self, active):
+        return Comment.objects.create(
+            post=self.post, name='Reader', email='reader@example.com', body='Comment', active=active
+        )
+
+    def test_count_follows_save_and_delete(self):
+        """Saving and deleting active comments updates the count"""
+        comment = self._comment(active=True)
+        self._comment(active=False)
+        self.assertEqual(self._count(), 1)
+        comment.active = False
+        comment.save()
+        self.assertEqual(self._count(), 0)
+        comment.active = True
+        comment.save()
+        comment.delete()
+        self.assertEqual(self._count(), 0)
+
+    def test_bulk_approve_updates_count(self):
+        """CommentQuerySet.approve() refreshes counts after a bulk update"""
+        for _ in range(3):
+            self._comment(active=False)
+        self.assertEqual(self._count(), 0)
+        self.assertEqual(Comment.objects.filter(post=self.post).approve(), 3)
+        self.assertEqual(self._count(), 3)
+
+    def test_admin_approve_action_updates_count(self):
+        """CommentAdmin.approve_comments goes through approve()"""
+        from django.contrib.admin.sites import site
+        self._comment(active=False)
+        site._registry[Comment].approve_comments(None, Comment.objects.all())
+        self.assertEqual(self._count(), 1)
+
+    def test_post_detail_query_count_is_fixed(self):
+        """The post page costs the same number of queries for 1 or 20 comments"""
+        url = reverse('post_detail', kwargs={'slug': self.post.slug})
+        self._comment(active=True)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertContains(response, '1 comment')
+        for _ in range(19):
+            self._comment(active=True)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertContains(response, '20 comments')
+
+
+class RenderCacheTests(TestCase):
+    """Test cases for the rendered-HTML cache in blog.cache"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.post = Post.objects.create(
+            title='Cached Post', slug='cached-post', author=self.user, body='<b>Cached body</b>', status=1
+        )
+        self.url = reverse('post_detail', kwargs={'slug': self.post.slug})
+
+    def test_anonymous_page_is_served_from_cache(self):
+        """The second anonymous GET is a cache hit costing one query"""
+        from .cache import render_cache_stats
+        first = self.client.get(self.url)
+        self.assertEqual(first['X-Render-Cache'], 'miss')
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url)
+        self.assertEqual(second['X-Render-Cache'], 'hit')
+        self.assertContains(second, '<b>Cached body</b>')
+        stats = render_cache_stats()
+        self.assertEqual(stats['page:hits'], 1)
+        self.assertEqual(stats['page:misses'], 1)
+
+    def test_cached_page_carries_the_visitors_csrf_token(self):
+        """The placeholder is swapped for a real token on every response"""
+        from .cache import CSRF_PLACEHOLDER
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        content = response.content.decode('utf-8')
+        self.assertNotIn(CSRF_PLACEHOLDER, content)
+        self.assertIn('csrfmiddlewaretoken', content)
+
+    def test_approving_a_comment_invalidates_the_page(self):
+        """Comment changes bump the comment version in the page key"""
+        comment = Comment.objects.create(post=self.post, name='Reader', body='Nice post', active=False)
+        self.client.get(self.url)
+        Comment.objects.filter(pk=comment.pk).approve()
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Render-Cache'], 'miss')
+        self.assertContains(response, 'Nice post')
+
+    def test_editing_the_post_invalidates_the_page(self):
+        """A new updated timestamp produces a new key"""
+        self.client.get(self.url)
+        self.post.body = 'Edited body'
+        self.post.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Render-Cache'], 'miss')
+        self.assertContains(response, 'Edited body')
+
+    def test_authenticated_users_get_cached_body_fragment(self):
+        """Logged-in users are never served the shared page, only the body fragment"""
+        from .cache import render_cache_stats
+        self.client.login(username='testuser', password='testpass123')
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        self.assertNotIn('X-Render-Cache', response)
+        self.assertContains(response, 'Logged in as testuser')
+        self.assertEqual(render_cache_stats()['body:hits'], 1)
+
+
+class CommentIngestionTests(TestCase):
+    """Test cases for the comment ingestion pipeline in blog.ingest"""
+
+    def setUp(self):
+        import tempfile
+        from django.core.cache import cache
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.spool = tempfile.TemporaryDirectory()
+        self.addCleanup(self.spool.cleanup)
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.post = Post.objects.create(
+            title='Ingest Post', slug='ingest-post', author=self.user, body='Body', status=1
+        )
+        self.url = reverse('post_detail', kwargs={'slug': self.post.slug})
+
+    def _post(self, body, **extra):
+        return self.client.post(self.url, {'name': 'Reader', 'email': 'r@example.com', 'body': body}, **extra)
+
+    def test_ip_rate_limit_returns_429(self):
+        """Once the per-IP bucket is empty the form is re-rendered with a 429"""
+        with self.settings(BLOG_COMMENT_RATE_LIMITS={'ip': (2, 60), 'post': (30, 60)}):
+            self.assertEqual(self._post('one').status_code, 302)
+            self.assertEqual(self._post('two').status_code, 302)
+            response = self._post('three')
+        self.assertEqual(response.status_code, 429)
+        self.assertContains(response, 'commenting too quickly', status_code=429)
+        self.assertEqual(Comment.objects.filter(post=self.post).count(), 2)
+
+    def test_post_rate_limit_applies_across_clients(self):
+        """The per-post bucket is shared by every client"""
+        with self.settings(BLOG_COMMENT_RATE_LIMITS={'ip': (5, 60), 'post': (1, 60)}):
+            self.assertEqual(self._post('one', REMOTE_ADDR='10.0.0.1').status_code, 302)
+            self.assertEqual(self._post('two', REMOTE_ADDR='10.0.0.2').status_code, 429)
+
+    def test_token_bucket_refills(self):
+        """Tokens come back at capacity / period per second"""
+        from unittest import mock
+        from .ingest import TokenBucket
+        bucket = TokenBucket('test', capacity=1, period=10)
+        with mock.patch('blog.ingest.time.time', return_value=1000.0):
+            self.assertTrue(bucket.consume())
+            self.assertFalse(bucket.consume())
+        with mock.patch('blog.ingest.time.time', return_value=1010.0):
+            self.assertTrue(bucket.consume())
+
+    def test_duplicate_body_is_not_saved_twice(self):
+        """A resubmitted body (ignoring case and whitespace) is dropped"""
+        self._post('Great   post')
+        response = self._post('great post')
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        self.assertEqual(Comment.objects.filter(post=self.post).count(), 1)
+
+    def test_queued_comments_are_flushed_in_one_insert(self):
+        """With the queue on, comments reach the database only when flushed"""
+        from .ingest import flush_all, pending_count
+        with self.settings(BLOG_COMMENT_QUEUE=True, BLOG_COMMENT_SPOOL_DIR=self.spool.name):
+            for body in ('first', 'second', 'third'):
+                self.assertEqual(self._post(body).status_code, 302)
+            self.assertFalse(Comment.objects.exists())
+            self.assertEqual(pending_count(), 3)
+            with self.assertNumQueries(5):  # post check, duplicate check, savepoint, insert, release
+                self.assertEqual(flush_all(), 3)
+            self.assertEqual(pending_count(), 0)
+        self.assertEqual(
+            sorted(Comment.objects.values_list('body', flat=True)), ['first', 'second', 'third']
+        )
+        self.assertFalse(Comment.objects.filter(active=True).exists())
+
+    def test_flush_drops_comments_already_in_the_database(self):
+        """The flush re-checks duplicates against stored comments"""
+        from io import StringIO
+        from django.core.management import call_command
+        from .ingest import spool_comment
+        Comment.objects.create(post=self.post, name='Reader', body='Same body')
+        with self.settings(BLOG_COMMENT_SPOOL_DIR=self.spool.name):
+            spool_comment(Comment(post=self.post, name='Reader', body='same  body'))
+            spool_comment(Comment(post=self.post, name='Reader', body='Other body'))
+            out = StringIO()
+            call_command('flush_comments', stdout=out)
+        self.assertIn('Wrote 1 comment ', out.getvalue())
+        self.assertEqual(Comment.objects.filter(post=self.post).count(), 2)
+
+
+    def test_bad_records_are_rejected_without_blocking_the_queue(self):
+        """Records for deleted posts or with missing fields are set aside; the rest are written"""
+        import os
+        from .ingest import flush_all, pending_count, spool_comment
+        other = Post.objects.create(title='Gone', slug='gone', author=self.user, body='Body', status=1)
+        with self.settings(BLOG_COMMENT_SPOOL_DIR=self.spool.name):
+            spool_comment(Comment(post=other, name='Reader', body='On a deleted post'))
+            spool_comment(Comment(post=self.post, name='Reader', body='Kept'))
+            with open(os.path.join(self.spool.name, '1-partial.json'), 'w') as fh:
+                fh.write('{"post_id": %d}' % self.post.pk)
+            other.delete()
+            self.assertEqual(flush_all(), 1)
+            self.assertEqual(pending_count(), 0)
+        self.assertEqual(list(Comment.objects.values_list('body', flat=True)), ['Kept'])
+        names = os.listdir(self.spool.name)
+        self.assertEqual(sorted(name.rsplit('.', 1)[1] for name in names), ['rejected', 'rejected'])
+
+    def test_stale_claims_are_requeued(self):
+        """Files left claimed by a drainer that died are flushed on a later run"""
+        import os
+        from .ingest import flush_all, spool_comment
+        with self.settings(BLOG_COMMENT_SPOOL_DIR=self.spool.name):
+            spool_comment(Comment(post=self.post, name='Reader', body='Stranded'))
+            [name] = os.listdir(self.spool.name)
+            work = os.path.join(self.spool.name, name[:-len('.json')] + '.work')
+            os.rename(os.path.join(self.spool.name, name), work)
+            self.assertEqual(flush_all(), 0)
+            os.utime(work, (0, 0))
+            self.assertEqual(flush_all(), 1)
+        self.assertTrue(Comment.objects.filter(body='Stranded').exists())
+
+class PostSearchTests(TestCase):
+    """Test cases for blog.search and the post_search view"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.kata_title = Post.objects.create(
+            title='Kata fundamentals', slug='kata-fundamentals', author=self.user,
+            body='<p>Basics of stance.</p>', status=1
+        )
+        self.kata_body = Post.objects.create(
+            title='Training notes', slug='training-notes', author=self.user,
+            body='<p>We practiced kata and kumite.</p>', status=1
+        )
+        self.draft = Post.objects.create(
+            title='Kata draft', slug='kata-draft', author=self.user, body='Unpublished', status=0
+        )
+
+    def test_sqlite_uses_fts5_backend(self):
+        """The FTS5 shadow table is created by migrations on SQLite"""
+        from .search import SQLiteFTS5Backend, get_backend
+        self.assertIsInstance(get_backend(), SQLiteFTS5Backend)
+
+    def test_title_matches_rank_first_and_drafts_are_excluded(self):
+        """bm25 weighs the title above the body; drafts never appear"""
+        from .search import search_posts
+        results = search_posts('kata')
+        self.assertEqual(results.count(), 2)
+        self.assertEqual(results[0:10], [self.kata_title, self.kata_body])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Signals keep the FTS index in step with posts"""
+        from .search import search_posts
+        self.kata_body.body = 'Only kumite today.'
+        self.kata_body.save()
+        self.assertEqual(search_posts('kata').count(), 1)
+        self.kata_title.delete()
+        self.assertEqual(search_posts('kata').count(), 0)
+
+    def test_fts_operators_in_queries_are_literal(self):
+        """User input cannot inject FTS5 syntax"""
+        from .search import search_posts
+        self.assertEqual(search_posts('kata"*').count(), 2)
+        self.assertEqual(search_posts('kata" OR "stance').count(), 0)
+        self.assertEqual(search_posts('"(').count(), 0)
+
+    def test_database_backend_matches_fts_backend(self):
+        """The database-agnostic fallback returns the same ranked posts"""
+        from .search import DatabaseSearchBackend, SearchResults
+        results = SearchResults('kata', backend=DatabaseSearchBackend())
+        self.assertEqual(results.count(), 2)
+        self.assertEqual(results[0:10], [self.kata_title, self.kata_body])
+
+    def test_search_view_paginates_results(self):
+        """The search view lists ranked posts with pagination"""
+        response = self.client.get(reverse('post_search'), {'q': 'kata'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'blog/search.html')
+        self.assertEqual(list(response.context['posts']), [self.kata_title, self.kata_body])
+        self.assertEqual(response.context['page_obj'].paginator.count, 2)
+
+    def test_admin_search_uses_index(self):
+        """PostAdmin search goes through the search backend and includes drafts"""
+        from django.contrib.admin.sites import site
+        admin = site._registry[Post]
+        queryset, may_have_duplicates = admin.get_search_results(None, Post.objects.all(), 'kata')
+        self.assertFalse(may_have_duplicates)
+        self.assertEqual(set(queryset), {self.kata_title, self.kata_body, self.draft})
+
+
+class PostListKeysetPaginationTests(TestCase):
+    """Test cases for keyset pagination of PostListView"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        now = timezone.now()
+        # Two posts share a publish time to exercise the id tie-breaker
+        self.posts = [
+            Post.objects.create(
+                title=f'Post {i}', slug=f'post-{i}', author=self.user, body='Body', status=1,
+                publish=now - timedelta(days=i // 2)
+            )
+            for i in range(8)
+        ]
+        self.expected = sorted(self.posts, key=lambda p: (p.publish, p.pk), reverse=True)
+
+    def _walk(self):
+        seen, response = [], self.client.get(reverse('post_list'))
+        while True:
+            seen.extend(response.context['posts'])
+            page = response.context['page_obj']
+            if not page.has_next():
+                return seen, response
+            response = self.client.get(reverse('post_list'), {'after': page.next_cursor})
+
+    def test_walking_next_links_visits_every_post_once(self):
+        """Following ?after= cursors yields all posts in (publish, id) order"""
+        seen, _ = self._walk()
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_link_returns_the_prior_page(self):
+        """?before= walks back to the page that linked here"""
+        first = self.client.get(reverse('post_list'))
+        second = self.client.get(reverse('post_list'), {'after': first.context['page_obj'].next_cursor})
+        back = self.client.get(reverse('post_list'), {'before': second.context['page_obj'].previous_cursor})
+        self.assertEqual(list(back.context['posts']), list(first.context['posts']))
+        self.assertFalse(back.context['page_obj'].has_previous())
+
+    def test_no_pagination_count_query(self):
+        """A page of the list costs the page query plus the conditional GET aggregate"""
+        with self.assertNumQueries(2):
+            self.client.get(reverse('post_list'))
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        """A tampered cursor shows the first page instead of an error"""
+        response = self.client.get(reverse('post_list'), {'after': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['posts']), self.expected[:3])
+
+    def test_pagination_template_renders_cursor_links(self):
+        """pages/pagination.html renders Next with an opaque cursor"""
+        response = self.client.get(reverse('post_list'))
+        self.assertContains(response, '?after=%s' % response.context['page_obj'].next_cursor)
+        self.assertNotContains(response, 'Page ')
+
+
+class ConditionalGetTests(TestCase):
+    """Test cases for ETag/Last-Modified handling in blog.conditional"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.post = Post.objects.create(
+            title='Test Post', slug='test-post', author=self.user, body='Test body', status=1
+        )
+        self.detail_url = reverse('post_detail', kwargs={'slug': self.post.slug})
+
+    def test_detail_sets_validators(self):
+        """post_detail responses carry ETag and Last-Modified headers"""
+        response = self.client.get(self.detail_url)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+    def test_detail_returns_304_without_rendering(self):
+        """A matching If-None-Match gets a 304 after a single query"""
+        etag = self.client.get(self.detail_url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_detail_etag_changes_when_comment_approved(self):
+        """Approving a comment invalidates the previous ETag"""
+        comment = Comment.objects.create(post=self.post, name='Reader', body='Hi', active=False)
+        etag = self.client.get(self.detail_url)['ETag']
+        Comment.objects.filter(pk=comment.pk).approve()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_etag_differs_per_viewer(self):
+        """Anonymous and logged-in users never share an ETag"""
+        anonymous = self.client.get(self.detail_url)['ETag']
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=anonymous)
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_returns_304_until_a_post_changes(self):
+        """The list ETag follows post edits"""
+        etag = self.client.get(reverse('post_list'))['ETag']
+        response = self.client.get(reverse('post_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.post.title = 'Renamed'
+        self.post.save()
+        response = self.client.get(reverse('post_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_if_modified_since(self):
+        """Last-Modified round-trips through If-Modified-Since"""
+        last_modified = self.client.get(reverse('post_list'))['Last-Modified']
+        response = self.client.get(reverse('post_list'), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+
+class FeedAndSitemapTests(TestCase):
+    """Test cases for the cached feeds and sitemap"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.published = Post.objects.create(
+            title='Published Post', slug='published-post', author=self.user, body='<p>Hello</p>', status=1
+        )
+        self.draft = Post.objects.create(
+            title='Draft Post', slug='draft-post', author=self.user, body='Draft', status=0
+        )
+
+    def test_rss_feed_lists_published_posts(self):
+        """The RSS feed uses PublishedManager"""
+        response = self.client.get(reverse('post_feed'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('application/rss+xml', response['Content-Type'])
+        self.assertContains(response, 'Published Post')
+        self.assertNotContains(response, 'Draft Post')
+
+    def test_atom_feed(self):
+        """The Atom feed is served alongside RSS"""
+        response = self.client.get(reverse('post_feed_atom'))
+        self.assertIn('application/atom+xml', response['Content-Type'])
+        self.assertContains(response, 'Published Post')
+
+    def test_feed_is_served_from_cache(self):
+        """Repeat polls run no queries until a post changes"""
+        self.client.get(reverse('post_feed'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('post_feed'))
+        self.assertContains(response, 'Published Post')
+        self.published.title = 'Retitled Post'
+        self.published.save()
+        self.assertContains(self.client.get(reverse('post_feed')), 'Retitled Post')
+
+    def test_feed_conditional_get(self):
+        """Pollers that send the ETag back get a 304"""
+        etag = self.client.get(reverse('post_feed'))['ETag']
+        response = self.client.get(reverse('post_feed'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_sitemap_lists_published_posts(self):
+        """The sitemap covers published posts and is cached"""
+        response = self.client.get('/sitemap.xml')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, reverse('post_detail', kwargs={'slug': 'published-post'}))
+        self.assertNotContains(response, 'draft-post')
+        with self.assertNumQueries(0):
+            cached = self.client.get('/sitemap.xml')
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['X-Robots-Tag'], response['X-Robots-Tag'])
+        self.assertEqual(cached['Content-Type'], response['Content-Type'])
@@ -3,5 +3,8 @@ from django.urls import path
 
 urlpatterns = [
     path('', views.PostListView.as_view(), name='post_list'),
+    path('search/', views.post_search, name='post_search'),
+    path('feed/', views.latest_posts_feed, name='post_feed'),
+    path('feed/atom/', views.latest_posts_atom_feed, name='post_feed_atom'),
     path('<slug:slug>/', views.post_detail, name='post_detail'),
 ]
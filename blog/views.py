@@ -1,16 +1,53 @@
 from django.views import generic
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import condition, require_http_methods
+from django.utils.decorators import method_decorator
 from django.contrib import messages
-from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib.sitemaps.views import sitemap as sitemap_view
+from django.core.paginator import Paginator
+from django.shortcuts import render, redirect
+from django.db.models import Prefetch, prefetch_related_objects
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.http import urlencode
+from . import cache as render_cache
+from . import conditional
+from . import ingest
 from .models import Post, Comment
+from .feeds import AtomLatestPostsFeed, LatestPostsFeed
 from .forms import CommentForm
+from .search import search_posts
+from pages.pagination import KeysetPaginationMixin
 
 
-class PostListView(generic.ListView):
-    """Optimized list view with query optimization"""
-    queryset = Post.published.select_related('author').order_by('-created')
+def active_comments_prefetch():
+    """Prefetch only active comments into post.active_comments."""
+    return Prefetch('comments', queryset=Comment.objects.filter(active=True), to_attr='active_comments')
+
+
+# Feeds and the sitemap are served from cache until the next post change,
+# and answer conditional GETs from the cached content version alone.
+content_condition = condition(
+    etag_func=render_cache.content_etag, last_modified_func=render_cache.content_last_modified
+)
+latest_posts_feed = content_condition(render_cache.cache_per_content_version('rss')(LatestPostsFeed()))
+latest_posts_atom_feed = content_condition(render_cache.cache_per_content_version('atom')(AtomLatestPostsFeed()))
+sitemap = content_condition(render_cache.cache_per_content_version('sitemap')(sitemap_view))
+
+
+@method_decorator(
+    condition(etag_func=conditional.post_list_etag, last_modified_func=conditional.post_list_last_modified),
+    name='dispatch',
+)
+class PostListView(KeysetPaginationMixin, generic.ListView):
+    """
+    Published posts, newest first, with keyset pagination over (publish, id)
+    so no COUNT(*) is run and deep pages cost the same as the first
+    """
+    queryset = Post.published.select_related('author')
     context_object_name = 'posts'
     paginate_by = 3
+    keyset = ('publish', 'id')
+    keyset_descending = True
     template_name = 'blog/list.html'
 
 
@@ -18,27 +55,42 @@ class PostDetailView(generic.DetailView):
     """Optimized detail view with query optimization"""
     model = Post
     template_name = 'blog/post_detail.html'
-    queryset = Post.objects.select_related('author').prefetch_related('comments')
+    queryset = Post.objects.select_related('author').prefetch_related(active_comments_prefetch())
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        post = self.get_object()
-        # Only get active comments, already prefetched
-        context['comments'] = [c for c in post.comments.all() if c.active]
+        # Only active comments were prefetched
+        context['comments'] = self.object.active_comments
+        context['post_body'] = render_cache.rendered_body(self.object)
         context['comment_form'] = CommentForm()
         return context
 
 
 @require_http_methods(["GET", "POST"])
+@condition(etag_func=conditional.post_detail_etag, last_modified_func=conditional.post_detail_last_modified)
 def post_detail(request, slug):
-    """Optimized post detail view with comment handling"""
-    post = get_object_or_404(
-        Post.objects.select_related('author').prefetch_related('comments'),
-        slug=slug
-    )
-    comments = post.comments.filter(active=True)
+    """
+    Post detail view with comment handling. Anonymous GETs are served from the
+    rendered-page cache; other requests reuse the cached post body fragment.
+    Repeat GETs are answered with 304 by the conditional decorator.
+    Requests flagged with `static_export` (export_static_site) bypass the
+    cache and render a comment link in place of the CSRF-protected form.
+    New comments go through blog.ingest (rate limits, duplicate detection and
+    the optional write queue).
+    """
+    post = conditional.get_post(request, slug)
     new_comment = None
-    
+    status = 200
+    static_export = getattr(request, 'static_export', False)
+    cache_page = request.method == 'GET' and not request.user.is_authenticated and not static_export
+
+    if cache_page:
+        html = render_cache.get_cached_page(post)
+        if html is not None:
+            response = HttpResponse(html.replace(render_cache.CSRF_PLACEHOLDER, get_token(request)))
+            response['X-Render-Cache'] = 'hit'
+            return response
+
     if request.method == 'POST':
         comment_form = CommentForm(data=request.POST)
         if comment_form.is_valid():
@@ -51,16 +103,55 @@ def post_detail(request, slug):
             if request.user.is_authenticated:
                 new_comment.name = request.user.get_full_name() or request.user.username
                 new_comment.email = request.user.email or new_comment.email
-            # Save the comment to the database
-            new_comment.save()
-            messages.success(request, 'Your comment has been submitted and is awaiting moderation.')
-            return redirect('post_detail', slug=post.slug)
+            try:
+                ingest.ingest_comment(request, new_comment)
+            except ingest.RateLimited:
+                new_comment = None
+                comment_form.add_error(None, 'You are commenting too quickly. Please wait a minute and try again.')
+                status = 429
+            except ingest.DuplicateComment:
+                # Treat a resubmission as the success it already was
+                messages.info(request, 'This comment has already been submitted and is awaiting moderation.')
+                return redirect('post_detail', slug=post.slug)
+            else:
+                messages.success(request, 'Your comment has been submitted and is awaiting moderation.')
+                return redirect('post_detail', slug=post.slug)
     else:
         comment_form = CommentForm()
 
-    return render(request, 'blog/post_detail.html', {
+    prefetch_related_objects([post], active_comments_prefetch())
+    context = {
         'post': post,
-        'comments': comments,
+        'post_body': render_cache.rendered_body(post),
+        'comments': post.active_comments,
         'new_comment': new_comment,
-        'comment_form': comment_form
+        'comment_form': comment_form,
+        'static_export': static_export,
+    }
+    if not cache_page:
+        return render(request, 'blog/post_detail.html', context, status=status)
+
+    # Render with a placeholder token so the cached copy can be shared by every visitor
+    context['csrf_token'] = render_cache.CSRF_PLACEHOLDER
+    response = render(request, 'blog/post_detail.html', context)
+    html = response.content.decode(response.charset)
+    render_cache.set_cached_page(post, html)
+    response.content = html.replace(render_cache.CSRF_PLACEHOLDER, get_token(request))
+    response['X-Render-Cache'] = 'miss'
+    return response
+
+
+@require_http_methods(["GET"])
+def post_search(request):
+    """Ranked full-text search over published posts"""
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        paginator = Paginator(search_posts(query), 10)
+        page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'blog/search.html', {
+        'query': query,
+        'query_string': urlencode({'q': query}),
+        'page_obj': page_obj,
+        'posts': page_obj.object_list if page_obj else [],
     })
@@ -46,6 +46,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.sitemaps',
 ]
 
 MIDDLEWARE = [
@@ -90,6 +91,74 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Local memory needs no external services. When running several worker
+# processes, switch to a shared cache in local_settings.py so signal-driven
+# invalidation reaches every worker. Use Memcached or Redis for the alias in
+# PEOPLE_USER_CACHE_ALIAS: cached users include password hashes and must not
+# be written to disk, so FileBasedCache only suits the other aliases.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ikyoshi',
+    },
+}
+
+# Cached user dashboard payloads (pages.dashboard). Entries are dropped on
+# any change to martial artists, ranks, styles or posts; a timeout of
+# pages.dashboard.DEFAULT_CACHE_TIMEOUT (15 minutes) is the backstop, and
+# DASHBOARD_CACHE_TIMEOUT overrides it.
+DASHBOARD_CACHE_ALIAS = 'default'
+
+# request.user is loaded with its linked MartialArtist in one query and cached
+# (people.auth); entries are dropped when the user or its profile link changes.
+# ModelBackend stays listed so sessions created before ProfileBackend, which
+# store its path, remain valid.
+AUTHENTICATION_BACKENDS = [
+    'people.auth.ProfileBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+PEOPLE_USER_CACHE_ALIAS = 'default'
+PEOPLE_USER_CACHE_TIMEOUT = 60 * 5
+
+# Rank ladders (ranks.ladders), kept in each process until a rank type or
+# style changes; the timeout bounds changes that skip signals. Each process
+# checks the shared version for changes at most every check interval.
+RANKS_CACHE_ALIAS = 'default'
+RANKS_LADDER_CACHE_TIMEOUT = 60 * 5
+RANKS_LADDER_VERSION_CHECK_INTERVAL = 5
+
+# Sessions. The database engine needs no shared cache. With several workers
+# and a shared cache, 'pages.sessions' reads sessions from the cache and
+# writes each one to the database at most every SESSION_WRITE_BEHIND_INTERVAL
+# seconds; 'django.contrib.sessions.backends.signed_cookies' stores nothing
+# server-side. `manage.py benchmark_sessions` compares them on our views and
+# `manage.py purge_sessions` deletes expired rows in batches.
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+SESSION_WRITE_BEHIND_INTERVAL = 60 * 5
+
+# Rendered blog post pages and body fragments (blog.cache).
+BLOG_CACHE_ALIAS = 'default'
+BLOG_PAGE_CACHE_TIMEOUT = 60 * 60
+# Feeds and sitemap are rebuilt on the first request after any post change.
+BLOG_FEED_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Comment ingestion (blog.ingest). Rate limits are (bucket size, seconds to
+# refill it) per client IP and per post. With BLOG_COMMENT_QUEUE on, comments
+# are spooled to disk and written in batches by `manage.py flush_comments`,
+# or by a thread in each worker every BLOG_COMMENT_FLUSH_INTERVAL seconds.
+# A batch claimed by a drainer that died is retried after
+# BLOG_COMMENT_CLAIM_TIMEOUT seconds.
+BLOG_COMMENT_RATE_LIMITS = {'ip': (5, 60), 'post': (30, 60)}
+BLOG_COMMENT_DUPLICATE_WINDOW = 60 * 60
+BLOG_COMMENT_QUEUE = False
+BLOG_COMMENT_SPOOL_DIR = os.path.join(BASE_DIR, 'var', 'comment_spool')
+BLOG_COMMENT_FLUSH_INTERVAL = 0
+BLOG_COMMENT_CLAIM_TIMEOUT = 10 * 60
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -128,11 +197,40 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+# Unhashed static names (anything not referenced through {% static %} with the
+# manifest storage) are cached this long; hashed names are cached for a year.
+STATIC_CACHE_MAX_AGE = 60 * 60
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Media is served by pages.media.serve_media. Set MEDIA_SENDFILE to 'nginx'
+# (X-Accel-Redirect to an `internal` location at MEDIA_ACCEL_REDIRECT_PREFIX
+# aliased to MEDIA_ROOT) or 'apache' (mod_xsendfile) to let the front server
+# send the bytes after Django has checked access.
+MEDIA_SENDFILE = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 30
+
+# Uploaded people photos are downscaled to fit this many pixels on the long
+# side and re-encoded at this JPEG quality (people.images.normalize_upload).
+PEOPLE_IMAGE_MAX_DIMENSION = 1600
+PEOPLE_IMAGE_QUALITY = 85
+
+# Static HTML tree written by `manage.py export_static_site` for the front web server.
+STATIC_EXPORT_ROOT = os.path.join(BASE_DIR, 'site_export')
+
 try:
     from .local_settings import *
 except ImportError:
     print("Looks like no local file.  You must be on production.")
+
+# Outside DEBUG, collectstatic writes content-hashed names plus .gz/.br copies
+# (pages.storage), unless local_settings sets its own STORAGES. Run
+# `manage.py vendor_static` before collectstatic to serve Bootstrap and the
+# fonts locally instead of from CDNs; `manage.py check --deploy` warns until then.
+if not DEBUG and 'STORAGES' not in globals():
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'pages.storage.CompressedManifestStaticFilesStorage'},
+    }
@@ -13,12 +13,17 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
-from django.urls import include, path
-from django.conf.urls.static import static
+from django.urls import include, path, re_path
 from django.conf import settings
 from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 
+from blog.sitemaps import sitemaps
+from blog.views import sitemap
+from pages.media import serve_media, serve_static
+
 admin.site.site_header = 'Bougyo No Kan Dojo Administration'
 
 urlpatterns = [
@@ -28,7 +33,18 @@ urlpatterns = [
     path('', include('pages.urls')),
     path('admin/', admin.site.urls, name='admin'),
     path('blog/', include('blog.urls'), name='blog'),
+    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='sitemap'),
 ]
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-urlpatterns += staticfiles_urlpatterns()
+# Uploaded media goes through serve_media for access checks and cache headers,
+# and is handed to the front server when MEDIA_SENDFILE is set.
+urlpatterns += [
+    re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
+]
+if settings.DEBUG:
+    urlpatterns += staticfiles_urlpatterns()
+else:
+    # Hashed, precompressed files from collectstatic (pages.storage)
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.+)$' % re.escape(settings.STATIC_URL.lstrip('/')), serve_static, name='static'),
+    ]
@@ -0,0 +1,18 @@
+"""
+System checks for the pages app (run with `manage.py check --deploy`).
+"""
+from django.core.checks import Tags, Warning, register
+
+from .vendor import VENDOR_DIR, is_vendored
+
+
+@register(Tags.staticfiles, deploy=True)
+def check_vendored_assets(app_configs, **kwargs):
+    """Deployments should serve Bootstrap and the fonts themselves."""
+    if is_vendored():
+        return []
+    return [Warning(
+        'Bootstrap and the Roboto font are not vendored, so every page loads them from third-party CDNs.',
+        hint=f'Run `manage.py vendor_static` to download them into {VENDOR_DIR} before collectstatic.',
+        id='pages.W001',
+    )]
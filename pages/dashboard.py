@@ -0,0 +1,172 @@
+"""
+Dashboard data engine for pages.views.user_dashboard.
+
+Each dashboard section registers a data function under the same
+url_name_or_path used in DASHBOARD_PAGES. A data function receives a
+DashboardScope and returns a dict with 'items' and 'count'. Summaries are
+fetched with a window-function count, so every section costs at most one
+query no matter how many rows it lists.
+
+The summaries for all sections are cached together as one payload: per user,
+or shared by every staff user without a linked profile. pages.signals calls
+invalidate_dashboards() whenever the underlying data changes.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Window
+from django.urls import reverse
+
+SECTION_REGISTRY = {}
+
+VERSION_KEY = 'dashboard:version'
+
+# Backstop for payloads that invalidate_dashboards() missed; DASHBOARD_CACHE_TIMEOUT overrides it
+DEFAULT_CACHE_TIMEOUT = 60 * 15
+
+
+def register_section(url_name_or_path):
+    """Register a data function for the dashboard section at url_name_or_path."""
+    def decorator(func):
+        SECTION_REGISTRY[url_name_or_path] = func
+        return func
+    return decorator
+
+
+class DashboardScope:
+    """Who the dashboard is being built for."""
+
+    def __init__(self, user):
+        self.user = user
+        self.martial_artist = getattr(user, 'martial_artist_profile', None)
+        self.staff_see_all = user.is_staff and self.martial_artist is None
+
+
+def windowed(queryset, limit):
+    """
+    Return (rows, total) for the first `limit` rows of queryset in one query.
+    The total is computed by a COUNT(*) OVER () window evaluated before LIMIT.
+    """
+    rows = list(queryset.annotate(window_total=Window(Count('pk')))[:limit])
+    total = rows[0].window_total if rows else 0
+    return rows, total
+
+
+def get_section_data(url_name_or_path, scope):
+    """
+    Return summary data for a section, or None when the section has no
+    registered data function or its query fails.
+    """
+    func = SECTION_REGISTRY.get(url_name_or_path)
+    if func is None:
+        return None
+    try:
+        return func(scope)
+    except Exception:
+        return None
+
+
+def _cache():
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def _version(cache):
+    """
+    Return the current dashboard generation. A random token (rather than a
+    counter) means a version lost to eviction can never be reused.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(VERSION_KEY, version, None)
+        version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def invalidate_dashboards():
+    """Drop every cached dashboard payload by starting a new generation."""
+    _cache().set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def payload_cache_key(scope, version):
+    if scope.staff_see_all:
+        return f'dashboard:staff:{version}'
+    return f'dashboard:user:{scope.user.pk}:{version}'
+
+
+def get_dashboard_data(scope):
+    """
+    Return {url_name_or_path: data} for every registered section, from the
+    cache when possible.
+    """
+    cache = _cache()
+    key = payload_cache_key(scope, _version(cache))
+    payload = cache.get(key)
+    if payload is None:
+        payload = {path: get_section_data(path, scope) for path in SECTION_REGISTRY}
+        cache.set(key, payload, getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', DEFAULT_CACHE_TIMEOUT))
+    return payload
+
+
+@register_section('/people/')
+def people_section(scope):
+    from people.models import MartialArtist
+
+    if scope.martial_artist is not None:
+        return {'items': [{'text': str(scope.martial_artist), 'url': None}], 'count': 1}
+    if not scope.staff_see_all:
+        return {'items': [], 'count': 0}
+    rows, total = windowed(
+        MartialArtist.objects.filter(active=True)
+        .only('first_name', 'middle_name', 'last_name')
+        .order_by('last_name', 'first_name'),
+        8,
+    )
+    return {'items': [{'text': str(ma), 'url': None} for ma in rows], 'count': total}
+
+
+@register_section('/ranks/')
+def ranks_section(scope):
+    from ranks.models import Rank
+
+    if scope.martial_artist is not None:
+        qs = Rank.objects.filter(martial_artist=scope.martial_artist)
+    elif scope.staff_see_all:
+        qs = Rank.objects.all()
+    else:
+        return {'items': [], 'count': 0}
+    rows, total = windowed(
+        qs.select_related('martial_artist', 'rank_type').order_by('-award_date'), 8
+    )
+    items = [
+        {'text': f'{r.martial_artist} — {r.rank_type.title}', 'sub': r.award_date.strftime('%Y-%m-%d'), 'url': None}
+        for r in rows
+    ]
+    return {'items': items, 'count': total}
+
+
+@register_section('/styles/')
+def styles_section(scope):
+    from styles.models import Style
+
+    if scope.martial_artist is not None:
+        qs = scope.martial_artist.styles.all()
+    elif scope.staff_see_all:
+        qs = Style.objects.all()
+    else:
+        return {'items': [], 'count': 0}
+    rows, total = windowed(qs.only('title').order_by('title'), 15)
+    return {'items': [{'text': s.title, 'url': None} for s in rows], 'count': total}
+
+
+@register_section('/blog/')
+def blog_section(scope):
+    from blog.models import Post
+
+    rows, total = windowed(Post.published.only('title', 'slug').order_by('-publish'), 5)
+    items = [
+        {'text': p.title, 'url': reverse('post_detail', kwargs={'slug': p.slug})}
+        for p in rows
+    ]
+    return {'items': items, 'count': total}
@@ -0,0 +1,89 @@
+"""
+Compare the per-request cost of the session engines on our own views.
+
+Usage:
+  python manage.py benchmark_sessions
+  python manage.py benchmark_sessions --requests 200 --path /people/ --path /ranks/
+
+Each engine serves the same logged-in requests twice: once as ordinary page
+views, and once with SESSION_SAVE_EVERY_REQUEST on, so every response also
+writes the session. The report shows the mean time and database queries per
+request. Everything runs in a transaction that is rolled back, including the
+temporary user, and the cache entries made for that user (its sessions, its
+cached user and dashboard) are deleted afterwards, so a later account that
+reuses the rolled-back id never picks them up.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+ENGINES = [
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+    'pages.sessions',
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.signed_cookies',
+]
+PATHS = ['/', '/dashboard/', '/people/', '/ranks/', '/styles/']
+
+
+class Command(BaseCommand):
+    help = 'Measure time and queries per request for each session engine.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Requests per path and engine (default 50).')
+        parser.add_argument('--path', action='append', dest='paths', help='Path to request (repeatable).')
+        parser.add_argument('--engine', action='append', dest='engines', help='Session engine (repeatable).')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or PATHS
+        engines = options['engines'] or ENGINES
+        self.stdout.write(f'{options["requests"]} requests x {len(paths)} paths per engine: {", ".join(paths)}')
+        self.stdout.write(f'{"engine":<50} {"read ms":>8} {"queries":>8} {"write ms":>9} {"queries":>8}')
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(username='session-benchmark')
+            for engine in engines:
+                read = self.measure(engine, user, paths, options['requests'], save_every_request=False)
+                write = self.measure(engine, user, paths, options['requests'], save_every_request=True)
+                self.stdout.write(f'{engine:<50} {read[0]:>8.2f} {read[1]:>8.1f} {write[0]:>9.2f} {write[1]:>8.1f}')
+            transaction.set_rollback(True)
+        self.forget(user)
+        self.stdout.write(self.style.SUCCESS('Done; nothing was written.'))
+
+    def measure(self, engine, user, paths, count, save_every_request):
+        """Return (milliseconds, queries) per request."""
+        overrides = {
+            'SESSION_ENGINE': engine,
+            'SESSION_SAVE_EVERY_REQUEST': save_every_request,
+            'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'],
+        }
+        with override_settings(**overrides):
+            client = Client()
+            client.force_login(user)
+            for path in paths:
+                client.get(path)  # warm caches and templates
+            elapsed, queries = 0.0, 0
+            for _ in range(count):
+                for path in paths:
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        client.get(path)
+                        elapsed += time.perf_counter() - started
+                    queries += len(captured)
+            # Deletes the session from the engine's cache as well as the table
+            client.logout()
+        total = count * len(paths)
+        return elapsed * 1000 / total, queries / total
+
+    def forget(self, user):
+        """Drop what the caches still hold for the rolled-back user."""
+        from pages.dashboard import DashboardScope, _cache as dashboard_cache, _version, payload_cache_key
+        from people.auth import forget_users
+        forget_users([user.pk])
+        cache = dashboard_cache()
+        cache.delete(payload_cache_key(DashboardScope(user), _version(cache)))
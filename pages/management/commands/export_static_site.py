@@ -0,0 +1,142 @@
+"""
+Render the public pages to a static HTML tree the front web server can serve
+without touching Python.
+
+Usage:
+  python manage.py export_static_site
+  python manage.py export_static_site --output /var/www/ikyoshi --full
+
+The home, about and first blog list page are rendered on every run. Post pages
+are only re-rendered when the post's `updated` time or its active comments
+changed since the last export (tracked in .export-manifest.json), and pages of
+posts that are no longer published are removed, with --full too.
+
+Each page is written to <path>/index.html. Let the front server answer
+anonymous GETs without a query string from the tree and send everything else
+(logged-in users with a session cookie, POSTs, ?after= pagination, the
+exported "Write a comment" link to ?comment=1) to Django, e.g. for nginx:
+
+  location / {
+      error_page 418 = @django;
+      if ($args) { return 418; }
+      if ($cookie_sessionid) { return 418; }
+      if ($request_method !~ ^(GET|HEAD)$) { return 418; }
+      try_files /export$uri/index.html @django;
+  }
+  location @django {
+      proxy_pass http://django;
+  }
+"""
+import json
+import os
+import shutil
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Q
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from blog.models import Post
+
+MANIFEST_NAME = '.export-manifest.json'
+
+
+class Command(BaseCommand):
+    help = 'Render the public home, about and blog pages to a static HTML tree.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Directory to write to (default: settings.STATIC_EXPORT_ROOT).',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Re-render every post, e.g. after a template change.',
+        )
+        parser.add_argument(
+            '--host',
+            default=None,
+            help='Host name used when rendering (default: first entry in ALLOWED_HOSTS).',
+        )
+
+    def handle(self, *args, **options):
+        output = options['output'] or getattr(settings, 'STATIC_EXPORT_ROOT', None)
+        if not output:
+            raise CommandError('Set STATIC_EXPORT_ROOT or pass --output.')
+        host = options['host'] or (settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost')
+        self.output = output
+        self.verbosity = options['verbosity']
+        self.factory = RequestFactory(HTTP_HOST=host)
+        started = time.monotonic()
+
+        manifest_path = os.path.join(output, MANIFEST_NAME)
+        # --full re-renders every post but still removes the ones the last export wrote
+        previous = self._load_manifest(manifest_path)
+        manifest = {} if options['full'] else previous
+        new_manifest = {}
+
+        for path in (reverse('home'), reverse('about'), reverse('post_list')):
+            self._export(path)
+
+        posts = Post.published.annotate(
+            latest_comment=Max('comments__updated', filter=Q(comments__active=True))
+        ).values_list('slug', 'updated', 'active_comment_count', 'latest_comment')
+        rendered = skipped = 0
+        for slug, updated, comment_count, latest_comment in posts:
+            path = reverse('post_detail', kwargs={'slug': slug})
+            fingerprint = f'{updated.isoformat()}|{comment_count}|{latest_comment.isoformat() if latest_comment else ""}'
+            new_manifest[path] = fingerprint
+            if manifest.get(path) == fingerprint and os.path.exists(self._file_for(path)):
+                skipped += 1
+                continue
+            self._export(path)
+            rendered += 1
+
+        removed = 0
+        for path in set(previous) - set(new_manifest):
+            directory = os.path.dirname(self._file_for(path))
+            if os.path.isdir(directory):
+                shutil.rmtree(directory)
+                removed += 1
+
+        self._write(manifest_path, json.dumps(new_manifest, indent=1, sort_keys=True).encode())
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported to {output}: {rendered} post(s) rendered, {skipped} unchanged, '
+            f'{removed} removed in {time.monotonic() - started:.2f}s.'
+        ))
+
+    def _load_manifest(self, path):
+        try:
+            with open(path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def _file_for(self, path):
+        return os.path.join(self.output, path.strip('/'), 'index.html')
+
+    def _export(self, path):
+        request = self.factory.get(path)
+        request.user = AnonymousUser()
+        request.static_export = True
+        match = resolve(path)
+        response = match.func(request, *match.args, **match.kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+        if response.status_code != 200:
+            raise CommandError(f'{path} returned HTTP {response.status_code}.')
+        self._write(self._file_for(path), response.content)
+        if self.verbosity > 1:
+            self.stdout.write(f'  {path}')
+
+    def _write(self, filename, content):
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        tmp = f'{filename}.tmp'
+        with open(tmp, 'wb') as fh:
+            fh.write(content)
+        os.replace(tmp, filename)
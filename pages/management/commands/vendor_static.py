@@ -0,0 +1,57 @@
+"""
+Download the third-party CSS and fonts listed in pages.vendor into
+pages/static/pages/vendor/ so pages stop loading them from CDNs.
+
+Usage:
+  python manage.py vendor_static
+  python manage.py vendor_static --force
+
+Commit the downloaded files; collectstatic then hashes and precompresses them
+like the rest of the static files.
+"""
+import base64
+import hashlib
+import os
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pages.vendor import ASSETS, FONT_STYLESHEET, VENDOR_DIR, font_stylesheet
+
+
+def sri_hash(content):
+    return 'sha384-' + base64.b64encode(hashlib.sha384(content).digest()).decode()
+
+
+class Command(BaseCommand):
+    help = 'Download vendored Bootstrap CSS and Roboto fonts into pages/static/pages/vendor.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Download files that already exist.')
+
+    def handle(self, *args, **options):
+        for asset in ASSETS:
+            target = os.path.join(VENDOR_DIR, asset.name)
+            if os.path.exists(target) and not options['force']:
+                self.stdout.write(f'  {asset.name}: present')
+                continue
+            try:
+                with urllib.request.urlopen(asset.url, timeout=30) as response:
+                    content = response.read()
+            except OSError as exc:
+                raise CommandError(f'Could not download {asset.url}: {exc}')
+            digest = sri_hash(content)
+            if asset.integrity and digest != asset.integrity:
+                raise CommandError(f'{asset.url} does not match its pinned hash ({digest}).')
+            self._write(target, content)
+            self.stdout.write(f'  {asset.name}: {len(content)} bytes, {digest}')
+
+        self._write(os.path.join(VENDOR_DIR, FONT_STYLESHEET), font_stylesheet().encode())
+        self.stdout.write(self.style.SUCCESS(f'Vendored {len(ASSETS)} files into {VENDOR_DIR}.'))
+
+    def _write(self, filename, content):
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        tmp = f'{filename}.tmp'
+        with open(tmp, 'wb') as fh:
+            fh.write(content)
+        os.replace(tmp, filename)
@@ -0,0 +1,229 @@
+"""
+Serving of user-uploaded media (MEDIA_ROOT) and, outside DEBUG, of collected
+static files (STATIC_ROOT).
+
+serve_media replaces django.conf.urls.static.static, which streamed every file
+through a Python worker without caching headers. It
+
+- checks access: people photos and their thumbnails are only shown to staff
+  and to the user linked to that martial artist;
+- answers conditional requests from a content-hash ETag, cached per file
+  modification time so each file is hashed once;
+- hands the transfer to the front server when MEDIA_SENDFILE is 'nginx'
+  (X-Accel-Redirect to MEDIA_ACCEL_REDIRECT_PREFIX, an `internal` location)
+  or 'apache' (X-Sendfile), and otherwise streams the file itself with
+  single-range Range support.
+
+serve_static sends the .br/.gz copies written by pages.storage when the
+client accepts them, and marks content-hashed file names as immutable for a
+year. It is a fallback for deployments where the front server does not serve
+STATIC_ROOT itself.
+"""
+import functools
+import hashlib
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from people.images import FORMATS, THUMBNAIL_SPECS, derivative_name
+
+PEOPLE_PHOTOS = 'people/images/'
+DERIVATIVE_RE = re.compile(
+    r'^(?P<stem>.+)\.(?P<spec>%s)\.(?P<ext>%s)$' % ('|'.join(THUMBNAIL_SPECS), '|'.join(FORMATS))
+)
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def can_view(user, path):
+    """Whether user may fetch the media file at path (relative to MEDIA_ROOT)."""
+    if not path.startswith(PEOPLE_PHOTOS):
+        return True
+    if not user.is_authenticated:
+        return False
+    if user.is_staff:
+        return True
+    from people.models import MartialArtist
+    images = MartialArtist.objects.filter(user=user).exclude(image='').exclude(image__isnull=True)
+    derivative = DERIVATIVE_RE.match(path)
+    if not derivative:
+        return images.filter(image=path).exists()
+    # The photo itself or an exact derivative of it: a stem prefix alone would
+    # let people/images/X.Y.jpg reach the thumbnails of people/images/X.jpg.
+    spec, ext = derivative['spec'], derivative['ext']
+    return any(
+        image == path or derivative_name(image, spec, ext) == path
+        for image in images.values_list('image', flat=True)
+    )
+
+
+def file_etag(path, stat):
+    """Quoted sha256 ETag of the file, recomputed only when it changes."""
+    key = f'media:etag:{path}:{stat.st_mtime_ns}:{stat.st_size}'
+    etag = cache.get(key)
+    if etag is None:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        etag = f'"{digest.hexdigest()[:32]}"'
+        cache.set(key, etag, None)
+    return etag
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single `bytes=` range, None to send the whole
+    file, or False when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(size - int(last), 0), size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        while length > 0:
+            chunk = fh.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def _sendfile(relative, full_path):
+    backend = getattr(settings, 'MEDIA_SENDFILE', None)
+    if backend == 'nginx':
+        response = HttpResponse()
+        prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(relative)
+        return response
+    if backend == 'apache':
+        response = HttpResponse()
+        response['X-Sendfile'] = full_path
+        return response
+    return None
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Not found')
+    if not os.path.isfile(full_path):
+        raise Http404('Not found')
+    if not can_view(request.user, path):
+        raise PermissionDenied
+
+    stat = os.stat(full_path)
+    etag = file_etag(full_path, stat)
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    private = path.startswith(PEOPLE_PHOTOS)
+
+    def finish(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Accept-Ranges'] = 'bytes'
+        max_age = getattr(settings, 'MEDIA_CACHE_MAX_AGE', 60 * 60 * 24 * 30)
+        if private:
+            patch_vary_headers(response, ['Cookie'])
+            patch_cache_control(response, private=True, max_age=max_age)
+        else:
+            patch_cache_control(response, public=True, max_age=max_age)
+        return response
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        return finish(not_modified)
+
+    handed_off = _sendfile(path, full_path)
+    if handed_off is not None:
+        # The front server handles Range itself
+        handed_off['Content-Type'] = content_type
+        return finish(handed_off)
+
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if range_header and (not if_range or if_range == etag):
+        byte_range = parse_range(range_header, stat.st_size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return finish(response)
+        if byte_range is not None:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                _read_range(full_path, start, length), status=206, content_type=content_type
+            )
+            response['Content-Length'] = str(length)
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            return finish(response)
+
+    return finish(FileResponse(open(full_path, 'rb'), content_type=content_type))
+
+
+STATIC_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+@functools.lru_cache(maxsize=None)
+def hashed_static_names():
+    """Names written by the manifest storage, which never change content."""
+    return frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+@require_safe
+def serve_static(request, path):
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Not found')
+    if not os.path.isfile(full_path):
+        raise Http404('Not found')
+
+    stat = os.stat(full_path)
+    not_modified = get_conditional_response(request, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        response = not_modified
+    else:
+        content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        accepted = request.headers.get('Accept-Encoding', '')
+        send_path, encoding = full_path, None
+        for name, suffix in STATIC_ENCODINGS:
+            if name in accepted and os.path.isfile(full_path + suffix):
+                send_path, encoding = full_path + suffix, name
+                break
+        response = FileResponse(open(send_path, 'rb'), content_type=content_type)
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Last-Modified'] = http_date(stat.st_mtime)
+
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if path in hashed_static_names():
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'STATIC_CACHE_MAX_AGE', 60 * 60))
+    return response
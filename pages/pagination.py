@@ -0,0 +1,144 @@
+"""
+Keyset (cursor) pagination.
+
+Instead of OFFSET/LIMIT plus a COUNT(*), each page is fetched with a range
+condition on an ordered tuple of columns that ends with the primary key, so
+deep pages cost the same as the first and no count query is run. Cursors are
+opaque, URL-safe tokens passed back as ?after= or ?before=.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class CursorPage:
+    """One page of keyset-paginated results; used by pages/pagination.html."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginate queryset over `keys`, a tuple of field names whose last entry is
+    unique (normally 'id'). All keys sort in the same direction.
+    """
+
+    def __init__(self, queryset, keys, per_page, descending=False):
+        self.queryset = queryset
+        self.keys = tuple(keys)
+        self.per_page = int(per_page)
+        self.descending = descending
+        self.fields = [queryset.model._meta.get_field(key) for key in self.keys]
+
+    def encode_cursor(self, obj):
+        values = [field.value_to_string(obj) for field in self.fields]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, token):
+        """Return the key values in token, or None when it is not a valid cursor."""
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            values = json.loads(raw)
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                return None
+            return [field.to_python(value) for field, value in zip(self.fields, values)]
+        except (ValueError, TypeError, ValidationError):
+            return None
+
+    def _after(self, values, forward):
+        """Q selecting rows strictly past `values` in the direction of travel."""
+        lookup = 'lt' if forward == self.descending else 'gt'
+        condition = Q()
+        for i, key in enumerate(self.keys):
+            step = Q(**{f'{key}__{lookup}': values[i]})
+            for prior, value in zip(self.keys[:i], values[:i]):
+                step &= Q(**{prior: value})
+            condition |= step
+        return condition
+
+    def _ordering(self, forward):
+        prefix = '-' if forward == self.descending else ''
+        return [prefix + key for key in self.keys]
+
+    def page(self, after=None, before=None):
+        """
+        Return the CursorPage after the `after` cursor, before the `before`
+        cursor, or the first page when neither is a valid cursor.
+        """
+        after_values = self.decode_cursor(after) if after else None
+        before_values = self.decode_cursor(before) if before else None
+        forward = before_values is None
+        queryset = self.queryset.order_by(*self._ordering(forward))
+        if after_values is not None and forward:
+            queryset = queryset.filter(self._after(after_values, forward=True))
+        elif before_values is not None:
+            queryset = queryset.filter(self._after(before_values, forward=False))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+        if not rows:
+            return CursorPage([])
+
+        if forward:
+            has_next, has_previous = has_more, after_values is not None
+        else:
+            has_next, has_previous = True, has_more
+        return CursorPage(
+            rows,
+            next_cursor=self.encode_cursor(rows[-1]) if has_next else None,
+            previous_cursor=self.encode_cursor(rows[0]) if has_previous else None,
+        )
+
+    def chunks(self):
+        """
+        Yield the whole queryset as successive lists of up to per_page rows,
+        one keyset query per list, so memory stays flat however large it is.
+        """
+        queryset = self.queryset.order_by(*self._ordering(forward=True))
+        rows = list(queryset[:self.per_page])
+        while rows:
+            yield rows
+            if len(rows) < self.per_page:
+                return
+            last = [getattr(rows[-1], field.attname) for field in self.fields]
+            rows = list(queryset.filter(self._after(last, forward=True))[:self.per_page])
+
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin that replaces offset pagination with keyset pagination.
+    Set `keyset` to the ordered key fields and `paginate_by` to the page size.
+    """
+
+    keyset = ('id',)
+    keyset_descending = False
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, self.keyset, page_size, descending=self.keyset_descending)
+        page = paginator.page(after=self.request.GET.get('after'), before=self.request.GET.get('before'))
+        return (paginator, page, page.object_list, page.has_other_pages())
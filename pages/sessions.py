@@ -0,0 +1,55 @@
+"""
+Cache-backed session store with database write-behind.
+
+Set SESSION_ENGINE = 'pages.sessions' to use it. Like Django's cached_db
+engine, sessions are read from the cache and only fall back to the
+django_session table on a miss. Unlike cached_db, a changed session is
+written to the database at most once every SESSION_WRITE_BEHIND_INTERVAL
+seconds; saves in between only update the cache. New sessions (login, key
+rotation) and deletions (logout) always reach the database at once.
+
+The database copy can therefore be up to one interval behind the cache, which
+only matters if the cache loses the entry: the session then reverts to that
+slightly older copy. Use a cache shared by every worker process (not LocMem)
+when running more than one.
+"""
+import logging
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+logger = logging.getLogger('django.contrib.sessions')
+
+KEY_PREFIX = 'pages.sessions'
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = KEY_PREFIX
+
+    @property
+    def synced_key(self):
+        return self.cache_key + ':synced'
+
+    def _db_write_due(self):
+        # cache.add succeeds only when no write happened within the interval
+        interval = getattr(settings, 'SESSION_WRITE_BEHIND_INTERVAL', 300)
+        return self._cache.add(self.synced_key, True, interval)
+
+    def save(self, must_create=False):
+        if must_create or self.session_key is None:
+            super().save(must_create)
+            self._cache.set(self.synced_key, True, getattr(settings, 'SESSION_WRITE_BEHIND_INTERVAL', 300))
+            return
+        try:
+            if not self._db_write_due():
+                self._cache.set(self.cache_key, self._session, self.get_expiry_age())
+                return
+        except Exception:
+            logger.exception('Error saving to cache (%s)', self._cache)
+        super().save(must_create)
+
+    def delete(self, session_key=None):
+        key = session_key or self.session_key
+        super().delete(session_key)
+        if key is not None:
+            self._cache.delete(self.cache_key_prefix + key + ':synced')
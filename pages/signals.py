@@ -0,0 +1,30 @@
+"""
+Invalidate cached dashboards (pages.dashboard) when the data they summarize changes.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from blog.models import Post
+from people.models import MartialArtist
+from ranks.models import Rank
+from styles.models import Style
+
+from .dashboard import invalidate_dashboards
+
+
+@receiver(post_save, sender=MartialArtist)
+@receiver(post_delete, sender=MartialArtist)
+@receiver(post_save, sender=Rank)
+@receiver(post_delete, sender=Rank)
+@receiver(post_save, sender=Style)
+@receiver(post_delete, sender=Style)
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_on_change(sender, **kwargs):
+    invalidate_dashboards()
+
+
+@receiver(m2m_changed, sender=MartialArtist.styles.through)
+def invalidate_on_styles_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_dashboards()
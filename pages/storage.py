@@ -0,0 +1,71 @@
+"""
+Static file storage for production (enabled in settings when DEBUG is off).
+
+CompressedManifestStaticFilesStorage is ManifestStaticFilesStorage (content
+hashes in file names, so a file's URL changes whenever it does) that also
+writes precompressed .gz copies, and .br copies when the brotli package is
+installed, during collectstatic. The front server can then send them without
+compressing on every request and cache the hashed names forever, e.g. nginx:
+
+  location /static/ {
+      alias /path/to/ikyoshi_project/static/;
+      gzip_static on;
+      brotli_static on;   # with ngx_brotli
+      expires max;
+      add_header Cache-Control "public, immutable";
+  }
+
+When static files reach Django instead, pages.media.serve_static picks the
+precompressed variant and sets the same headers.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.html', '.txt', '.json', '.xml', '.map', '.ttf', '.eot')
+MIN_COMPRESS_SIZE = 256
+
+
+def compressed_variants(content):
+    """(suffix, bytes) for each available encoding of content."""
+    variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(content, quality=11)))
+    return variants
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        # Compress what will actually be served: the hashed copies and the
+        # unhashed originals (still used by anything not going through {% static %})
+        names = set(self.hashed_files.values()) | set(paths)
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as fh:
+            content = fh.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, compressed in compressed_variants(content):
+            target = path + suffix
+            if len(compressed) >= len(content):
+                continue
+            tmp = target + '.tmp'
+            with open(tmp, 'wb') as fh:
+                fh.write(compressed)
+            os.replace(tmp, target)
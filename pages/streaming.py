@@ -0,0 +1,10 @@
+"""
+Helpers for streamed (StreamingHttpResponse) exports.
+"""
+
+
+class Echo:
+    """File-like object whose write() returns the line, for csv.writer streaming."""
+
+    def write(self, value):
+        return value
@@ -0,0 +1,24 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from pages.vendor import STYLESHEETS, is_vendored
+
+register = template.Library()
+
+
+@register.simple_tag
+def vendor_stylesheets():
+    """
+    <link> tags for Bootstrap and Roboto: the local copies once
+    `manage.py vendor_static` has been run, otherwise the CDN.
+    """
+    if is_vendored():
+        return format_html_join('\n', '<link rel="stylesheet" href="{}">', ((static(name),) for name, _, _ in STYLESHEETS))
+    links = []
+    for _, url, integrity in STYLESHEETS:
+        if integrity:
+            links.append(format_html('<link rel="stylesheet" href="{}" integrity="{}" crossorigin="anonymous">', url, integrity))
+        else:
+            links.append(format_html('<link rel="stylesheet" href="{}">', url))
+    return format_html_join('\n', '{}', ((link,) for link in links))
@@ -288,3 +288,436 @@ class LogoutUserViewTests(TestCase):
         self.client.login(username='testuser', password='testpass123')
         response = self.client.post(reverse('logoutuser'))
         self.assertRedirects(response, reverse('home'))
+
+
+class DashboardEngineTests(TestCase):
+    """Test cases for the dashboard data engine in pages.dashboard"""
+
+    def setUp(self):
+        from datetime import date
+        from people.models import MartialArtist
+        from ranks.models import Rank, RankType
+        from styles.models import Style
+        from blog.models import Post
+
+        self.user = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        style = Style.objects.create(title='Karate')
+        rank_type = RankType.objects.create(style=style, title='White Belt', indicator='10th Kyu')
+        for i in range(10):
+            ma = MartialArtist.objects.create(first_name=f'First{i}', last_name=f'Last{i:02d}')
+            Rank.objects.create(martial_artist=ma, rank_type=rank_type, award_date=date(2020, 1, i + 1))
+        for i in range(7):
+            Post.objects.create(title=f'Post {i}', slug=f'post-{i}', author=self.user, body='Body', status=1)
+
+    def test_sections_report_totals_beyond_the_listed_items(self):
+        """Counts come from the window function, not the length of the slice"""
+        from .dashboard import DashboardScope, get_section_data
+        scope = DashboardScope(self.user)
+        people = get_section_data('/people/', scope)
+        self.assertEqual(len(people['items']), 8)
+        self.assertEqual(people['count'], 10)
+        blog = get_section_data('/blog/', scope)
+        self.assertEqual(len(blog['items']), 5)
+        self.assertEqual(blog['count'], 7)
+
+    def test_each_section_costs_one_query(self):
+        """Staff summaries for people, ranks, styles and blog take one query each"""
+        from .dashboard import DashboardScope, get_section_data
+        scope = DashboardScope(self.user)
+        for path in ('/people/', '/ranks/', '/styles/', '/blog/'):
+            with self.assertNumQueries(1):
+                get_section_data(path, scope)
+
+    def test_registered_section_is_used(self):
+        """A data function registered for a path feeds that section"""
+        from . import dashboard
+        dashboard.register_section('/extra/')(lambda scope: {'items': [], 'count': 42})
+        try:
+            data = dashboard.get_section_data('/extra/', dashboard.DashboardScope(self.user))
+            self.assertEqual(data['count'], 42)
+        finally:
+            del dashboard.SECTION_REGISTRY['/extra/']
+
+    def test_unregistered_section_has_no_data(self):
+        """Sections without a data function return None"""
+        from .dashboard import DashboardScope, get_section_data
+        self.assertIsNone(get_section_data('home', DashboardScope(self.user)))
+
+
+class DashboardCacheTests(TestCase):
+    """Test cases for cached dashboard payloads and their invalidation"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+
+    def _blog_count(self):
+        from .dashboard import DashboardScope, get_dashboard_data
+        return get_dashboard_data(DashboardScope(self.user))['/blog/']['count']
+
+    def test_payload_is_served_from_cache(self):
+        """A second build of the same dashboard runs no section queries"""
+        from .dashboard import DashboardScope, get_dashboard_data
+        scope = DashboardScope(self.user)
+        get_dashboard_data(scope)
+        with self.assertNumQueries(0):
+            get_dashboard_data(scope)
+
+    def test_staff_without_profile_share_a_payload(self):
+        """Staff users without a linked profile use the shared staff key"""
+        from .dashboard import DashboardScope, payload_cache_key
+        other = User.objects.create_user(username='staff2', password='testpass123', is_staff=True)
+        self.assertEqual(
+            payload_cache_key(DashboardScope(self.user), 'v'),
+            payload_cache_key(DashboardScope(other), 'v'),
+        )
+
+    def test_post_save_invalidates_payload(self):
+        """Saving a post drops cached dashboards"""
+        from blog.models import Post
+        self.assertEqual(self._blog_count(), 0)
+        Post.objects.create(title='New', slug='new', author=self.user, body='Body', status=1)
+        self.assertEqual(self._blog_count(), 1)
+
+    def test_styles_m2m_change_invalidates_payload(self):
+        """Adding a style to a linked martial artist refreshes their dashboard"""
+        from people.models import MartialArtist
+        from styles.models import Style
+        from .dashboard import DashboardScope, get_dashboard_data
+        ma = MartialArtist.objects.create(first_name='Jane', last_name='Doe', user=self.user)
+        style = Style.objects.create(title='Judo')
+        self.user.refresh_from_db()
+        self.assertEqual(get_dashboard_data(DashboardScope(self.user))['/styles/']['count'], 0)
+        ma.styles.add(style)
+        self.assertEqual(get_dashboard_data(DashboardScope(self.user))['/styles/']['count'], 1)
+
+
+class ExportStaticSiteCommandTests(TestCase):
+    """Test cases for the export_static_site management command"""
+
+    def setUp(self):
+        import tempfile
+        from django.core.cache import cache
+        from blog.models import Post
+        cache.clear()
+        self.output = tempfile.mkdtemp()
+        self.user = User.objects.create_user(username='author', password='testpass123')
+        self.post = Post.objects.create(
+            title='Exported', slug='exported', author=self.user, body='Static body', status=1
+        )
+        Post.objects.create(title='Draft', slug='draft', author=self.user, body='Draft', status=0)
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.output, ignore_errors=True)
+
+    def _export(self, **options):
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('export_static_site', output=self.output, stdout=out, **options)
+        return out.getvalue()
+
+    def _read(self, *parts):
+        import os
+        with open(os.path.join(self.output, *parts, 'index.html')) as fh:
+            return fh.read()
+
+    def test_exports_public_pages(self):
+        """Home, about, the blog list and published posts are written"""
+        import os
+        self._export()
+        self.assertIn('Bougyo No Kan', self._read())
+        self.assertIn('Exported', self._read('blog'))
+        page = self._read('blog', 'exported')
+        self.assertIn('Static body', page)
+        self.assertNotIn('csrfmiddlewaretoken', page)
+        self.assertIn('?comment=1', page)
+        self.assertFalse(os.path.exists(os.path.join(self.output, 'blog', 'draft')))
+
+    def test_second_run_skips_unchanged_posts(self):
+        """Only posts whose updated time changed are re-rendered"""
+        self._export()
+        self.assertIn('0 post(s) rendered, 1 unchanged', self._export())
+        self.post.body = 'New body'
+        self.post.save()
+        self.assertIn('1 post(s) rendered, 0 unchanged', self._export())
+        self.assertIn('New body', self._read('blog', 'exported'))
+
+    def test_unpublished_posts_are_removed(self):
+        """Posts that leave the published set lose their static page"""
+        import os
+        self._export()
+        self.post.status = 0
+        self.post.save()
+        self.assertIn('1 removed', self._export())
+        self.assertFalse(os.path.exists(os.path.join(self.output, 'blog', 'exported')))
+
+    def test_full_export_still_removes_unpublished_posts(self):
+        """--full re-renders everything and drops pages of unpublished posts"""
+        import os
+        self._export()
+        self.post.status = 0
+        self.post.save()
+        self.assertIn('0 post(s) rendered, 0 unchanged, 1 removed', self._export(full=True))
+        self.assertFalse(os.path.exists(os.path.join(self.output, 'blog', 'exported')))
+
+    def test_export_does_not_poison_the_page_cache(self):
+        """Exported renders never reach the shared anonymous page cache"""
+        self._export()
+        response = self.client.get(reverse('post_detail', kwargs={'slug': 'exported'}))
+        self.assertContains(response, 'csrfmiddlewaretoken')
+
+
+class MediaServingTests(TestCase):
+    """Test cases for pages.media.serve_media"""
+
+    def setUp(self):
+        import os
+        import tempfile
+        from django.core.cache import cache
+        cache.clear()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = self.settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        for name, content in (('blog/notes.txt', b'0123456789'), ('people/images/abc.jpg', b'photo'),
+                              ('people/images/abc.small.webp', b'thumb')):
+            os.makedirs(os.path.join(media.name, os.path.dirname(name)), exist_ok=True)
+            with open(os.path.join(media.name, name), 'wb') as fh:
+                fh.write(content)
+        self.client = Client()
+
+    def _link_photo(self, username):
+        from people.models import MartialArtist
+        user = User.objects.create_user(username=username, password='testpass123')
+        artist = MartialArtist.objects.create(first_name='Jane', last_name='Doe', user=user)
+        MartialArtist.objects.filter(pk=artist.pk).update(image='people/images/abc.jpg')
+        return user
+
+    def test_public_file_has_cache_headers_and_etag(self):
+        """Media outside people photos is public, long-cached and revalidated by ETag"""
+        response = self.client.get('/media/blog/notes.txt')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=', response['Cache-Control'])
+        again = self.client.get('/media/blog/notes.txt', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_range_request(self):
+        """A single byte range is answered with 206 and Content-Range"""
+        response = self.client.get('/media/blog/notes.txt', HTTP_RANGE='bytes=2-4')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-4/10')
+        self.assertEqual(b''.join(response.streaming_content), b'234')
+        suffix = self.client.get('/media/blog/notes.txt', HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(suffix.streaming_content), b'789')
+        unsatisfiable = self.client.get('/media/blog/notes.txt', HTTP_RANGE='bytes=20-')
+        self.assertEqual(unsatisfiable.status_code, 416)
+        stale = self.client.get('/media/blog/notes.txt', HTTP_RANGE='bytes=2-4', HTTP_IF_RANGE='"old"')
+        self.assertEqual(stale.status_code, 200)
+
+    def test_people_photos_need_the_linked_user_or_staff(self):
+        """Photos and thumbnails are private to the linked user and staff"""
+        self._link_photo('jane')
+        User.objects.create_user(username='other', password='testpass123')
+        User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.assertEqual(self.client.get('/media/people/images/abc.jpg').status_code, 403)
+        self.client.login(username='other', password='testpass123')
+        self.assertEqual(self.client.get('/media/people/images/abc.jpg').status_code, 403)
+        for username in ('jane', 'staff'):
+            self.client.login(username=username, password='testpass123')
+            for path in ('/media/people/images/abc.jpg', '/media/people/images/abc.small.webp'):
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('private', response['Cache-Control'])
+
+    def test_dotted_photo_names_do_not_reach_other_thumbnails(self):
+        """A user's X.Y.jpg photo grants its own thumbnails, not those of someone else's X.jpg"""
+        from people.models import MartialArtist
+        from .media import can_view
+        user = self._link_photo('jane')
+        MartialArtist.objects.filter(user=user).update(image='people/images/abc.small.jpg')
+        self.assertFalse(can_view(user, 'people/images/abc.small.webp'))
+        self.assertFalse(can_view(user, 'people/images/abc.jpg'))
+        self.assertTrue(can_view(user, 'people/images/abc.small.jpg'))
+        self.assertTrue(can_view(user, 'people/images/abc.small.profile.webp'))
+
+    def test_sendfile_handoff(self):
+        """With MEDIA_SENDFILE the body is left to the front server"""
+        with self.settings(MEDIA_SENDFILE='nginx'):
+            response = self.client.get('/media/blog/notes.txt')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/blog/notes.txt')
+        self.assertEqual(response.content, b'')
+        with self.settings(MEDIA_SENDFILE='apache'):
+            response = self.client.get('/media/blog/notes.txt')
+        self.assertTrue(response['X-Sendfile'].endswith('blog/notes.txt'))
+
+    def test_missing_and_traversal_paths_are_404(self):
+        """Paths outside MEDIA_ROOT are never served"""
+        self.assertEqual(self.client.get('/media/blog/missing.txt').status_code, 404)
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+
+
+class StaticPipelineTests(TestCase):
+    """Test cases for pages.storage, pages.vendor and pages.media.serve_static"""
+
+    def setUp(self):
+        import tempfile
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = root.name
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        """Hashed CSS gets a smaller .gz copy; images are not compressed"""
+        import gzip
+        import os
+        from io import StringIO
+        from django.contrib.staticfiles.storage import staticfiles_storage
+        from django.core.management import call_command
+        storages = {
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'staticfiles': {'BACKEND': 'pages.storage.CompressedManifestStaticFilesStorage'},
+        }
+        with self.settings(STATIC_ROOT=self.root, STORAGES=storages):
+            call_command('collectstatic', interactive=False, verbosity=0, stdout=StringIO())
+            hashed = staticfiles_storage.stored_name('pages/style.css')
+        self.assertNotEqual(hashed, 'pages/style.css')
+        path = os.path.join(self.root, hashed)
+        with open(path, 'rb') as fh, gzip.open(path + '.gz') as gz:
+            self.assertEqual(gz.read(), fh.read())
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'pages/images/BNKLogo.jpg.gz')))
+
+    def test_vendor_stylesheets_fall_back_to_cdn(self):
+        """Until vendor_static has run, the CDN links (with SRI) are used"""
+        from unittest import mock
+        from django.template import Context, Template
+        template = Template('{% load vendor_assets %}{% vendor_stylesheets %}')
+        with mock.patch('pages.templatetags.vendor_assets.is_vendored', return_value=False):
+            html = template.render(Context())
+        self.assertIn('https://maxcdn.bootstrapcdn.com/bootstrap/4.0.0/css/bootstrap.min.css', html)
+        self.assertIn('integrity="sha384-', html)
+        with mock.patch('pages.templatetags.vendor_assets.is_vendored', return_value=True):
+            html = template.render(Context())
+        self.assertIn('/static/pages/vendor/bootstrap/bootstrap.min.css', html)
+        self.assertIn('/static/pages/vendor/roboto/roboto.css', html)
+        self.assertNotIn('https://', html)
+
+    def test_deploy_check_warns_until_vendored(self):
+        """check --deploy flags pages that would still load CDN assets"""
+        from unittest import mock
+        from .checks import check_vendored_assets
+        with mock.patch('pages.checks.is_vendored', return_value=False):
+            self.assertEqual([warning.id for warning in check_vendored_assets(None)], ['pages.W001'])
+        with mock.patch('pages.checks.is_vendored', return_value=True):
+            self.assertEqual(check_vendored_assets(None), [])
+
+    def test_serve_static_prefers_precompressed_copy(self):
+        """A client accepting gzip gets the .gz file with Vary and cache headers"""
+        import gzip
+        import os
+        os.makedirs(os.path.join(self.root, 'pages'))
+        with open(os.path.join(self.root, 'pages/site.css'), 'wb') as fh:
+            fh.write(b'body { color: black; }')
+        with open(os.path.join(self.root, 'pages/site.css.gz'), 'wb') as fh:
+            fh.write(gzip.compress(b'body { color: black; }'))
+        with self.settings(STATIC_ROOT=self.root):
+            plain = self.client.get('/static/pages/site.css')
+            compressed = self.client.get('/static/pages/site.css', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(b''.join(plain.streaming_content), b'body { color: black; }')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(compressed['Content-Type'], 'text/css')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertIn('max-age=3600', compressed['Cache-Control'])
+
+
+class SessionEngineTests(TestCase):
+    """Test cases for the write-behind session store and session commands"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_write_behind_defers_database_writes(self):
+        """Saves within the interval update the cache only; reads see the latest data"""
+        from django.contrib.sessions.models import Session
+        from .sessions import SessionStore
+        session = SessionStore()
+        session['step'] = 1
+        session.save()
+        session['step'] = 2
+        with self.assertNumQueries(0):
+            session.save()
+        self.assertEqual(Session.objects.get(pk=session.session_key).get_decoded()['step'], 1)
+        self.assertEqual(SessionStore(session.session_key)['step'], 2)
+        session.delete()
+        self.assertFalse(Session.objects.filter(pk=session.session_key).exists())
+
+    def test_write_behind_writes_after_interval(self):
+        """Once the interval has passed, the next save reaches the database"""
+        from django.contrib.sessions.models import Session
+        from django.core.cache import cache
+        from .sessions import SessionStore
+        session = SessionStore()
+        session['step'] = 1
+        session.save()
+        cache.delete(session.synced_key)
+        session['step'] = 2
+        session.save()
+        self.assertEqual(Session.objects.get(pk=session.session_key).get_decoded()['step'], 2)
+
+    def test_login_with_write_behind_engine(self):
+        """Logging in and browsing work with SESSION_ENGINE = 'pages.sessions'"""
+        User.objects.create_user(username='kim', password='testpass123')
+        with self.settings(SESSION_ENGINE='pages.sessions'):
+            client = Client()
+            client.post(reverse('loginuser'), {'username': 'kim', 'password': 'testpass123'})
+            response = client.get(reverse('user_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['user'].username, 'kim')
+
+    def test_purge_sessions_in_batches(self):
+        """purge_sessions deletes only expired rows"""
+        from datetime import timedelta
+        from io import StringIO
+        from django.contrib.sessions.models import Session
+        from django.core.management import call_command
+        from django.utils import timezone
+        past, future = timezone.now() - timedelta(days=1), timezone.now() + timedelta(days=1)
+        Session.objects.bulk_create(
+            [Session(session_key=f'old{i}', session_data='', expire_date=past) for i in range(5)]
+            + [Session(session_key='current', session_data='', expire_date=future)]
+        )
+        out = StringIO()
+        call_command('purge_sessions', '--batch-size', '2', stdout=out)
+        self.assertIn('Deleted 5 expired sessions', out.getvalue())
+        self.assertEqual(list(Session.objects.values_list('pk', flat=True)), ['current'])
+
+    def test_benchmark_sessions_leaves_no_trace(self):
+        """benchmark_sessions reports every engine and rolls back its user"""
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('benchmark_sessions', '--requests', '1', '--path', '/about/', stdout=out)
+        self.assertIn('pages.sessions', out.getvalue())
+        self.assertIn('signed_cookies', out.getvalue())
+        self.assertFalse(User.objects.filter(username='session-benchmark').exists())
+
+    def test_benchmark_sessions_clears_the_caches_of_its_user(self):
+        """A user that reuses the rolled-back id finds no cached user, dashboard or session"""
+        from io import StringIO
+        from django.core.cache import cache
+        from django.core.management import call_command
+        from people.auth import user_cache_key
+        from .dashboard import DashboardScope, _version, payload_cache_key
+        cache.clear()
+        engines = ['--engine', 'pages.sessions', '--engine', 'django.contrib.sessions.backends.cache']
+        call_command('benchmark_sessions', '--requests', '1', '--path', '/dashboard/', *engines, stdout=StringIO())
+        user = User.objects.create_user(username='reused', password='testpass123')
+        self.assertIsNone(cache.get(user_cache_key(user.pk)))
+        self.assertIsNone(cache.get(payload_cache_key(DashboardScope(user), _version(cache))))
+        self.assertFalse([key for key in cache._cache if 'sessions' in key])
@@ -0,0 +1,79 @@
+"""
+Third-party CSS and fonts served from our own static files.
+
+`manage.py vendor_static` downloads the pinned ASSETS into
+pages/static/pages/vendor/ (checking the SRI hash where one is pinned) and
+writes the Roboto @font-face stylesheet. Until that has been run,
+{% vendor_stylesheets %} keeps linking the CDN copies, so pages never point
+at static files that do not exist.
+"""
+import functools
+import os
+from collections import namedtuple
+
+VENDOR_DIR = os.path.join(os.path.dirname(__file__), 'static', 'pages', 'vendor')
+STATIC_PREFIX = 'pages/vendor/'
+
+VendorAsset = namedtuple('VendorAsset', 'name url integrity')
+
+ASSETS = [
+    VendorAsset(
+        'bootstrap/bootstrap.min.css',
+        'https://cdn.jsdelivr.net/npm/bootstrap@4.0.0/dist/css/bootstrap.min.css',
+        'sha384-Gn5384xqQ1aoWXA+058RXPxPg6fy4IWvTNh0E263XmFcJlSAwiGgFAW/dAiS6JXm',
+    ),
+    # Versioned npm files never change; the command prints their hashes for pinning.
+    # The source map is referenced from the CSS, so the manifest storage needs it.
+    VendorAsset(
+        'bootstrap/bootstrap.min.css.map',
+        'https://cdn.jsdelivr.net/npm/bootstrap@4.0.0/dist/css/bootstrap.min.css.map',
+        None,
+    ),
+    VendorAsset(
+        'roboto/roboto-latin-400-normal.woff2',
+        'https://cdn.jsdelivr.net/npm/@fontsource/roboto@5.0.8/files/roboto-latin-400-normal.woff2',
+        None,
+    ),
+    VendorAsset(
+        'roboto/roboto-latin-700-normal.woff2',
+        'https://cdn.jsdelivr.net/npm/@fontsource/roboto@5.0.8/files/roboto-latin-700-normal.woff2',
+        None,
+    ),
+]
+
+FONT_STYLESHEET = 'roboto/roboto.css'
+FONT_FACES = """\
+@font-face {
+  font-family: 'Roboto';
+  font-style: normal;
+  font-weight: %(weight)s;
+  font-display: swap;
+  src: url('roboto-latin-%(weight)s-normal.woff2') format('woff2');
+}
+"""
+FONT_WEIGHTS = (400, 700)
+
+# (vendored static name, CDN fallback URL, CDN integrity)
+STYLESHEETS = [
+    (
+        STATIC_PREFIX + FONT_STYLESHEET,
+        'https://fonts.googleapis.com/css?family=Roboto:400,700',
+        None,
+    ),
+    (
+        STATIC_PREFIX + 'bootstrap/bootstrap.min.css',
+        'https://maxcdn.bootstrapcdn.com/bootstrap/4.0.0/css/bootstrap.min.css',
+        'sha384-Gn5384xqQ1aoWXA+058RXPxPg6fy4IWvTNh0E263XmFcJlSAwiGgFAW/dAiS6JXm',
+    ),
+]
+
+
+def font_stylesheet():
+    return ''.join(FONT_FACES % {'weight': weight} for weight in FONT_WEIGHTS)
+
+
+@functools.lru_cache(maxsize=None)
+def is_vendored():
+    """Whether every vendored file is present (checked once per process)."""
+    names = [asset.name for asset in ASSETS] + [FONT_STYLESHEET]
+    return all(os.path.exists(os.path.join(VENDOR_DIR, name)) for name in names)
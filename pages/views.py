@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.views.generic import TemplateView
 from django.shortcuts import render, redirect
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
@@ -9,6 +10,8 @@ from django.views.decorators.http import require_http_methods
 from django.contrib import messages
 from django.urls import reverse
 
+from .dashboard import DashboardScope, get_dashboard_data
+
 
 class HomePageView(TemplateView):
     template_name = 'pages/home.html'
@@ -21,6 +24,7 @@ class AboutPageView(TemplateView):
 # Pages shown on the post-login dashboard. Each tuple: (label, url_name_or_path, permission).
 # url_name_or_path: URL name (e.g. 'home') or path starting with '/' (e.g. '/people/').
 # permission is None (any authenticated user), 'staff' (is_staff), or a perm codename e.g. 'auth.add_user'.
+# Summary data for a section comes from the function registered for url_name_or_path in pages.dashboard.
 DASHBOARD_PAGES = [
     ('Home', 'home', None),
     ('About', 'about', None),
@@ -47,78 +51,10 @@ def _resolve_url(url_name_or_path):
     return reverse(url_name_or_path)
 
 
-def _get_dashboard_section_data(request, label, url_name_or_path):
-    """
-    Fetch summary data for a dashboard section, filtered by the current user when
-    they have a linked MartialArtist. Returns dict with 'items' and 'count', or None.
-    """
-    from people.models import MartialArtist
-    from ranks.models import Rank
-    from styles.models import Style
-    from blog.models import Post
-
-    user = request.user
-    martial_artist = getattr(user, 'martial_artist_profile', None)
-    staff_see_all = user.is_staff and martial_artist is None
-
-    try:
-        if url_name_or_path == '/people/':
-            if martial_artist is not None:
-                items = [{'text': str(martial_artist), 'url': None}]
-                count = 1
-            elif staff_see_all:
-                qs = MartialArtist.objects.filter(active=True).order_by('last_name', 'first_name')[:8]
-                count = MartialArtist.objects.filter(active=True).count()
-                items = [{'text': str(ma), 'url': None} for ma in qs]
-            else:
-                items = []
-                count = 0
-            return {'items': items, 'count': count}
-        if url_name_or_path == '/ranks/':
-            if martial_artist is not None:
-                qs = Rank.objects.filter(martial_artist=martial_artist).select_related(
-                    'rank_type'
-                ).order_by('-award_date')[:8]
-                count = Rank.objects.filter(martial_artist=martial_artist).count()
-            elif staff_see_all:
-                qs = Rank.objects.select_related('martial_artist', 'rank_type').order_by('-award_date')[:8]
-                count = Rank.objects.count()
-            else:
-                qs = Rank.objects.none()
-                count = 0
-            items = [
-                {'text': f'{r.martial_artist} — {r.rank_type.title}', 'sub': r.award_date.strftime('%Y-%m-%d'), 'url': None}
-                for r in qs
-            ]
-            return {'items': items, 'count': count}
-        if url_name_or_path == '/styles/':
-            if martial_artist is not None:
-                qs = martial_artist.styles.all().order_by('title')[:15]
-                count = martial_artist.styles.count()
-            elif staff_see_all:
-                qs = Style.objects.all().order_by('title')[:15]
-                count = Style.objects.count()
-            else:
-                qs = Style.objects.none()
-                count = 0
-            items = [{'text': s.title, 'url': None} for s in qs]
-            return {'items': items, 'count': count}
-        if url_name_or_path == '/blog/':
-            qs = Post.published.all().order_by('-publish')[:5]
-            count = Post.published.count()
-            items = [
-                {'text': p.title, 'url': reverse('post_detail', kwargs={'slug': p.slug})}
-                for p in qs
-            ]
-            return {'items': items, 'count': count}
-    except Exception:
-        pass
-    return None
-
-
 @login_required(login_url='/login/')
 def user_dashboard(request):
     """Show dashboard with links and summary data for each section the user can access."""
+    dashboard_data = get_dashboard_data(DashboardScope(request.user))
     sections = []
     for label, url_name_or_path, permission in DASHBOARD_PAGES:
         if not _user_can_access(request.user, permission):
@@ -127,7 +63,7 @@ def user_dashboard(request):
             url = _resolve_url(url_name_or_path)
         except Exception:
             continue
-        data = _get_dashboard_section_data(request, label, url_name_or_path)
+        data = dashboard_data.get(url_name_or_path)
         if data:
             sections.append({
                 'label': label,
@@ -148,7 +84,7 @@ def signupuser(request):
         if form.is_valid():
             try:
                 user = form.save()
-                login(request, user)
+                login(request, user, backend=settings.AUTHENTICATION_BACKENDS[0])
                 messages.success(request, 'Account created successfully!')
                 return redirect('home')
             except IntegrityError:
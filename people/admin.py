@@ -1,24 +1,59 @@
-from django.contrib import admin
-from django.utils.html import format_html
+import io
 
+from django import forms
+from django.contrib import admin, messages
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .images import picture_tag
 from .models import MartialArtist, Sponsor
+from .search import ranked_ids
+from .transfer import (
+    ImportConflict, RecordError, RosterImporter, encode_records, export_records, format_for, read_records,
+)
+from ranks.admin import RankTypeFieldMixin
 from ranks.models import Rank
 from tuition.models import TuitionPayment
 
-class RankInline(admin.TabularInline):
+class NameSearchMixin:
+    """
+    Admin search through the indexed name keys and name words
+    (people.search), tolerant of typos.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(pk__in=ranked_ids(self.model, search_term, limit=200)), False
+
+
+class RankInline(RankTypeFieldMixin, admin.TabularInline):
     model = Rank
     extra = 1
     ordering = ('-award_date',)
 
+    def get_queryset(self, request):
+        # Each row's label is str(rank), which reads both relations
+        return super().get_queryset(request).select_related('martial_artist', 'rank_type__style')
+
 class TuitionPaymentInLine(admin.TabularInline):
     model = TuitionPayment
     extra = 1
     ordering = ('-date_paid',)
 
 
+class RosterImportForm(forms.Form):
+    file = forms.FileField(help_text='CSV or JSONL in the export_roster format.')
+    dry_run = forms.BooleanField(required=False, initial=True, help_text='Only validate the file.')
+
+
 @admin.register(MartialArtist)
-class MartialArtistAdmin(admin.ModelAdmin):
+class MartialArtistAdmin(NameSearchMixin, admin.ModelAdmin):
     model = MartialArtist
+    change_list_template = 'admin/people/martialartist/change_list.html'
+    actions = ['export_roster_csv', 'export_roster_jsonl']
     inlines = [TuitionPaymentInLine, RankInline]
     list_filter = ['active', 'sponsor']
     list_display_links = ['last_name', 'first_name']
@@ -39,19 +74,61 @@ class MartialArtistAdmin(admin.ModelAdmin):
     list_display = ['last_name', 'first_name', 'enrollment_date', 'sponsor', 'active', 'user', 'image_tag_small']
 
     def martial_artist_image(self, obj):
-        if obj.image:
-            return format_html('<img src="{0}" style="width: 180px; height:180px;" />'.format(obj.image.url))
-        else:
-            return ""
+        return picture_tag(obj.image, 'medium', alt=str(obj))
 
     def image_tag_small(self, obj):
-        if obj.image:
-            return format_html('<img src="{0}" style="width: 45px; height:45px;" />'.format(obj.image.url))
-        else:
-            return ""
+        return picture_tag(obj.image, 'small', alt=str(obj))
+
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_roster_view), name='people_martialartist_import'),
+        ] + super().get_urls()
+
+    def _export(self, queryset, fmt):
+        response = StreamingHttpResponse(
+            encode_records(export_records(queryset), fmt),
+            content_type='text/csv' if fmt == 'csv' else 'application/x-ndjson',
+        )
+        response['Content-Disposition'] = f'attachment; filename="roster.{fmt}"'
+        return response
+
+    @admin.action(description='Export selected with sponsors and ranks (CSV)')
+    def export_roster_csv(self, request, queryset):
+        return self._export(queryset, 'csv')
+
+    @admin.action(description='Export selected with sponsors and ranks (JSONL)')
+    def export_roster_jsonl(self, request, queryset):
+        return self._export(queryset, 'jsonl')
+
+    def import_roster_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect('admin:people_martialartist_changelist')
+        form = RosterImportForm(request.POST or None, request.FILES or None)
+        importer = None
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            importer = RosterImporter(dry_run=form.cleaned_data['dry_run'])
+            text = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+            try:
+                importer.run(read_records(text, format_for(upload.name)))
+            except (RecordError, ImportConflict) as exc:
+                messages.error(request, f'Nothing imported; {exc}')
+                importer = None
+            else:
+                if not importer.dry_run:
+                    messages.success(request, f'Imported {importer.total} records in {importer.elapsed:.2f}s.')
+                    return redirect('admin:people_martialartist_changelist')
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import roster',
+            'form': form,
+            'importer': importer,
+        }
+        return TemplateResponse(request, 'admin/people/martialartist/import_roster.html', context)
 
 @admin.register(Sponsor)
-class SponsorAdmin(admin.ModelAdmin):
+class SponsorAdmin(NameSearchMixin, admin.ModelAdmin):
     model = Sponsor
     list_display = ['first_name', 'middle_name', 'last_name', 'email', 'street', 'city', 'state', 'zip', 'telephone', 'isParent']
     search_fields = ['last_name', 'first_name']
@@ -0,0 +1,82 @@
+"""
+Authentication backend that loads request.user together with its linked
+MartialArtist.
+
+Views and the dashboard read `request.user.martial_artist_profile`, a reverse
+one-to-one that costs a query of its own after the session's user lookup.
+ProfileBackend.get_user() fetches both in one joined query and keeps the
+result in the cache, so most authenticated requests run neither query.
+people.signals forgets a user's entry whenever the user or a martial artist
+linked to it (before or after the change) is saved or deleted; bulk writes
+that skip signals call forget_users() themselves.
+
+The cache holds plain column values, not pickled model instances. They
+include the password hash, which Django checks the session against on every
+request, so PEOPLE_USER_CACHE_ALIAS must name a memory cache (local memory,
+Memcached, Redis), never one that writes to disk or a table; the people.W001
+check warns otherwise.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+
+def _cache():
+    return caches[getattr(settings, 'PEOPLE_USER_CACHE_ALIAS', 'default')]
+
+
+def user_cache_key(user_id):
+    return f'people:user:{user_id}'
+
+
+def forget_users(user_ids):
+    """Drop the cached users (and their profiles) for user_ids."""
+    keys = [user_cache_key(user_id) for user_id in user_ids if user_id is not None]
+    if keys:
+        _cache().delete_many(keys)
+
+
+def _values(instance):
+    return [field.get_prep_value(getattr(instance, field.attname)) for field in instance._meta.concrete_fields]
+
+
+def _load(model, values):
+    return model.from_db(DEFAULT_DB_ALIAS, [field.attname for field in model._meta.concrete_fields], values)
+
+
+def _rebuild(entry):
+    """A User (with its profile, or the lack of one, cached) from a cache entry."""
+    from .models import MartialArtist
+
+    user_values, profile_values = entry
+    User = get_user_model()
+    user = _load(User, user_values)
+    relation = User.martial_artist_profile.related
+    profile = _load(MartialArtist, profile_values) if profile_values else None
+    relation.set_cached_value(user, profile)
+    if profile is not None:
+        relation.field.set_cached_value(profile, user)
+    return user
+
+
+class ProfileBackend(ModelBackend):
+    """ModelBackend whose get_user() also loads martial_artist_profile, through the cache."""
+
+    def get_user(self, user_id):
+        cache = _cache()
+        key = user_cache_key(user_id)
+        entry = cache.get(key)
+        if entry is not None:
+            user = _rebuild(entry)
+        else:
+            User = get_user_model()
+            try:
+                user = User._default_manager.select_related('martial_artist_profile').get(pk=user_id)
+            except User.DoesNotExist:
+                return None
+            profile = getattr(user, 'martial_artist_profile', None)
+            entry = (_values(user), _values(profile) if profile is not None else None)
+            cache.set(key, entry, getattr(settings, 'PEOPLE_USER_CACHE_TIMEOUT', 300))
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,27 @@
+"""
+System checks for the people app.
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Cache backends that keep entries outside process memory, on disk or in a table
+PERSISTENT_CACHES = (
+    'django.core.cache.backends.filebased.FileBasedCache',
+    'django.core.cache.backends.db.DatabaseCache',
+)
+
+
+@register(Tags.caches, Tags.security)
+def check_user_cache(app_configs, **kwargs):
+    """Cached users (people.auth) include password hashes; keep them out of files and tables."""
+    if 'people.auth.ProfileBackend' not in settings.AUTHENTICATION_BACKENDS:
+        return []
+    alias = getattr(settings, 'PEOPLE_USER_CACHE_ALIAS', 'default')
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    if backend not in PERSISTENT_CACHES:
+        return []
+    return [Warning(
+        f'PEOPLE_USER_CACHE_ALIAS "{alias}" uses {backend}, which would store password hashes outside memory.',
+        hint='Point PEOPLE_USER_CACHE_ALIAS at a local memory, Memcached or Redis cache.',
+        id='people.W001',
+    )]
@@ -0,0 +1,32 @@
+from django import forms
+
+from styles.models import Style
+
+from .models import Sponsor
+
+
+class RosterFilterForm(forms.Form):
+    """Filters and sort order for the staff roster (people.roster)."""
+
+    ACTIVE_CHOICES = (('1', 'Active'), ('0', 'Inactive'), ('', 'All'))
+    SORT_CHOICES = (('name', 'Name A–Z'), ('-name', 'Name Z–A'), ('-added', 'Recently added'))
+
+    style = forms.ModelChoiceField(queryset=Style.objects.order_by('title'), required=False, empty_label='Any style')
+    sponsor = forms.ModelChoiceField(
+        queryset=Sponsor.objects.only('first_name', 'middle_name', 'last_name'),
+        required=False,
+        empty_label='Any sponsor',
+    )
+    enrolled_after = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    enrolled_before = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    active = forms.ChoiceField(choices=ACTIVE_CHOICES, required=False, initial='1')
+    sort = forms.ChoiceField(choices=SORT_CHOICES, required=False, initial='name')
+
+    def __init__(self, data=None, **kwargs):
+        # Unbound fields fall back to their initial values, so the default
+        # roster (active people by name) needs no query string
+        if data is not None:
+            data = data.copy()
+            for name in ('active', 'sort'):
+                data.setdefault(name, self.base_fields[name].initial)
+        super().__init__(data, **kwargs)
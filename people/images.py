@@ -0,0 +1,220 @@
+"""
+Thumbnails for MartialArtist photos.
+
+Uploaded photos are often multi-megabyte camera JPEGs, so pages and the admin
+use small derivatives instead. Each spec below is written in JPEG and WebP
+next to the original:
+
+  people/images/Colin_R_Weber.JPG
+  people/images/Colin_R_Weber.small.jpg
+  people/images/Colin_R_Weber.small.webp
+  ...
+
+Derivatives are generated by a post_save signal when a photo is uploaded and
+can be backfilled with `manage.py generate_thumbnails`. Pages fall back to the
+original when a derivative is missing.
+
+Before an upload is stored, MartialArtist.save() passes it through
+normalize_upload(): the original is downscaled to PEOPLE_IMAGE_MAX_DIMENSION,
+re-encoded at PEOPLE_IMAGE_QUALITY without EXIF or other metadata, and named
+after a hash of the uploaded bytes, so uploading the same photo twice stores
+one file.
+"""
+import hashlib
+import logging
+import os
+import re
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# name: (width, height, crop). A None width bounds the height only.
+THUMBNAIL_SPECS = {
+    'small': (45, 45, True),        # admin change list
+    'medium': (180, 180, True),     # admin change form
+    'profile': (None, 200, False),  # people/index.html
+}
+
+FORMATS = {
+    # extension: (Pillow format, save options)
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+}
+
+
+def content_hash(fileobj):
+    """sha256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(64 * 1024), b''):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def normalize_image(fileobj):
+    """
+    Return (bytes, extension) for a downscaled, metadata-free copy of the image
+    in fileobj, or None when Pillow cannot read it. JPEGs are decoded at a
+    reduced scale (draft mode), so a full-resolution bitmap is never held.
+    """
+    max_dimension = getattr(settings, 'PEOPLE_IMAGE_MAX_DIMENSION', 1600)
+    quality = getattr(settings, 'PEOPLE_IMAGE_QUALITY', 85)
+    try:
+        fileobj.seek(0)
+        image = Image.open(fileobj)
+        image.draft('RGB', (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        logger.info('Storing upload as is, cannot normalize it: %s', exc)
+        return None
+    finally:
+        fileobj.seek(0)
+
+    buffer = BytesIO()
+    # Nothing from image.info (EXIF, ICC, comments) is passed on to the encoder
+    if _has_alpha(image):
+        image.save(buffer, 'PNG', optimize=True)
+        return buffer.getvalue(), 'png'
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue(), 'jpg'
+
+
+def is_normalized(name, directory):
+    """Whether `name` is already a normalized <directory>/<content hash>.<ext> file."""
+    return re.fullmatch(rf'{re.escape(directory)}/[0-9a-f]{{32}}\.(jpg|png)', name) is not None
+
+
+def normalize_upload(field_file):
+    """
+    Replace the uncommitted upload in field_file with its normalized copy,
+    stored as <upload_to>/<content hash>.<ext>. An identical earlier upload is
+    reused instead of written again. Unreadable files are left untouched.
+    """
+    digest = content_hash(field_file.file)
+    directory = field_file.field.upload_to
+    storage = field_file.storage
+    for ext in ('jpg', 'png'):
+        existing = f'{directory}/{digest[:32]}.{ext}'
+        if storage.exists(existing):
+            field_file.name = existing
+            field_file._committed = True
+            return
+    normalized = normalize_image(field_file.file)
+    if normalized is None:
+        return
+    content, ext = normalized
+    field_file.save(f'{digest[:32]}.{ext}', ContentFile(content), save=False)
+
+
+def derivative_name(name, spec, ext):
+    """Storage name of the `spec` derivative of the original `name`."""
+    stem, _ = os.path.splitext(name)
+    return f'{stem}.{spec}.{ext}'
+
+
+def derivative_names(name):
+    return [derivative_name(name, spec, ext) for spec in THUMBNAIL_SPECS for ext in FORMATS]
+
+
+def _resize(image, spec):
+    width, height, crop = THUMBNAIL_SPECS[spec]
+    if crop:
+        return ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+    resized = image.copy()
+    resized.thumbnail((width or image.width, height), Image.Resampling.LANCZOS)
+    return resized
+
+
+def _encode(image, ext):
+    fmt, options = FORMATS[ext]
+    if fmt == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def generate_thumbnails(name, storage=None, force=False):
+    """
+    Write every derivative of the original `name`. Returns the names written;
+    unreadable or missing originals are logged and yield an empty list.
+    """
+    storage = storage or default_storage
+    targets = {
+        spec: [ext for ext in FORMATS if force or not storage.exists(derivative_name(name, spec, ext))]
+        for spec in THUMBNAIL_SPECS
+    }
+    if not any(targets.values()):
+        return []
+    try:
+        with storage.open(name, 'rb') as fh:
+            image = Image.open(fh)
+            # Let the JPEG decoder downscale while reading; the largest spec is 200px
+            image.draft('RGB', (400, 400))
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        logger.warning('Cannot create thumbnails for %s: %s', name, exc)
+        return []
+
+    written = []
+    for spec, exts in targets.items():
+        if not exts:
+            continue
+        resized = _resize(image, spec)
+        for ext in exts:
+            target = derivative_name(name, spec, ext)
+            if storage.exists(target):
+                storage.delete(target)
+            written.append(storage.save(target, ContentFile(_encode(resized, ext))))
+    return written
+
+
+def delete_thumbnails(name, storage=None):
+    storage = storage or default_storage
+    for target in derivative_names(name):
+        if storage.exists(target):
+            storage.delete(target)
+
+
+def thumbnail_url(field_file, spec, ext='jpg'):
+    """URL of a derivative of field_file, or of the original when it is missing."""
+    if not field_file:
+        return ''
+    target = derivative_name(field_file.name, spec, ext)
+    if field_file.storage.exists(target):
+        return field_file.storage.url(target)
+    return field_file.url
+
+
+def picture_tag(field_file, spec, alt='', css_class='', style=''):
+    """
+    A <picture> element offering the WebP derivative with a JPEG fallback.
+    Cropped specs carry their size so the layout does not shift while loading.
+    """
+    if not field_file:
+        return ''
+    width, height, crop = THUMBNAIL_SPECS[spec]
+    webp = derivative_name(field_file.name, spec, 'webp')
+    source = ''
+    if field_file.storage.exists(webp):
+        source = format_html('<source srcset="{}" type="image/webp">', field_file.storage.url(webp))
+    size = format_html(' width="{}" height="{}"', width, height) if crop else ''
+    return format_html(
+        '<picture>{}<img src="{}" alt="{}" class="{}" style="{}"{} loading="lazy"></picture>',
+        source, thumbnail_url(field_file, spec), alt, css_class, style, size,
+    )
@@ -0,0 +1,208 @@
+"""
+Bulk linking of Django users to MartialArtist records
+(used by `manage.py link_user_to_martial_artist --csv/--auto`).
+
+Users and martial artists are each read with one query into in-memory maps.
+Requested links (username/martial artist rows from a CSV, or automatic
+matches by email and then by full name) are resolved against the maps and
+written with bulk_update. Missing accounts can be created with bulk_create
+and a generated initial password. Hashing is deferred: the accounts are
+inserted and linked with an unusable password, then the initial passwords
+are hashed and written batch by batch afterwards, so the slow password
+hasher never runs inside the linking transaction. The command reports the
+initial passwords so they can be handed to the members.
+"""
+import csv
+import re
+import time
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils.crypto import get_random_string
+
+from .auth import forget_users
+from .models import MartialArtist
+from .search import name_key
+
+CSV_COLUMNS = ('username', 'id', 'first_name', 'last_name')
+PASSWORD_LENGTH = 12
+# No look-alike characters (0/O, 1/l/I) in passwords that are read off a sheet
+PASSWORD_CHARS = 'abcdefghjkmnpqrstuvwxyzABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+
+
+def _key(value):
+    return (value or '').strip().casefold()
+
+
+def read_mapping(fh):
+    """Yield (line number, row) from a CSV with a username column and an id or last_name column."""
+    reader = csv.DictReader(fh)
+    for row in reader:
+        yield reader.line_num, {column: (row.get(column) or '').strip() for column in CSV_COLUMNS}
+
+
+class Linker:
+    """
+    Plan links with link_rows(), auto_match() and create_missing_users(), then
+    call save(). `problems` collects the rows or artists that were skipped.
+    """
+
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+        self.User = get_user_model()
+        users = list(self.User.objects.only('pk', 'username', 'email', 'first_name', 'last_name'))
+        artists = list(MartialArtist.objects.only(
+            'pk', 'first_name', 'middle_name', 'last_name', 'email', 'user_id', 'first_name_key', 'last_name_key'
+        ).order_by('last_name_key', 'first_name_key', 'pk'))
+        self.users_by_id = {user.pk: user for user in users}
+        self.users_by_username = {_key(user.username): user for user in users}
+        self.users_by_email = defaultdict(list)
+        self.users_by_name = defaultdict(list)
+        for user in users:
+            if user.email:
+                self.users_by_email[_key(user.email)].append(user)
+            if user.first_name and user.last_name:
+                self.users_by_name[(name_key(user.first_name), name_key(user.last_name))].append(user)
+        self.artists = artists
+        self.artists_by_id = {artist.pk: artist for artist in artists}
+        self.artists_by_last_name = defaultdict(list)
+        for artist in artists:
+            self.artists_by_last_name[artist.last_name_key].append(artist)
+        self.artist_for_user = {artist.user_id: artist for artist in artists if artist.user_id}
+        self.changed = {}
+        self.touched_users = set()
+        self.new_users = []
+        self.passwords = {}
+        self.problems = []
+        self.elapsed = 0.0
+
+    def find_artist(self, artist_id=None, last_name=None, first_name=None):
+        if artist_id:
+            return self.artists_by_id.get(int(artist_id))
+        matches = self.artists_by_last_name.get(name_key(last_name), [])
+        if first_name:
+            matches = [artist for artist in matches if artist.first_name_key == name_key(first_name)]
+        return matches[0] if len(matches) == 1 else None
+
+    def link(self, user, artist):
+        """Plan linking user to artist, moving the user off any record it was linked to."""
+        if artist.user_id == user.pk:
+            return False
+        if artist.user_id:
+            self.artist_for_user.pop(artist.user_id, None)
+            self.touched_users.add(artist.user_id)
+        self.touched_users.add(user.pk)
+        previous = self.artist_for_user.get(user.pk)
+        if previous is not None:
+            previous.user_id = None
+            self.changed[previous.pk] = previous
+        artist.user_id = user.pk
+        self.artist_for_user[user.pk] = artist
+        self.changed[artist.pk] = artist
+        return True
+
+    def link_rows(self, rows):
+        """Link (line, row) pairs from read_mapping(); returns the number of links planned."""
+        linked = 0
+        for line, row in rows:
+            user = self.users_by_username.get(_key(row['username']))
+            if user is None:
+                self.problems.append(f'line {line}: user "{row["username"]}" does not exist')
+                continue
+            try:
+                artist = self.find_artist(row['id'], row['last_name'], row['first_name'])
+            except ValueError:
+                artist = None
+            if artist is None:
+                name = f'{row["first_name"]} {row["last_name"]}'.strip()
+                described = f'id {row["id"]}' if row['id'] else f'"{name}"'
+                self.problems.append(f'line {line}: no single martial artist matches {described}')
+                continue
+            linked += self.link(user, artist)
+        return linked
+
+    def unlinked(self):
+        return [artist for artist in self.artists if not artist.user_id]
+
+    def auto_match(self):
+        """Link each unlinked artist to the one free user with its email, or else its full name."""
+        linked = 0
+        for artist in self.unlinked():
+            users = self.users_by_email.get(_key(artist.email), []) if artist.email else []
+            if not users:
+                users = self.users_by_name.get((artist.first_name_key, artist.last_name_key), [])
+            users = [user for user in users if user.pk not in self.artist_for_user]
+            if len(users) == 1:
+                linked += self.link(users[0], artist)
+            elif users:
+                self.problems.append(f'{artist}: {len(users)} matching users, skipped')
+        return linked
+
+    def username_for(self, artist):
+        """An unused username from the artist's email or name: 'kim.kid', 'kim.kid2', ..."""
+        base = artist.email.split('@')[0] if artist.email else f'{artist.first_name_key}.{artist.last_name_key}'
+        base = re.sub(r'[^\w.@+-]+', '.', _key(base)).strip('.')[:140] or 'member'
+        username, suffix = base, 1
+        while _key(username) in self.users_by_username:
+            suffix += 1
+            username = f'{base}{suffix}'
+        return username
+
+    def create_missing_users(self):
+        """Plan an account with a generated initial password for every artist still unlinked."""
+        for artist in self.unlinked():
+            user = self.User(
+                username=self.username_for(artist),
+                email=artist.email or '',
+                first_name=artist.first_name[:150],
+                last_name=artist.last_name[:150],
+            )
+            user.set_unusable_password()
+            self.passwords[user.username] = get_random_string(PASSWORD_LENGTH, PASSWORD_CHARS)
+            self.users_by_username[_key(user.username)] = user
+            self.new_users.append((user, artist))
+        return len(self.new_users)
+
+    def save(self):
+        """Create planned users and write changed links; returns the number of artists updated."""
+        started = time.monotonic()
+        with transaction.atomic():
+            if self.new_users:
+                self.User.objects.bulk_create([user for user, _ in self.new_users], batch_size=self.batch_size)
+                # Not every backend returns primary keys from bulk_create (MySQL), so read them back
+                pks = self._user_pks([user.username for user, _ in self.new_users])
+                for user, artist in self.new_users:
+                    user.pk = pks[user.username]
+                    self.link(user, artist)
+            changed = list(self.changed.values())
+            if changed:
+                # Clear first: one UPDATE must never hold a user on two rows (one-to-one)
+                MartialArtist.objects.filter(pk__in=list(self.changed)).update(user=None)
+                MartialArtist.objects.bulk_update(
+                    [artist for artist in changed if artist.user_id], ['user'], batch_size=self.batch_size
+                )
+        if changed:
+            from pages.dashboard import invalidate_dashboards
+            invalidate_dashboards()
+            forget_users(self.touched_users)
+        self.hash_passwords()
+        self.elapsed = time.monotonic() - started
+        return len(changed)
+
+    def _user_pks(self, usernames):
+        pks = {}
+        for start in range(0, len(usernames), self.batch_size):
+            pks.update(self.User.objects.filter(
+                username__in=usernames[start:start + self.batch_size]
+            ).values_list('username', 'pk'))
+        return pks
+
+    def hash_passwords(self):
+        """Hash and write the initial passwords of the created users, one batch at a time."""
+        users = [user for user, _ in self.new_users if user.pk is not None]
+        for start in range(0, len(users), self.batch_size):
+            batch = users[start:start + self.batch_size]
+            for user in batch:
+                user.set_password(self.passwords[user.username])
+            self.User.objects.bulk_update(batch, ['password'])
@@ -0,0 +1,48 @@
+"""
+Export martial artists with their sponsors and ranks as CSV or JSONL
+(format described in people.transfer), ready for import_roster.
+
+Usage:
+  python manage.py export_roster roster.csv
+  python manage.py export_roster - --format jsonl --active-only > roster.jsonl
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from people.models import MartialArtist
+from people.transfer import encode_records, export_records, format_for
+
+
+class Command(BaseCommand):
+    help = 'Export martial artists, their sponsors and ranks as CSV or JSONL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Output file, or - for standard output.')
+        parser.add_argument('--format', choices=('csv', 'jsonl'), default=None, help='Override the file extension.')
+        parser.add_argument('--active-only', action='store_true', help='Only active martial artists.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows read per query (default: 1000).')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or format_for(options['path'])
+        artists = MartialArtist.objects.all()
+        if options['active_only']:
+            artists = artists.filter(active=True)
+        lines = encode_records(export_records(artists, options['chunk_size']), fmt)
+        started = time.monotonic()
+        count = 0
+        if options['path'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+                count += 1
+            report = self.stderr
+        else:
+            with open(options['path'], 'w', newline='', encoding='utf-8') as fh:
+                for line in lines:
+                    fh.write(line)
+                    count += 1
+            report = self.stdout
+        elapsed = time.monotonic() - started
+        records = count - 1 if fmt == 'csv' else count
+        rate = records / elapsed if elapsed else 0
+        report.write(f'Exported {records} records in {elapsed:.2f}s ({rate:.0f} records/s).')
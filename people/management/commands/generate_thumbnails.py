@@ -0,0 +1,64 @@
+"""
+Create photo thumbnails (people.images) for existing martial artists.
+
+Usage:
+  python manage.py generate_thumbnails
+  python manage.py generate_thumbnails --workers 8 --force
+
+Photos are decoded in a process pool, so the backfill uses every core.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from people.images import generate_thumbnails
+from people.models import MartialArtist
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def _generate(name, force):
+    return name, len(generate_thumbnails(name, force=force))
+
+
+class Command(BaseCommand):
+    help = 'Create missing thumbnails for martial artist photos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of worker processes (default: one per CPU).',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate thumbnails that already exist.',
+        )
+
+    def handle(self, *args, **options):
+        names = sorted(set(
+            MartialArtist.objects.exclude(image='').exclude(image__isnull=True).values_list('image', flat=True)
+        ))
+        started = time.monotonic()
+        written = 0
+        if options['workers'] > 1 and len(names) > 1:
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+                results = pool.map(_generate, names, [options['force']] * len(names), chunksize=4)
+                for name, count in results:
+                    written += count
+                    if options['verbosity'] > 1:
+                        self.stdout.write(f'  {name}: {count}')
+        else:
+            for name in names:
+                written += _generate(name, options['force'])[1]
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {written} thumbnail{"s" if written != 1 else ""} for {len(names)} photo'
+            f'{"s" if len(names) != 1 else ""} in {time.monotonic() - started:.2f}s.'
+        ))
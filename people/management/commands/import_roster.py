@@ -0,0 +1,45 @@
+"""
+Import sponsors, martial artists and ranks from a CSV or JSONL file
+(format described in people.transfer).
+
+Usage:
+  python manage.py import_roster roster.csv --dry-run
+  python manage.py import_roster roster.jsonl --batch-size 1000
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from people.transfer import ImportConflict, RecordError, RosterImporter, format_for, read_records
+
+
+class Command(BaseCommand):
+    help = 'Bulk import sponsors, martial artists and ranks from CSV or JSONL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import (.csv, .jsonl).')
+        parser.add_argument('--format', choices=('csv', 'jsonl'), default=None, help='Override the file extension.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per bulk insert (default: 500).')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the whole file without writing.')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or format_for(options['path'])
+        importer = RosterImporter(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as fh:
+                importer.run(read_records(fh, fmt))
+        except OSError as exc:
+            raise CommandError(f'Cannot read {options["path"]}: {exc}')
+        except (RecordError, ImportConflict) as exc:
+            raise CommandError(f'Nothing imported; {exc}')
+
+        for error in importer.errors:
+            self.stderr.write(str(error))
+        counts = ', '.join(f'{importer.counts[kind]} {kind}' for kind in ('sponsor', 'martial_artist', 'rank'))
+        rate = importer.total / importer.elapsed if importer.elapsed else 0
+        if options['dry_run']:
+            if importer.errors:
+                raise CommandError(f'{len(importer.errors)} invalid record(s); {counts} valid.')
+            self.stdout.write(self.style.SUCCESS(f'Dry run: {counts} valid, nothing written.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Imported {counts} in {importer.elapsed:.2f}s ({rate:.0f} records/s).'
+            ))
@@ -7,18 +7,31 @@ Usage:
 
   Or by martial artist ID:
   python manage.py link_user_to_martial_artist USERNAME --id MARTIAL_ARTIST_ID
+
+  In bulk, from a CSV with a username column and an id or last_name (and
+  optional first_name) column, and/or by matching email then full name:
+  python manage.py link_user_to_martial_artist --csv links.csv
+  python manage.py link_user_to_martial_artist --auto --create-users --dry-run
+  python manage.py link_user_to_martial_artist --auto --create-users --passwords initial.csv
+
+  New accounts get a generated initial password, written as username,password
+  rows to --passwords (or listed on stdout without it) for handing out.
 """
+import csv
+
 from django.contrib.auth import get_user_model
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
+from people.linking import Linker, read_mapping
 from people.models import MartialArtist
+from people.search import name_key, search
 
 
 class Command(BaseCommand):
-    help = 'Link a Django user to a MartialArtist by username and last name (or by ID).'
+    help = 'Link a Django user to a MartialArtist by username and last name (or by ID), or link many at once.'
 
     def add_arguments(self, parser):
-        parser.add_argument('username', type=str, help='Django user username (e.g. wseyler)')
+        parser.add_argument('username', nargs='?', type=str, help='Django user username (e.g. wseyler)')
         parser.add_argument(
             'last_name',
             nargs='?',
@@ -32,35 +45,62 @@ class Command(BaseCommand):
             metavar='PK',
             help='Martial artist primary key instead of last name.',
         )
+        parser.add_argument('--csv', metavar='PATH', help='Link every row of a username,id,first_name,last_name CSV.')
+        parser.add_argument(
+            '--auto',
+            action='store_true',
+            help='Link unlinked martial artists to the one unlinked user with the same email, or else full name.',
+        )
+        parser.add_argument(
+            '--create-users',
+            action='store_true',
+            help='Create accounts with a generated initial password for martial artists still unlinked.',
+        )
+        parser.add_argument(
+            '--passwords',
+            metavar='PATH',
+            help='Write the new accounts\' initial passwords to this CSV instead of stdout.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per bulk write (default 500).')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing.')
 
     def handle(self, *args, **options):
+        if options['csv'] or options['auto'] or options['create_users']:
+            return self.handle_bulk(options)
+        if not options['username']:
+            raise CommandError('Provide a username, or --csv/--auto/--create-users.')
+
         User = get_user_model()
         username = options['username']
         last_name = options['last_name']
         ma_id = options.get('id')
 
-        try:
-            user = User.objects.get(username=username)
-        except User.DoesNotExist:
+        user = User.objects.only('pk', 'username').filter(username=username).first()
+        if user is None:
             self.stderr.write(self.style.ERROR(f'User "{username}" does not exist.'))
             return
 
+        artists = MartialArtist.objects.select_related('user').only(
+            'pk', 'first_name', 'middle_name', 'last_name', 'image', 'user__username'
+        )
         if ma_id is not None:
-            try:
-                ma = MartialArtist.objects.get(pk=ma_id)
-            except MartialArtist.DoesNotExist:
+            ma = artists.filter(pk=ma_id).first()
+            if ma is None:
                 self.stderr.write(self.style.ERROR(f'MartialArtist with id={ma_id} does not exist.'))
                 return
         elif last_name:
-            qs = MartialArtist.objects.filter(last_name__iexact=last_name.strip())
-            if not qs.exists():
+            # Exact match on the indexed, accent-insensitive key; suggestions if nothing matches
+            matches = list(artists.filter(last_name_key=name_key(last_name))[:2])
+            if not matches:
+                suggestions = ', '.join(str(person) for person in search(MartialArtist, last_name, limit=5))
                 self.stderr.write(self.style.ERROR(
                     f'No MartialArtist with last name "{last_name}". '
-                    'Use --id PK to specify by primary key.'
+                    + (f'Did you mean: {suggestions}? ' if suggestions else '')
+                    + 'Use --id PK to specify by primary key.'
                 ))
                 return
-            ma = qs.first()
-            if qs.count() > 1:
+            ma = matches[0]
+            if len(matches) > 1:
                 self.stdout.write(
                     self.style.WARNING(f'Multiple martial artists with last name "{last_name}"; using first: {ma}.')
                 )
@@ -72,6 +112,54 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING(
                 f'MartialArtist {ma} was linked to user "{ma.user.username}". Overwriting.'
             ))
+        # A user belongs to one martial artist; move the link rather than fail on the unique constraint
+        MartialArtist.objects.filter(user=user).exclude(pk=ma.pk).update(user=None)
         ma.user = user
-        ma.save()
+        ma.save(update_fields=['user'])
         self.stdout.write(self.style.SUCCESS(f'Linked user "{username}" to martial artist: {ma}.'))
+
+    def handle_bulk(self, options):
+        linker = Linker(batch_size=options['batch_size'])
+        linked = 0
+        if options['csv']:
+            try:
+                with open(options['csv'], newline='', encoding='utf-8-sig') as fh:
+                    linked += linker.link_rows(read_mapping(fh))
+            except OSError as exc:
+                raise CommandError(f'Cannot read {options["csv"]}: {exc}')
+        if options['auto']:
+            linked += linker.auto_match()
+        created = linker.create_missing_users() if options['create_users'] else 0
+        for problem in linker.problems:
+            self.stderr.write(self.style.WARNING(problem))
+
+        if options['dry_run']:
+            for user, artist in linker.new_users:
+                self.stdout.write(f'Would create user "{user.username}" for {artist}.')
+            self.stdout.write(self.style.SUCCESS(
+                f'Dry run: {linked} links and {created} new users planned; nothing written.'
+            ))
+            return
+        if linker.new_users and options['passwords']:
+            # Fail before writing anything if the report can't be saved
+            try:
+                report = open(options['passwords'], 'w', newline='', encoding='utf-8')
+            except OSError as exc:
+                raise CommandError(f'Cannot write {options["passwords"]}: {exc}')
+        else:
+            report = None
+        updated = linker.save()
+        if report is not None:
+            with report:
+                writer = csv.writer(report)
+                writer.writerow(['username', 'password'])
+                writer.writerows(linker.passwords.items())
+            self.stdout.write(f'Initial passwords written to {options["passwords"]}.')
+        else:
+            for username, password in linker.passwords.items():
+                self.stdout.write(f'{username}: {password}')
+        rate = updated / linker.elapsed if linker.elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Linked {linked + created} martial artists ({created} new users, {updated} records updated) '
+            f'in {linker.elapsed:.2f}s ({rate:.0f} records/s); {len(linker.problems)} skipped.'
+        ))
@@ -0,0 +1,72 @@
+"""
+Normalize martial artist photos stored before uploads were processed.
+
+Usage:
+  python manage.py normalize_photos --dry-run
+  python manage.py normalize_photos --delete-originals
+
+Each photo is downscaled and stripped of metadata like a new upload
+(people.images.normalize_image) and stored under its content hash, so copies
+of the same file such as Isabella_Gomez.JPG and Isabella_Gomez_NDB1acH.JPG
+collapse into one. Photos already stored under a content hash, by an earlier
+run or by a normalized upload, are left alone, so running it again changes
+nothing.
+"""
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from people.images import content_hash, delete_thumbnails, generate_thumbnails, is_normalized, normalize_image
+from people.models import MartialArtist
+
+
+class Command(BaseCommand):
+    help = 'Downscale, strip and deduplicate existing martial artist photos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing.')
+        parser.add_argument(
+            '--delete-originals',
+            action='store_true',
+            help='Delete the old files and their thumbnails once nothing refers to them.',
+        )
+
+    def handle(self, *args, **options):
+        upload_to = MartialArtist._meta.get_field('image').upload_to
+        names = sorted(set(
+            MartialArtist.objects.exclude(image='').exclude(image__isnull=True).values_list('image', flat=True)
+        ))
+        saved_bytes = converted = 0
+        for name in names:
+            if is_normalized(name, upload_to):
+                continue
+            if not default_storage.exists(name):
+                self.stderr.write(f'Missing: {name}')
+                continue
+            with default_storage.open(name, 'rb') as fh:
+                digest = content_hash(fh)
+                normalized = normalize_image(fh)
+            if normalized is None:
+                self.stderr.write(f'Unreadable, left as is: {name}')
+                continue
+            content, ext = normalized
+            # Named by the hash of the original bytes, like normalize_upload(),
+            # so a later upload of the same original reuses this file
+            target = f'{upload_to}/{digest[:32]}.{ext}'
+            saved_bytes += default_storage.size(name) - len(content)
+            converted += 1
+            self.stdout.write(f'{name} -> {target}')
+            if options['dry_run']:
+                continue
+            if not default_storage.exists(target):
+                default_storage.save(target, ContentFile(content))
+            MartialArtist.objects.filter(image=name).update(image=target)
+            generate_thumbnails(target)
+            if options['delete_originals']:
+                delete_thumbnails(name)
+                default_storage.delete(name)
+
+        verb = 'Would normalize' if options['dry_run'] else 'Normalized'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {converted} photo{"s" if converted != 1 else ""}, saving {saved_bytes / 1024:.0f} KiB.'
+        ))
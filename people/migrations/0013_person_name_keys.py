@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-17 10:12
+
+from django.db import migrations, models
+
+
+def fill_name_keys(apps, schema_editor):
+    from people.search import name_key
+
+    for model_name in ('MartialArtist', 'Sponsor'):
+        model = apps.get_model('people', model_name)
+        people = list(model.objects.only('first_name', 'last_name'))
+        for person in people:
+            person.first_name_key = name_key(person.first_name)
+            person.last_name_key = name_key(person.last_name)
+        model.objects.bulk_update(people, ['first_name_key', 'last_name_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0012_martialartist_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='martialartist',
+            name='first_name_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=60),
+        ),
+        migrations.AddField(
+            model_name='martialartist',
+            name='last_name_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=60),
+        ),
+        migrations.AddField(
+            model_name='sponsor',
+            name='first_name_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=60),
+        ),
+        migrations.AddField(
+            model_name='sponsor',
+            name='last_name_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=60),
+        ),
+        migrations.RunPython(fill_name_keys, migrations.RunPython.noop),
+    ]
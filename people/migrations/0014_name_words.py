@@ -0,0 +1,52 @@
+# Generated by Django 6.0.1 on 2026-10-17 19:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_name_words(apps, schema_editor):
+    from people.search import inner_words
+
+    for model_name in ('MartialArtist', 'Sponsor'):
+        model = apps.get_model('people', model_name)
+        word_model = apps.get_model('people', f'{model_name}NameWord')
+        people = model.objects.filter(
+            models.Q(first_name_key__contains=' ') | models.Q(last_name_key__contains=' ')
+        ).values_list('pk', 'first_name_key', 'last_name_key')
+        word_model.objects.bulk_create([
+            word_model(person_id=pk, word=word)
+            for pk, first_key, last_key in people for word in inner_words(first_key, last_key)
+        ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0013_person_name_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MartialArtistNameWord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(db_index=True, max_length=60)),
+                ('person', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='name_words', to='people.martialartist')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='SponsorNameWord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(db_index=True, max_length=60)),
+                ('person', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='name_words', to='people.sponsor')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(fill_name_words, migrations.RunPython.noop),
+    ]
@@ -9,6 +9,9 @@ class Person(models.Model):
     last_name = models.CharField(max_length=30, blank=False)
     email = models.EmailField(blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
+    # Case-folded, accent-stripped names for indexed prefix search (people.search)
+    first_name_key = models.CharField(max_length=60, editable=False, db_index=True, default='')
+    last_name_key = models.CharField(max_length=60, editable=False, db_index=True, default='')
 
     def __str__(self):
         """Optimized string representation"""
@@ -18,6 +21,45 @@ class Person(models.Model):
         name_parts.append(self.last_name)
         return ' '.join(name_parts)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        person = super().from_db(db, field_names, values)
+        person._saved_name_keys = (person.__dict__.get('first_name_key'), person.__dict__.get('last_name_key'))
+        return person
+
+    def refresh_name_keys(self):
+        """Recompute the search keys; needed before bulk_create/bulk_update, which skip save()."""
+        from .search import name_key
+        self.first_name_key = name_key(self.first_name)
+        self.last_name_key = name_key(self.last_name)
+
+    @classmethod
+    def create_name_words(cls, people):
+        """Index the inner name words of saved people (people.search); for bulk_create, which skips save()."""
+        from .search import inner_words
+        word_model = cls._meta.get_field('name_words').related_model
+        words = [
+            word_model(person_id=person.pk, word=word)
+            for person in people for word in inner_words(person.first_name_key, person.last_name_key)
+        ]
+        if words:
+            word_model.objects.bulk_create(words)
+
+    def save(self, *args, **kwargs):
+        self.refresh_name_keys()
+        update_fields = kwargs.get('update_fields')
+        names_saved = update_fields is None or bool({'first_name', 'last_name'} & set(update_fields))
+        if update_fields is not None and names_saved:
+            kwargs['update_fields'] = set(update_fields) | {'first_name_key', 'last_name_key'}
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        keys = (self.first_name_key, self.last_name_key)
+        if names_saved and keys != getattr(self, '_saved_name_keys', None):
+            if not adding:
+                self.name_words.all().delete()
+            type(self).create_name_words([self])
+            self._saved_name_keys = keys
+
     class Meta:
         abstract = True
         ordering = ['last_name', 'first_name']
@@ -25,6 +67,17 @@ class Person(models.Model):
             models.Index(fields=['last_name', 'first_name']),
         ]
 
+class NameWord(models.Model):
+    """
+    A word of a person's name keys after the first, e.g. 'tsotsos' in
+    'Murdaugh-Tsotsos', so people.search can match it as a prefix too.
+    """
+    word = models.CharField(max_length=60, db_index=True)
+
+    class Meta:
+        abstract = True
+
+
 class Sponsor(Person):
     isParent = models.BooleanField(default=True)
     street = models.CharField(max_length=70, blank=True, null=True)
@@ -33,6 +86,11 @@ class Sponsor(Person):
     zip = models.CharField(max_length=10, blank=True, null=True)
     telephone = models.CharField(max_length=15, blank=True, null=True)
 
+
+class SponsorNameWord(NameWord):
+    person = models.ForeignKey(Sponsor, on_delete=models.CASCADE, related_name='name_words')
+
+
 class MartialArtist(Person):
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL,
@@ -49,3 +107,14 @@ class MartialArtist(Person):
     image = models.ImageField(upload_to='people/images', blank=True, null=True)
     active = models.BooleanField(default=True)
     payment_plan = models.ForeignKey(PaymentPlan, on_delete=models.SET_NULL, blank=True, null=True)
+
+    def save(self, *args, **kwargs):
+        if self.image and not self.image._committed:
+            # A new upload: downscale, strip metadata and dedupe before storing
+            from .images import normalize_upload
+            normalize_upload(self.image)
+        super().save(*args, **kwargs)
+
+
+class MartialArtistNameWord(NameWord):
+    person = models.ForeignKey(MartialArtist, on_delete=models.CASCADE, related_name='name_words')
@@ -0,0 +1,102 @@
+"""
+Roster engine for the staff view of people.views.index.
+
+Filtering (style, sponsor, enrollment date range, active) and sorting happen
+in the database, and pages are fetched with keyset pagination over the
+(last_name, first_name) index, loading only the columns the table shows.
+Style names, with the current rank in each, are fetched for a whole page in
+one query through the M2M table.
+
+Roster.chunks() walks the full filtered roster page by page so the streamed
+HTML and CSV exports render any number of people with flat memory.
+"""
+from collections import defaultdict
+
+from django.db.models import OuterRef, Subquery
+
+from pages.pagination import KeysetPaginator
+from ranks.models import CurrentRank
+
+from .models import MartialArtist
+
+ROSTER_COLUMNS = ('id', 'first_name', 'middle_name', 'last_name', 'email', 'enrollment_date', 'active')
+
+# sort option: (keyset fields ending with a unique field, descending)
+SORTS = {
+    'name': (('last_name', 'first_name', 'id'), False),
+    '-name': (('last_name', 'first_name', 'id'), True),
+    '-added': (('id',), True),
+}
+
+CSV_HEADER = ('Last name', 'First name', 'Middle name', 'Email', 'Enrollment date', 'Active', 'Styles')
+
+
+class Roster:
+    """
+    The roster described by `filters`, the cleaned_data of a RosterFilterForm
+    (missing keys mean no filter; sort defaults to name).
+    """
+
+    def __init__(self, filters=None, per_page=50):
+        self.filters = filters or {}
+        self.per_page = per_page
+
+    def queryset(self):
+        queryset = MartialArtist.objects.only(*ROSTER_COLUMNS)
+        f = self.filters
+        if f.get('style'):
+            queryset = queryset.filter(styles=f['style'])
+        if f.get('sponsor'):
+            queryset = queryset.filter(sponsor=f['sponsor'])
+        if f.get('enrolled_after'):
+            queryset = queryset.filter(enrollment_date__gte=f['enrolled_after'])
+        if f.get('enrolled_before'):
+            queryset = queryset.filter(enrollment_date__lte=f['enrolled_before'])
+        if f.get('active') in ('0', '1'):
+            queryset = queryset.filter(active=f['active'] == '1')
+        return queryset
+
+    def paginator(self, per_page=None):
+        keys, descending = SORTS.get(self.filters.get('sort') or 'name', SORTS['name'])
+        return KeysetPaginator(self.queryset(), keys, per_page or self.per_page, descending=descending)
+
+    def page(self, after=None, before=None):
+        page = self.paginator().page(after=after, before=before)
+        attach_style_titles(page.object_list)
+        return page
+
+    def chunks(self, size=1000):
+        for rows in self.paginator(size).chunks():
+            attach_style_titles(rows)
+            yield rows
+
+
+def attach_style_titles(people):
+    """
+    Set person.style_titles on every row with one query: style names with the
+    current rank (ranks.CurrentRank) where there is one, e.g. 'Karate (Yellow)'.
+    """
+    titles = defaultdict(list)
+    through = MartialArtist.styles.through
+    current = CurrentRank.objects.filter(
+        martial_artist_id=OuterRef('martialartist_id'), style_id=OuterRef('style_id')
+    ).values('rank_type__title')[:1]
+    rows = through.objects.filter(
+        martialartist_id__in=[person.pk for person in people]
+    ).annotate(rank=Subquery(current)).order_by('style__title').values_list('martialartist_id', 'style__title', 'rank')
+    for person_id, title, rank in rows:
+        titles[person_id].append(f'{title} ({rank})' if rank else title)
+    for person in people:
+        person.style_titles = titles.get(person.pk, [])
+
+
+def csv_row(person):
+    return (
+        person.last_name,
+        person.first_name,
+        person.middle_name or '',
+        person.email or '',
+        person.enrollment_date.isoformat() if person.enrollment_date else '',
+        'yes' if person.active else 'no',
+        ', '.join(person.style_titles),
+    )
@@ -0,0 +1,105 @@
+"""
+Name search for MartialArtist and Sponsor.
+
+Person.save() keeps first_name_key and last_name_key, case-folded and
+accent-stripped copies of the names, in indexed columns. A search term is
+matched as a prefix of either key with a range condition (key >= 'gar' AND
+key < 'gar\\uffff'), which every database answers from the index, unlike
+icontains/iexact. The later words of compound names ('tsotsos' in
+'Murdaugh-Tsotsos') are kept as rows of their own (Person.name_words) and
+matched the same way. Candidates are ranked with difflib so close spellings still
+come first, and when few prefix matches exist a wider pass picks up typos such
+as "Curz" for "Cruz".
+
+Typo tolerance is best-effort. The wider pass only looks at names that start
+with the same letter as a search term and are within LENGTH_SLACK characters
+of its length, read in name order up to CANDIDATE_LIMIT rows, so a typo in
+the first letter ("Kruz") is never found and a very common initial can crowd
+the intended name out.
+"""
+import difflib
+import re
+import unicodedata
+
+from django.db.models import Q
+from django.db.models.functions import Length
+
+PREFIX_END = '\uffff'
+CANDIDATE_LIMIT = 200
+LENGTH_SLACK = 2
+
+
+def name_key(value):
+    """'  José  Núñez-Ruiz ' -> 'jose nunez ruiz'"""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(re.findall(r'\w+', stripped.casefold()))
+
+
+def inner_words(*keys):
+    """Words of the name keys other than each key's first: 'murdaugh tsotsos' -> {'tsotsos'}."""
+    return {word for key in keys for word in (key or '').split()[1:]}
+
+
+def _prefix(field, prefix):
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + PREFIX_END})
+
+
+def _candidates(model, terms):
+    words = model._meta.get_field('name_words').related_model.objects.all()
+    condition = Q()
+    for term in terms:
+        condition |= _prefix('last_name_key', term) | _prefix('first_name_key', term)
+        condition |= Q(pk__in=words.filter(_prefix('word', term)).values('person_id'))
+    return list(
+        model.objects.filter(condition).values_list('pk', 'first_name_key', 'last_name_key')[:CANDIDATE_LIMIT]
+    )
+
+
+def _typo_candidates(model, terms):
+    """Names with a term's first letter and about its length, in name order."""
+    condition = Q()
+    for term in terms:
+        lengths = (max(len(term) - LENGTH_SLACK, 1), len(term) + LENGTH_SLACK)
+        for field in ('last_name_key', 'first_name_key'):
+            condition |= _prefix(field, term[0]) & Q(**{f'{field}_length__range': lengths})
+    queryset = model.objects.annotate(
+        last_name_key_length=Length('last_name_key'), first_name_key_length=Length('first_name_key'),
+    ).filter(condition).order_by('last_name_key', 'first_name_key', 'pk')
+    return list(queryset.values_list('pk', 'first_name_key', 'last_name_key')[:CANDIDATE_LIMIT])
+
+
+def _score(terms, first_key, last_key):
+    words = f'{first_key} {last_key}'.split()
+    score = 0.0
+    for term in terms:
+        best = 0.0
+        for word in words:
+            if word.startswith(term):
+                best = 1.0 + len(term) / len(word)
+                break
+            best = max(best, difflib.SequenceMatcher(None, term, word).ratio())
+        score += best
+    return score / len(terms)
+
+
+def ranked_ids(model, query, limit=10, cutoff=0.6):
+    """Primary keys of `model` rows best matching query, best first."""
+    terms = name_key(query).split()
+    if not terms:
+        return []
+    rows = _candidates(model, terms)
+    if len(rows) < limit:
+        seen = {row[0] for row in rows}
+        rows += [row for row in _typo_candidates(model, terms) if row[0] not in seen]
+    scored = [(_score(terms, first, last), last, first, pk) for pk, first, last in rows]
+    scored = [item for item in scored if item[0] >= cutoff]
+    scored.sort(key=lambda item: (-item[0], item[1], item[2]))
+    return [pk for _, _, _, pk in scored[:limit]]
+
+
+def search(model, query, limit=10):
+    """Model instances best matching query, best first."""
+    ids = ranked_ids(model, query, limit=limit)
+    objects = model.objects.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
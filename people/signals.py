@@ -0,0 +1,44 @@
+"""
+Keep photo thumbnails (people.images) in step with MartialArtist.image, and
+drop cached users (people.auth) whose profile link may have changed.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .auth import forget_users
+from .images import delete_thumbnails, generate_thumbnails
+from .models import MartialArtist
+
+
+@receiver(post_save, sender=MartialArtist)
+def create_thumbnails(sender, instance, raw=False, **kwargs):
+    # Only missing derivatives are written, so saves without a new photo cost a few stat calls
+    if instance.image and not raw:
+        generate_thumbnails(instance.image.name, storage=instance.image.storage)
+
+
+@receiver(post_delete, sender=MartialArtist)
+def remove_thumbnails(sender, instance, **kwargs):
+    # Identical uploads share one file (normalize_upload), so keep it while still in use
+    if instance.image and not MartialArtist.objects.filter(image=instance.image.name).exists():
+        delete_thumbnails(instance.image.name, storage=instance.image.storage)
+
+
+@receiver(post_init, sender=MartialArtist)
+def remember_linked_user(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred user_id is not loaded just for this
+    instance._loaded_user_id = instance.__dict__.get('user_id')
+
+
+@receiver(post_save, sender=MartialArtist)
+@receiver(post_delete, sender=MartialArtist)
+def forget_linked_users(sender, instance, **kwargs):
+    forget_users({instance._loaded_user_id, instance.__dict__.get('user_id')})
+    instance._loaded_user_id = instance.__dict__.get('user_id')
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_user(sender, instance, **kwargs):
+    forget_users([instance.pk])
@@ -0,0 +1,20 @@
+from django import template
+
+from people.images import picture_tag, thumbnail_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(field_file, spec, alt='', css_class='', style=''):
+    """
+    Render a photo derivative, e.g.
+    {% responsive_image person.image 'profile' alt=person css_class='img-fluid' %}
+    """
+    return picture_tag(field_file, spec, alt=alt, css_class=css_class, style=style)
+
+
+@register.filter
+def thumbnail(field_file, spec):
+    """URL of the JPEG derivative: {{ person.image|thumbnail:'small' }}"""
+    return thumbnail_url(field_file, spec)
@@ -328,3 +328,621 @@ class PeopleViewsTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn('Jane', response.content.decode('utf-8'))
         self.assertIn('Doe', response.content.decode('utf-8'))
+
+
+class TempMediaMixin:
+    """Store uploads in a temporary MEDIA_ROOT and build real JPEG uploads"""
+
+    def setUp(self):
+        import tempfile
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = self.settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _jpeg(self, size=(800, 600), orientation=None, name='photo.JPG'):
+        from io import BytesIO
+        from PIL import Image
+        buffer = BytesIO()
+        image = Image.new('RGB', size, 'red')
+        exif = Image.Exif()
+        if orientation:
+            exif[0x0112] = orientation
+        image.save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class ThumbnailTests(TempMediaMixin, TestCase):
+    """Test cases for photo thumbnails in people.images"""
+
+    def test_upload_creates_every_derivative(self):
+        """Saving a photo writes each spec in JPEG and WebP beside the original"""
+        from PIL import Image
+        from .images import derivative_name, THUMBNAIL_SPECS
+        artist = MartialArtist.objects.create(first_name='Jane', last_name='Doe', image=self._jpeg())
+        storage = artist.image.storage
+        for spec, (width, height, crop) in THUMBNAIL_SPECS.items():
+            for ext in ('jpg', 'webp'):
+                self.assertTrue(storage.exists(derivative_name(artist.image.name, spec, ext)))
+            with storage.open(derivative_name(artist.image.name, spec, 'jpg')) as fh:
+                size = Image.open(fh).size
+            self.assertEqual(size, (width, height) if crop else (267, 200))
+
+    def test_exif_orientation_is_applied(self):
+        """A photo tagged as rotated 90 degrees produces a portrait thumbnail"""
+        from PIL import Image
+        from .images import derivative_name
+        artist = MartialArtist.objects.create(
+            first_name='Jane', last_name='Doe', image=self._jpeg(size=(400, 300), orientation=6)
+        )
+        with artist.image.storage.open(derivative_name(artist.image.name, 'profile', 'jpg')) as fh:
+            self.assertEqual(Image.open(fh).size, (150, 200))
+
+    def test_unreadable_image_is_skipped(self):
+        """A file Pillow cannot read saves normally and falls back to the original"""
+        from .images import thumbnail_url
+        image = SimpleUploadedFile('bad.jpg', b'fake image content', content_type='image/jpeg')
+        artist = MartialArtist.objects.create(first_name='Jane', last_name='Doe', image=image)
+        self.assertEqual(thumbnail_url(artist.image, 'small'), artist.image.url)
+
+    def test_admin_helpers_use_thumbnails(self):
+        """The admin list and form images point at the small and medium WebP/JPEG files"""
+        from django.contrib.admin.sites import site
+        artist = MartialArtist.objects.create(first_name='Jane', last_name='Doe', image=self._jpeg())
+        admin = site._registry[MartialArtist]
+        small = admin.image_tag_small(artist)
+        self.assertIn('.small.webp', small)
+        self.assertIn('.small.jpg', small)
+        self.assertIn('.medium.jpg', admin.martial_artist_image(artist))
+        self.assertEqual(admin.image_tag_small(MartialArtist(first_name='No', last_name='Photo')), '')
+
+    def test_delete_removes_thumbnails(self):
+        """Deleting the martial artist removes the derivatives"""
+        from .images import derivative_names
+        artist = MartialArtist.objects.create(first_name='Jane', last_name='Doe', image=self._jpeg())
+        names, storage = derivative_names(artist.image.name), artist.image.storage
+        artist.delete()
+        self.assertFalse(any(storage.exists(name) for name in names))
+
+    def test_backfill_command(self):
+        """generate_thumbnails writes only what is missing unless --force is given"""
+        from io import StringIO
+        from django.core.management import call_command
+        from .images import delete_thumbnails
+        artist = MartialArtist.objects.create(first_name='Jane', last_name='Doe', image=self._jpeg())
+        delete_thumbnails(artist.image.name)
+        out = StringIO()
+        call_command('generate_thumbnails', workers=1, stdout=out)
+        self.assertIn('Wrote 6 thumbnails for 1 photo', out.getvalue())
+        call_command('generate_thumbnails', workers=1, stdout=out)
+        self.assertIn('Wrote 0 thumbnails', out.getvalue())
+        call_command('generate_thumbnails', workers=1, force=True, stdout=out)
+        self.assertEqual(out.getvalue().count('Wrote 6 thumbnails'), 2)
+
+
+class PhotoNormalizationTests(TempMediaMixin, TestCase):
+    """Test cases for upload-time photo normalization in people.images"""
+
+    def test_large_upload_is_downscaled_and_stripped(self):
+        """The stored original fits PEOPLE_IMAGE_MAX_DIMENSION and carries no EXIF"""
+        from PIL import Image
+        with self.settings(PEOPLE_IMAGE_MAX_DIMENSION=500):
+            artist = MartialArtist.objects.create(
+                first_name='Jane', last_name='Doe', image=self._jpeg(size=(2000, 1000), orientation=1)
+            )
+        self.assertRegex(artist.image.name, r'^people/images/[0-9a-f]{32}\.jpg$')
+        with artist.image.storage.open(artist.image.name) as fh:
+            image = Image.open(fh)
+            self.assertEqual(image.size, (500, 250))
+            self.assertNotIn('exif', image.info)
+
+    def test_identical_uploads_share_one_file(self):
+        """A second upload of the same bytes reuses the stored file"""
+        import os
+        first = MartialArtist.objects.create(first_name='Isabella', last_name='Gomez', image=self._jpeg())
+        second = MartialArtist.objects.create(
+            first_name='Isabella', last_name='Gomez', image=self._jpeg(name='Isabella_Gomez_copy.JPG')
+        )
+        self.assertEqual(first.image.name, second.image.name)
+        directory = os.path.dirname(first.image.path)
+        self.assertEqual(len([n for n in os.listdir(directory) if n.count('.') == 1]), 1)
+
+    def test_shared_file_thumbnails_survive_one_delete(self):
+        """Deleting one of two artists sharing a photo keeps its thumbnails"""
+        from .images import derivative_names
+        first = MartialArtist.objects.create(first_name='A', last_name='One', image=self._jpeg())
+        MartialArtist.objects.create(first_name='B', last_name='Two', image=self._jpeg())
+        names, storage = derivative_names(first.image.name), first.image.storage
+        first.delete()
+        self.assertTrue(all(storage.exists(name) for name in names))
+
+    def test_normalize_photos_command_merges_duplicates(self):
+        """Existing unprocessed copies of one photo collapse into one hashed file"""
+        from io import StringIO
+        from django.core.files.storage import default_storage
+        from django.core.management import call_command
+        content = self._jpeg(size=(3000, 2000)).read()
+        for name in ('Isabella_Gomez.JPG', 'Isabella_Gomez_NDB1acH.JPG'):
+            default_storage.save(f'people/images/{name}', SimpleUploadedFile(name, content))
+            artist = MartialArtist.objects.create(first_name='Isabella', last_name='Gomez')
+            MartialArtist.objects.filter(pk=artist.pk).update(image=f'people/images/{name}')
+        out = StringIO()
+        call_command('normalize_photos', delete_originals=True, stdout=out)
+        self.assertIn('Normalized 2 photos', out.getvalue())
+        names = set(MartialArtist.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertFalse(default_storage.exists('people/images/Isabella_Gomez.JPG'))
+        self.assertTrue(default_storage.exists(names.pop()))
+
+    def test_normalize_photos_command_runs_once(self):
+        """A second run leaves photos normalized by the first run or on upload untouched"""
+        from io import StringIO
+        from django.core.files.storage import default_storage
+        from django.core.management import call_command
+        default_storage.save('people/images/Orig.JPG', SimpleUploadedFile('Orig.JPG', self._jpeg().read()))
+        legacy = MartialArtist.objects.create(first_name='Old', last_name='Photo')
+        MartialArtist.objects.filter(pk=legacy.pk).update(image='people/images/Orig.JPG')
+        uploaded = MartialArtist.objects.create(
+            first_name='New', last_name='Upload', image=SimpleUploadedFile('new.jpg', self._jpeg(size=(900, 600)).read())
+        )
+        call_command('normalize_photos', delete_originals=True, stdout=StringIO())
+        names = dict(MartialArtist.objects.values_list('pk', 'image'))
+        self.assertRegex(names[legacy.pk], r'^people/images/[0-9a-f]{32}\.jpg$')
+        self.assertEqual(names[uploaded.pk], uploaded.image.name)
+        out = StringIO()
+        call_command('normalize_photos', delete_originals=True, stdout=out)
+        self.assertIn('Normalized 0 photos', out.getvalue())
+        self.assertEqual(dict(MartialArtist.objects.values_list('pk', 'image')), names)
+
+
+class RosterTests(TestCase):
+    """Test cases for the staff roster in people.roster and people.views"""
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+        User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.client = Client()
+        self.client.login(username='staff', password='testpass123')
+        self.karate = Style.objects.create(title='Karate')
+        self.judo = Style.objects.create(title='Judo')
+        self.sponsor = Sponsor.objects.create(first_name='Pat', last_name='Parent')
+        for i in range(7):
+            artist = MartialArtist.objects.create(
+                first_name=f'First{i}', last_name=f'Last{i}', enrollment_date=date(2020, 1 + i, 1),
+                sponsor=self.sponsor if i < 2 else None,
+            )
+            artist.styles.add(self.karate if i % 2 == 0 else self.judo)
+        MartialArtist.objects.create(first_name='Old', last_name='Inactive', active=False)
+
+    def test_filters(self):
+        """Style, sponsor, enrollment range and active are applied in the database"""
+        from .roster import Roster
+
+        def names(**filters):
+            return [p.last_name for chunk in Roster(filters).chunks() for p in chunk]
+
+        self.assertEqual(names(style=self.karate), ['Last0', 'Last2', 'Last4', 'Last6'])
+        self.assertEqual(names(sponsor=self.sponsor), ['Last0', 'Last1'])
+        self.assertEqual(
+            names(enrolled_after=date(2020, 3, 1), enrolled_before=date(2020, 4, 1)), ['Last2', 'Last3']
+        )
+        self.assertEqual(names(active='0'), ['Inactive'])
+        self.assertEqual(len(names()), 8)
+        self.assertEqual(names(active='1', sort='-name')[:2], ['Last6', 'Last5'])
+
+    def test_page_is_keyset_paginated_with_few_queries(self):
+        """A page costs one row query plus one style query, loading only roster columns"""
+        from .roster import Roster
+        roster = Roster({'active': '1'}, per_page=3)
+        with self.assertNumQueries(2):
+            page = roster.page()
+            self.assertEqual([p.last_name for p in page], ['Last0', 'Last1', 'Last2'])
+            self.assertEqual(page.object_list[0].style_titles, ['Karate'])
+        self.assertEqual(page.object_list[0].get_deferred_fields() & {'notes', 'birthday', 'image'},
+                         {'notes', 'birthday', 'image'})
+        following = roster.page(after=page.next_cursor)
+        self.assertEqual([p.last_name for p in following], ['Last3', 'Last4', 'Last5'])
+
+    def test_staff_view_filters_and_paginates(self):
+        """The staff index renders the filtered roster and keeps filters in page links"""
+        response = self.client.get('/people/', {'style': self.judo.pk})
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode('utf-8')
+        self.assertIn('First1 Last1', content)
+        self.assertNotIn('First0 Last0', content)
+        self.assertNotIn('Old Inactive', content)
+        self.assertEqual(response.context['extra_query'], f'style={self.judo.pk}')
+
+    def test_csv_export_streams_every_row(self):
+        """?format=csv streams a header and one line per matching person"""
+        import csv
+        response = self.client.get('/people/', {'format': 'csv', 'active': ''})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(b''.join(response.streaming_content).decode('utf-8').splitlines()))
+        self.assertEqual(rows[0][0], 'Last name')
+        self.assertEqual(len(rows), 9)
+        self.assertIn(['Last1', 'First1', '', '', '2020-02-01', 'yes', 'Judo'], rows)
+
+    def test_streamed_html_contains_the_whole_roster(self):
+        """?format=all streams the page with every row and no pagination"""
+        response = self.client.get('/people/', {'format': 'all'})
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(content.count('<tr>'), 8)  # header + 7 active
+        self.assertIn('</html>', content)
+        self.assertNotIn('roster rows', content)
+
+
+class NameSearchTests(TestCase):
+    """Test cases for the indexed name search in people.search"""
+
+    def setUp(self):
+        for first, last in (('Isabella', 'Gómez'), ('George', 'Gomez'), ('Anne', 'Murdaugh-Tsotsos'),
+                            ('Larry', 'Cruz'), ('Gordon', 'Smith')):
+            MartialArtist.objects.create(first_name=first, last_name=last)
+
+    def test_name_keys_are_maintained_on_save(self):
+        """Keys are case-folded and accent-stripped, and follow renames"""
+        artist = MartialArtist.objects.get(first_name='Isabella')
+        self.assertEqual((artist.first_name_key, artist.last_name_key), ('isabella', 'gomez'))
+        artist.last_name = 'Núñez'
+        artist.save(update_fields=['last_name'])
+        artist.refresh_from_db()
+        self.assertEqual(artist.last_name_key, 'nunez')
+
+    def test_prefix_search_is_accent_insensitive_and_ranked(self):
+        """Full-word matches rank above partial prefixes"""
+        from .search import search
+        results = [str(p) for p in search(MartialArtist, 'gome')]
+        self.assertEqual(sorted(results), ['George Gomez', 'Isabella Gómez'])
+        self.assertEqual([str(p) for p in search(MartialArtist, 'GOMEZ isab')][0], 'Isabella Gómez')
+        self.assertEqual([str(p) for p in search(MartialArtist, 'murdaugh')], ['Anne Murdaugh-Tsotsos'])
+        self.assertEqual(search(MartialArtist, '   '), [])
+
+    def test_inner_words_of_compound_names_are_prefix_matched(self):
+        """Later words of a name are indexed and follow renames"""
+        from .search import search
+        self.assertEqual([str(p) for p in search(MartialArtist, 'tsots')], ['Anne Murdaugh-Tsotsos'])
+        anne = MartialArtist.objects.get(first_name='Anne')
+        anne.last_name = 'Murdaugh-Papadakis'
+        anne.save()
+        self.assertEqual(search(MartialArtist, 'tsotsos'), [])
+        self.assertEqual(list(anne.name_words.values_list('word', flat=True)), ['papadakis'])
+        with self.assertNumQueries(1):
+            anne.save(update_fields=['active'])
+
+    def test_typos_are_tolerated(self):
+        """A transposed letter still finds the person"""
+        from .search import search
+        self.assertIn('Larry Cruz', [str(p) for p in search(MartialArtist, 'Curz')])
+        self.assertEqual(str(search(MartialArtist, 'Smiht')[0]), 'Gordon Smith')
+
+    def test_typo_pass_skips_names_of_other_lengths(self):
+        """The typo pass reads only names about as long as the term, so a crowded initial still finds it"""
+        from . import search as name_search
+        MartialArtist.objects.filter(last_name='Cruz').delete()
+        MartialArtist.objects.bulk_create([
+            MartialArtist(first_name='Christopher', last_name=f'Abernathy{n}', first_name_key='christopher',
+                          last_name_key=f'abernathy{n}') for n in range(5)
+        ])
+        MartialArtist.objects.create(first_name='Larry', last_name='Cruz')
+        limit, name_search.CANDIDATE_LIMIT = name_search.CANDIDATE_LIMIT, 3
+        self.addCleanup(setattr, name_search, 'CANDIDATE_LIMIT', limit)
+        self.assertIn('Larry Cruz', [str(p) for p in name_search.search(MartialArtist, 'Curz')])
+
+    def test_admin_search_uses_index(self):
+        """Admin search filters through the ranked ids, inner name words included"""
+        from django.contrib.admin.sites import site
+        admin = site._registry[MartialArtist]
+        queryset, may_have_duplicates = admin.get_search_results(None, MartialArtist.objects.all(), 'gomez')
+        self.assertFalse(may_have_duplicates)
+        self.assertEqual(queryset.count(), 2)
+        queryset, _ = admin.get_search_results(None, MartialArtist.objects.all(), 'tsotsos')
+        self.assertEqual([str(p) for p in queryset], ['Anne Murdaugh-Tsotsos'])
+
+    def test_typeahead_endpoint(self):
+        """Staff get JSON matches; other users are sent to the login page"""
+        from django.contrib.auth.models import User
+        User.objects.create_user(username='member', password='testpass123')
+        User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.client.login(username='member', password='testpass123')
+        self.assertEqual(self.client.get('/people/search/', {'q': 'gom'}).status_code, 302)
+        self.client.login(username='staff', password='testpass123')
+        response = self.client.get('/people/search/', {'q': 'gom', 'limit': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertIn(response.json()['results'][0]['name'], ('George Gomez', 'Isabella Gómez'))
+
+    def test_link_command_matches_without_accents(self):
+        """link_user_to_martial_artist finds 'Gomez' for 'gómez' and suggests near misses"""
+        from io import StringIO
+        from django.contrib.auth.models import User
+        from django.core.management import call_command
+        user = User.objects.create_user(username='larry', password='testpass123')
+        out, err = StringIO(), StringIO()
+        call_command('link_user_to_martial_artist', 'larry', 'CRUZ', stdout=out, stderr=err)
+        self.assertEqual(MartialArtist.objects.get(user=user).first_name, 'Larry')
+        call_command('link_user_to_martial_artist', 'larry', 'Curz', stdout=out, stderr=err)
+        self.assertIn('Did you mean: Larry Cruz', err.getvalue())
+
+
+class BulkLinkingTests(TestCase):
+    """Test cases for bulk linking in people.linking"""
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+        self.kim = MartialArtist.objects.create(first_name='Kim', last_name='Kid', email='Kim@example.com')
+        self.lee = MartialArtist.objects.create(first_name='Lee', last_name='Núñez')
+        self.pat = MartialArtist.objects.create(first_name='Pat', last_name='Parent')
+        self.kim_user = User.objects.create_user(username='kimk', email='kim@example.com')
+        self.lee_user = User.objects.create_user(username='lee', first_name='Lee', last_name='Nunez')
+
+    def _call(self, *args):
+        from io import StringIO
+        from django.core.management import call_command
+        out, err = StringIO(), StringIO()
+        call_command('link_user_to_martial_artist', *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_auto_match_by_email_and_name(self):
+        """--auto links by email, then by accent-insensitive full name"""
+        with self.assertNumQueries(6):
+            self._call('--auto')
+        self.kim.refresh_from_db()
+        self.lee.refresh_from_db()
+        self.assertEqual(self.kim.user, self.kim_user)
+        self.assertEqual(self.lee.user, self.lee_user)
+
+    def test_csv_mapping_moves_existing_links(self):
+        """CSV rows link by id or name and move a user off its previous record"""
+        import os
+        import tempfile
+        self.kim.user = self.lee_user
+        self.kim.save()
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as fh:
+            fh.write(f'username,id,first_name,last_name\nlee,{self.pat.pk},,\nkimk,,kim,KID\nnobody,,,Kid\n')
+        self.addCleanup(os.remove, fh.name)
+        out, err = self._call('--csv', fh.name)
+        self.assertIn('user "nobody" does not exist', err)
+        self.assertEqual(MartialArtist.objects.get(user=self.lee_user), self.pat)
+        self.assertEqual(MartialArtist.objects.get(user=self.kim_user), self.kim)
+
+    def test_create_users_and_dry_run(self):
+        """--create-users makes accounts that log in with the reported password; --dry-run writes nothing"""
+        import csv
+        import os
+        import tempfile
+        from django.contrib.auth.models import User
+        out, _ = self._call('--auto', '--create-users', '--dry-run')
+        self.assertIn('Would create user "pat.parent"', out)
+        self.assertEqual(User.objects.count(), 2)
+        report = os.path.join(tempfile.mkdtemp(), 'passwords.csv')
+        self.addCleanup(os.remove, report)
+        self._call('--auto', '--create-users', '--passwords', report)
+        user = MartialArtist.objects.select_related('user').get(pk=self.pat.pk).user
+        self.assertEqual(user.username, 'pat.parent')
+        self.assertEqual(User.objects.count(), 3)
+        with open(report, newline='') as fh:
+            rows = list(csv.DictReader(fh))
+        self.assertEqual([row['username'] for row in rows], ['pat.parent'])
+        self.assertTrue(self.client.login(username='pat.parent', password=rows[0]['password']))
+
+
+class ProfileBackendTests(TestCase):
+    """Test cases for people.auth.ProfileBackend"""
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user(username='kim', password='testpass123')
+        self.artist = MartialArtist.objects.create(first_name='Kim', last_name='Kid', user=self.user)
+
+    def test_user_and_profile_cached_together(self):
+        """get_user loads the profile in the same query, then serves both from the cache"""
+        from .auth import ProfileBackend
+        with self.assertNumQueries(1):
+            user = ProfileBackend().get_user(self.user.pk)
+            self.assertEqual(user.martial_artist_profile, self.artist)
+        with self.assertNumQueries(0):
+            user = ProfileBackend().get_user(self.user.pk)
+            self.assertEqual(user.martial_artist_profile, self.artist)
+
+    def test_profile_changes_invalidate(self):
+        """Moving or removing the profile link drops the cached user"""
+        from .auth import ProfileBackend
+        backend = ProfileBackend()
+        backend.get_user(self.user.pk)
+        artist = MartialArtist.objects.get(pk=self.artist.pk)
+        artist.user = None
+        artist.save()
+        self.assertIsNone(getattr(backend.get_user(self.user.pk), 'martial_artist_profile', None))
+        other = MartialArtist.objects.create(first_name='Lee', last_name='Kid', user=self.user)
+        self.assertEqual(backend.get_user(self.user.pk).martial_artist_profile, other)
+
+    def test_logged_in_request_uses_cache(self):
+        """A logged-in page view after the first one skips the user and profile queries"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        self.client.login(username='kim', password='testpass123')
+        self.client.get('/people/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/people/')
+        self.assertEqual(response.context['single_profile'], self.artist)
+        self.assertFalse([q for q in queries if 'FROM "auth_user"' in q['sql'] or 'FROM "people_martialartist" ' in q['sql']])
+
+
+    def test_cache_holds_values_not_models(self):
+        """Entries are plain column values, rebuilt into a user with its profile"""
+        from django.contrib.auth.models import User
+        from .auth import ProfileBackend, _cache, user_cache_key
+        ProfileBackend().get_user(self.user.pk)
+        user_values, profile_values = _cache().get(user_cache_key(self.user.pk))
+        self.assertFalse([value for value in user_values + profile_values if isinstance(value, (User, MartialArtist))])
+        user = ProfileBackend().get_user(self.user.pk)
+        self.assertTrue(user.check_password('testpass123'))
+        self.assertIs(user.martial_artist_profile.user, user)
+
+    def test_sessions_from_model_backend_stay_valid(self):
+        """Sessions stored with ModelBackend's path are still accepted"""
+        from django.contrib.auth import BACKEND_SESSION_KEY
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], 'django.contrib.auth.backends.ModelBackend')
+        response = self.client.get('/people/')
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_check_warns_about_persistent_user_cache(self):
+        """people.W001 flags a file or database cache holding cached users"""
+        from .checks import check_user_cache
+        self.assertEqual(check_user_cache(None), [])
+        caches = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp'}}
+        with self.settings(CACHES=caches):
+            self.assertEqual([warning.id for warning in check_user_cache(None)], ['people.W001'])
+
+class RosterTransferTests(TestCase):
+    """Test cases for bulk import/export in people.transfer"""
+
+    CSV = (
+        'type,ref,first_name,last_name,sponsor,payment_plan,styles,enrollment_date,martial_artist,style,rank,award_date\n'
+        'sponsor,s1,Pat,Parent,,,,,,,,\n'
+        'martial_artist,m1,Kim,Kid,s1,Monthly,Karate;judo,2024-01-15,,,,\n'
+        'martial_artist,m2,Lee,Adult,,,Karate,,,,,\n'
+        'rank,,,,,,,,m1,Karate,White Belt,2024-02-01\n'
+        'rank,,,,,,,,m2,karate,white belt,2024-03-01\n'
+    )
+
+    def setUp(self):
+        import tempfile
+        from ranks.models import RankType
+        karate = Style.objects.create(title='Karate')
+        Style.objects.create(title='Judo')
+        PaymentPlan.objects.create(title='Monthly', amount=50)
+        RankType.objects.create(style=karate, title='White Belt', indicator='white')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+
+    def _file(self, name, content):
+        import os
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as fh:
+            fh.write(content)
+        return path
+
+    def test_import_resolves_references_in_few_queries(self):
+        """Records are bulk inserted with foreign keys resolved from lookup maps"""
+        from io import StringIO
+        from django.core.management import call_command
+        from ranks.models import Rank
+        out = StringIO()
+        # 3 lookup maps, savepoint, 4 inserts, current rank refresh (5 with its savepoint), release
+        with self.assertNumQueries(14):
+            call_command('import_roster', self._file('roster.csv', self.CSV), stdout=out)
+        self.assertIn('Imported 1 sponsor, 2 martial_artist, 2 rank', out.getvalue())
+        kid = MartialArtist.objects.get(first_name='Kim')
+        self.assertEqual(str(kid.sponsor), 'Pat Parent')
+        self.assertEqual(kid.payment_plan.title, 'Monthly')
+        self.assertEqual(sorted(s.title for s in kid.styles.all()), ['Judo', 'Karate'])
+        self.assertEqual(kid.last_name_key, 'kid')
+        self.assertEqual(Rank.objects.filter(rank_type__title='White Belt').count(), 2)
+
+    def test_import_without_bulk_insert_returning(self):
+        """Backends whose bulk_create sets no primary keys (MySQL) still link every record"""
+        from io import StringIO
+        from unittest import mock
+        from django.core.management import call_command
+        from django.db import connection
+        from ranks.models import Rank
+        csv = self.CSV + 'martial_artist,m3,Kim,Kid,,,Judo,,,,,\nrank,,,,,,,,m3,Karate,White Belt,2024-04-01\n'
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert',
+                               new_callable=mock.PropertyMock, return_value=False):
+            call_command('import_roster', self._file('roster.csv', csv), batch_size=2, stdout=StringIO())
+        kids = list(MartialArtist.objects.filter(first_name='Kim').order_by('pk'))
+        self.assertEqual(str(kids[0].sponsor), 'Pat Parent')
+        self.assertEqual([sorted(s.title for s in kid.styles.all()) for kid in kids], [['Judo', 'Karate'], ['Judo']])
+        self.assertEqual([kid.rank_set.get().award_date.isoformat() for kid in kids], ['2024-02-01', '2024-04-01'])
+        self.assertEqual(Rank.objects.count(), 3)
+
+    def test_import_stops_when_new_ids_are_ambiguous(self):
+        """Without returned ids, a row saved by someone else mid-batch aborts the import"""
+        from unittest import mock
+        from django.db import connection
+        from django.db.models import QuerySet
+        from .transfer import ImportConflict, SPONSOR_KEY, _insert
+        bulk_create = QuerySet.bulk_create
+
+        def racing_bulk_create(queryset, objs, *args, **kwargs):
+            if queryset.model is Sponsor:
+                Sponsor.objects.create(first_name='Pat', last_name='Parent')
+            return bulk_create(queryset, objs, *args, **kwargs)
+
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert',
+                               new_callable=mock.PropertyMock, return_value=False), \
+                mock.patch.object(QuerySet, 'bulk_create', racing_bulk_create):
+            with self.assertRaises(ImportConflict):
+                _insert(Sponsor, [Sponsor(first_name='Pat', last_name='Parent')], SPONSOR_KEY)
+
+    def test_dry_run_writes_nothing_and_reports_errors(self):
+        """--dry-run checks every record and reports each problem with its line"""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        bad = self.CSV + 'martial_artist,m3,No,Style,,,Boxing,,,,,\nrank,,,,,,,,m9,Karate,White Belt,2024-01-01\n'
+        err = StringIO()
+        with self.assertRaisesMessage(CommandError, '2 invalid record(s)'):
+            call_command('import_roster', self._file('bad.csv', bad), dry_run=True, stderr=err)
+        self.assertIn('line 7: unknown style "Boxing"', err.getvalue())
+        self.assertIn('line 8: unknown martial_artist ref "m9"', err.getvalue())
+        out = StringIO()
+        call_command('import_roster', self._file('good.csv', self.CSV), dry_run=True, stdout=out)
+        self.assertIn('Dry run: 1 sponsor, 2 martial_artist, 2 rank valid', out.getvalue())
+        self.assertFalse(MartialArtist.objects.exists())
+
+    def test_bad_record_rolls_back_the_whole_import(self):
+        """An error part way through leaves the database untouched"""
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        bad = self.CSV + 'rank,,,,,,,,m1,Karate,Black Belt,2024-01-01\n'
+        with self.assertRaisesMessage(CommandError, 'unknown rank "Black Belt"'):
+            call_command('import_roster', self._file('bad.csv', bad), batch_size=1)
+        self.assertFalse(MartialArtist.objects.exists())
+        self.assertFalse(Sponsor.objects.exists())
+
+    def test_export_round_trips_through_jsonl(self):
+        """export_roster output imports back into the same records"""
+        from io import StringIO
+        from django.core.management import call_command
+        from ranks.models import Rank
+        call_command('import_roster', self._file('roster.csv', self.CSV), stdout=StringIO())
+        path = self._file('roster.jsonl', '')
+        out = StringIO()
+        call_command('export_roster', path, stdout=out)
+        self.assertIn('Exported 5 records', out.getvalue())
+        MartialArtist.objects.all().delete()
+        Sponsor.objects.all().delete()
+        call_command('import_roster', path, stdout=StringIO())
+        self.assertEqual(MartialArtist.objects.count(), 2)
+        self.assertEqual(Rank.objects.count(), 2)
+        self.assertEqual(str(MartialArtist.objects.get(first_name='Kim').sponsor), 'Pat Parent')
+
+    def test_admin_export_action_and_import_view(self):
+        """The admin exports selected people and dry-runs uploads"""
+        from io import StringIO
+        from django.contrib.auth.models import User
+        from django.core.management import call_command
+        call_command('import_roster', self._file('roster.csv', self.CSV), stdout=StringIO())
+        User.objects.create_superuser(username='admin', password='testpass123', email='a@example.com')
+        self.client.login(username='admin', password='testpass123')
+        changelist = reverse('admin:people_martialartist_changelist')
+        kid = MartialArtist.objects.get(first_name='Kim')
+        response = self.client.post(changelist, {'action': 'export_roster_csv', '_selected_action': [kid.pk]})
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertIn('sponsor,', content)
+        self.assertIn('Kim', content)
+        self.assertNotIn('Lee', content)
+        upload = SimpleUploadedFile('roster.csv', self.CSV.encode())
+        response = self.client.post(reverse('admin:people_martialartist_import'), {'file': upload, 'dry_run': 'on'})
+        self.assertContains(response, 'No problems found')
@@ -0,0 +1,353 @@
+"""
+Bulk import and export of sponsors, martial artists and ranks.
+
+Files are CSV or JSON Lines. Every record has a `type` (sponsor,
+martial_artist or rank); CSV files use the union of the columns below. Records
+refer to each other by `ref`, any string unique within the file (the export
+uses primary keys):
+
+  sponsor         ref, first_name, middle_name, last_name, email, is_parent,
+                  street, city, state, zip, telephone
+  martial_artist  ref, first_name, middle_name, last_name, email, is_female,
+                  birthday, enrollment_date, active, sponsor (a sponsor ref),
+                  payment_plan (title), styles (titles separated by ';'), notes
+  rank            martial_artist (a martial_artist ref), style, rank (rank
+                  type title), award_date, test_date, tested, notes
+
+The importer streams the file, validates each record against lookup maps of
+payment plans, styles and rank types loaded once up front, and writes in
+batches with bulk_create inside one transaction, so a bad file writes nothing.
+A dry run validates the whole file without writing. On backends whose
+bulk_create does not return primary keys (MySQL), the new sponsors and
+martial artists are read back after each batch and matched to the records by
+their names, email and birthday.
+"""
+import csv
+import datetime
+import json
+import time
+from collections import Counter, defaultdict, deque
+
+from django.db import connections, transaction
+from django.db.models import Max
+
+from pages.streaming import Echo
+from ranks.current import refresh as refresh_current_ranks
+from ranks.models import Rank, RankType
+from styles.models import Style
+from tuition.models import PaymentPlan
+
+from .models import MartialArtist, Sponsor
+
+SPONSOR_FIELDS = ('ref', 'first_name', 'middle_name', 'last_name', 'email', 'is_parent',
+                  'street', 'city', 'state', 'zip', 'telephone')
+MARTIAL_ARTIST_FIELDS = ('ref', 'first_name', 'middle_name', 'last_name', 'email', 'is_female', 'birthday',
+                         'enrollment_date', 'active', 'sponsor', 'payment_plan', 'styles', 'notes')
+RANK_FIELDS = ('martial_artist', 'style', 'rank', 'award_date', 'test_date', 'tested', 'notes')
+CSV_COLUMNS = ('type',) + tuple(dict.fromkeys(SPONSOR_FIELDS + MARTIAL_ARTIST_FIELDS + RANK_FIELDS))
+
+TYPE_ORDER = ('sponsor', 'martial_artist', 'rank')
+
+SPONSOR_KEY = ('first_name', 'middle_name', 'last_name', 'email')
+MARTIAL_ARTIST_KEY = ('first_name', 'middle_name', 'last_name', 'email', 'birthday')
+
+
+class RecordError(Exception):
+    """A record that cannot be imported; carries the line number."""
+
+    def __init__(self, line, message):
+        super().__init__(f'line {line}: {message}')
+        self.line = line
+
+
+class ImportConflict(Exception):
+    """New rows could not be told apart from rows written by someone else."""
+
+
+def _key(value):
+    return (value or '').strip().casefold()
+
+
+def _text(value):
+    value = (value or '').strip() if isinstance(value, str) else value
+    return value or None
+
+
+def _bool(value, default):
+    if value in (None, ''):
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().casefold() in ('1', 'true', 'yes', 'y')
+
+
+def _date(value, line, field, required=False):
+    if value in (None, ''):
+        if required:
+            raise RecordError(line, f'{field} is required')
+        return None
+    try:
+        return datetime.date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise RecordError(line, f'{field} "{value}" is not a YYYY-MM-DD date')
+
+
+def read_records(fh, fmt):
+    """Yield (line number, record dict) from a CSV or JSONL text stream."""
+    if fmt == 'csv':
+        reader = csv.DictReader(fh)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line, text in enumerate(fh, start=1):
+            if text.strip():
+                try:
+                    yield line, json.loads(text)
+                except ValueError:
+                    raise RecordError(line, 'not valid JSON')
+
+
+class RosterImporter:
+    """
+    Import records in batches. After run(), `counts` holds the number of
+    records per type and `errors` the problems found.
+    """
+
+    def __init__(self, batch_size=500, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.counts = defaultdict(int)
+        self.errors = []
+        self.elapsed = 0.0
+        self.plans = {_key(title): pk for pk, title in PaymentPlan.objects.values_list('pk', 'title')}
+        self.styles = {_key(title): pk for pk, title in Style.objects.values_list('pk', 'title')}
+        self.rank_types = {}
+        self.rank_type_styles = {}
+        for pk, style_id, style, title in RankType.objects.order_by().values_list(
+            'pk', 'style_id', 'style__title', 'title'
+        ):
+            self.rank_types[_key(style), _key(title)] = pk
+            self.rank_type_styles[pk] = style_id
+        # file ref -> primary key (or True in a dry run)
+        self.sponsor_refs = {}
+        self.artist_refs = {}
+        self.pending = {kind: [] for kind in TYPE_ORDER}
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def run(self, records):
+        """Import (line, record) pairs. Raises RecordError on the first bad record unless dry_run."""
+        started = time.monotonic()
+        with transaction.atomic():
+            for line, record in records:
+                try:
+                    self.add(line, record)
+                except RecordError as exc:
+                    if not self.dry_run:
+                        raise
+                    self.errors.append(exc)
+            self.flush()
+            if not self.dry_run and self.total:
+                from pages.dashboard import invalidate_dashboards
+                invalidate_dashboards()
+        self.elapsed = time.monotonic() - started
+
+    def add(self, line, record):
+        kind = record.get('type')
+        if kind not in TYPE_ORDER:
+            raise RecordError(line, f'unknown type "{kind}"')
+        build = getattr(self, f'_build_{kind}')
+        self.pending[kind].append(build(line, record))
+        self.counts[kind] += 1
+        if len(self.pending[kind]) >= self.batch_size:
+            self.flush(kind)
+
+    def flush(self, upto='rank'):
+        """Write pending records of `upto` and of every type it can refer to."""
+        for kind in TYPE_ORDER[:TYPE_ORDER.index(upto) + 1]:
+            batch, self.pending[kind] = self.pending[kind], []
+            if batch and not self.dry_run:
+                getattr(self, f'_write_{kind}')(batch)
+
+    def _names(self, line, record):
+        names = {field: _text(record.get(field)) for field in ('first_name', 'middle_name', 'last_name', 'email')}
+        if not names['first_name'] or not names['last_name']:
+            raise RecordError(line, 'first_name and last_name are required')
+        return names
+
+    def _ref(self, line, record, refs):
+        ref = _text(str(record.get('ref') or ''))
+        if ref is not None and ref in refs:
+            raise RecordError(line, f'duplicate ref "{ref}"')
+        return ref
+
+    def _build_sponsor(self, line, record):
+        ref = self._ref(line, record, self.sponsor_refs)
+        sponsor = Sponsor(
+            isParent=_bool(record.get('is_parent'), True),
+            **self._names(line, record),
+            **{field: _text(record.get(field)) for field in ('street', 'city', 'state', 'zip', 'telephone')},
+        )
+        sponsor.refresh_name_keys()
+        if ref is not None:
+            self.sponsor_refs[ref] = True
+        return ref, sponsor
+
+    def _build_martial_artist(self, line, record):
+        ref = self._ref(line, record, self.artist_refs)
+        sponsor_ref = _text(str(record.get('sponsor') or ''))
+        if sponsor_ref is not None and sponsor_ref not in self.sponsor_refs:
+            raise RecordError(line, f'unknown sponsor ref "{sponsor_ref}"')
+        plan = _text(record.get('payment_plan'))
+        if plan is not None and _key(plan) not in self.plans:
+            raise RecordError(line, f'unknown payment plan "{plan}"')
+        style_ids = []
+        for title in (record.get('styles') or '').split(';'):
+            if title.strip():
+                if _key(title) not in self.styles:
+                    raise RecordError(line, f'unknown style "{title.strip()}"')
+                style_ids.append(self.styles[_key(title)])
+        artist = MartialArtist(
+            isFemale=_bool(record.get('is_female'), False),
+            active=_bool(record.get('active'), True),
+            birthday=_date(record.get('birthday'), line, 'birthday'),
+            enrollment_date=_date(record.get('enrollment_date'), line, 'enrollment_date'),
+            payment_plan_id=self.plans.get(_key(plan)) if plan else None,
+            notes=_text(record.get('notes')),
+            **self._names(line, record),
+        )
+        artist.refresh_name_keys()
+        if ref is not None:
+            self.artist_refs[ref] = True
+        return ref, artist, sponsor_ref, style_ids
+
+    def _build_rank(self, line, record):
+        artist_ref = _text(str(record.get('martial_artist') or ''))
+        if artist_ref is None or artist_ref not in self.artist_refs:
+            raise RecordError(line, f'unknown martial_artist ref "{artist_ref}"')
+        rank_type = self.rank_types.get((_key(record.get('style')), _key(record.get('rank'))))
+        if rank_type is None:
+            raise RecordError(line, f'unknown rank "{record.get("rank")}" in style "{record.get("style")}"')
+        rank = Rank(
+            rank_type_id=rank_type,
+            award_date=_date(record.get('award_date'), line, 'award_date', required=True),
+            test_date=_date(record.get('test_date'), line, 'test_date'),
+            tested=_bool(record.get('tested'), True),
+            notes=_text(record.get('notes')),
+        )
+        return artist_ref, rank
+
+    def _write_sponsor(self, batch):
+        _insert(Sponsor, [sponsor for _, sponsor in batch], SPONSOR_KEY)
+        Sponsor.create_name_words([sponsor for _, sponsor in batch])
+        for ref, sponsor in batch:
+            if ref is not None:
+                self.sponsor_refs[ref] = sponsor.pk
+
+    def _write_martial_artist(self, batch):
+        for _, artist, sponsor_ref, _ in batch:
+            artist.sponsor_id = self.sponsor_refs[sponsor_ref] if sponsor_ref else None
+        _insert(MartialArtist, [artist for _, artist, _, _ in batch], MARTIAL_ARTIST_KEY)
+        MartialArtist.create_name_words([artist for _, artist, _, _ in batch])
+        through = MartialArtist.styles.through
+        through.objects.bulk_create([
+            through(martialartist_id=artist.pk, style_id=style_id)
+            for _, artist, _, style_ids in batch for style_id in style_ids
+        ])
+        for ref, artist, _, _ in batch:
+            if ref is not None:
+                self.artist_refs[ref] = artist.pk
+
+    def _write_rank(self, batch):
+        for artist_ref, rank in batch:
+            rank.martial_artist_id = self.artist_refs[artist_ref]
+        Rank.objects.bulk_create([rank for _, rank in batch])
+        # bulk_create sends no signals, so update current ranks for the batch here
+        refresh_current_ranks(
+            {self.rank_type_styles[rank.rank_type_id] for _, rank in batch},
+            {rank.martial_artist_id for _, rank in batch},
+        )
+
+
+def _insert(model, objs, natural_key):
+    """bulk_create objs and make sure each one has its primary key set."""
+    queryset = model.objects.all()
+    if connections[queryset.db].features.can_return_rows_from_bulk_insert:
+        queryset.bulk_create(objs)
+        return
+    # Rows above the previous maximum are this batch; pair them with the
+    # objects by natural key in insert order (ids rise within one insert).
+    # Any other row there, e.g. one saved concurrently, could be paired with
+    # the wrong record, so the import stops instead.
+    last = queryset.aggregate(last=Max('pk'))['last'] or 0
+    queryset.bulk_create(objs)
+    keys = [tuple(getattr(obj, field) for field in natural_key) for obj in objs]
+    rows = list(queryset.filter(pk__gt=last).order_by('pk').values_list('pk', *natural_key))
+    if len(rows) != len(objs) or Counter(tuple(key) for _, *key in rows) != Counter(keys):
+        raise ImportConflict(
+            f'{len(rows)} new {model._meta.verbose_name_plural} found for a batch of {len(objs)}; '
+            'were records added while importing?'
+        )
+    pks = defaultdict(deque)
+    for pk, *key in rows:
+        pks[tuple(key)].append(pk)
+    for obj, key in zip(objs, keys):
+        obj.pk = pks[key].popleft()
+
+
+def _iso(value):
+    return value.isoformat() if value else ''
+
+
+def export_records(artists, chunk_size=1000):
+    """
+    Yield record dicts for the given MartialArtist queryset: their sponsors
+    first, then the martial artists, then their ranks, reading in chunks.
+    """
+    sponsor_ids = artists.exclude(sponsor=None).values('sponsor_id')
+    for sponsor in Sponsor.objects.filter(pk__in=sponsor_ids).order_by('pk').iterator(chunk_size=chunk_size):
+        yield {
+            'type': 'sponsor', 'ref': sponsor.pk, 'first_name': sponsor.first_name,
+            'middle_name': sponsor.middle_name or '', 'last_name': sponsor.last_name, 'email': sponsor.email or '',
+            'is_parent': sponsor.isParent, 'street': sponsor.street or '', 'city': sponsor.city or '',
+            'state': sponsor.state or '', 'zip': sponsor.zip or '', 'telephone': sponsor.telephone or '',
+        }
+    queryset = artists.select_related('payment_plan').prefetch_related('styles').order_by('pk')
+    for artist in queryset.iterator(chunk_size=chunk_size):
+        yield {
+            'type': 'martial_artist', 'ref': artist.pk, 'first_name': artist.first_name,
+            'middle_name': artist.middle_name or '', 'last_name': artist.last_name, 'email': artist.email or '',
+            'is_female': artist.isFemale, 'birthday': _iso(artist.birthday),
+            'enrollment_date': _iso(artist.enrollment_date), 'active': artist.active,
+            'sponsor': artist.sponsor_id or '', 'payment_plan': artist.payment_plan.title if artist.payment_plan else '',
+            'styles': ';'.join(style.title for style in artist.styles.all()), 'notes': artist.notes or '',
+        }
+    ranks = Rank.objects.filter(martial_artist__in=artists.values('pk')).select_related('rank_type__style')
+    for rank in ranks.order_by('martial_artist_id', 'award_date', 'pk').iterator(chunk_size=chunk_size):
+        yield {
+            'type': 'rank', 'martial_artist': rank.martial_artist_id, 'style': rank.rank_type.style.title,
+            'rank': rank.rank_type.title, 'award_date': _iso(rank.award_date), 'test_date': _iso(rank.test_date),
+            'tested': rank.tested, 'notes': rank.notes or '',
+        }
+
+
+def encode_records(records, fmt):
+    """Yield the records as lines of CSV or JSONL text."""
+    if fmt == 'csv':
+        writer = csv.DictWriter(Echo(), fieldnames=CSV_COLUMNS, extrasaction='ignore')
+        yield writer.writeheader()
+        for record in records:
+            yield writer.writerow(record)
+    else:
+        for record in records:
+            yield json.dumps(record) + '\n'
+
+
+def format_for(filename, default='csv'):
+    if filename and filename.lower().endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    if filename and filename.lower().endswith('.csv'):
+        return 'csv'
+    return default
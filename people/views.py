@@ -1,26 +1,32 @@
+import csv
+
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.template.loader import get_template, render_to_string
+from django.utils.http import urlencode
+from django.utils.safestring import mark_safe
+
+from pages.streaming import Echo
 
-from .models import MartialArtist
+from .forms import RosterFilterForm
+from .models import MartialArtist, Sponsor
+from .roster import CSV_HEADER, Roster, csv_row
+from .search import search
+
+ROW_MARKER = mark_safe('<!-- roster rows -->')
 
 
 @login_required(login_url='/login/')
 def index(request):
     """
     Show the logged-in user's martial artist profile when linked.
-    Staff without a linked profile see the full list of active martial artists.
+    Staff without a linked profile get the filterable roster.
     """
     martial_artist = getattr(request.user, 'martial_artist_profile', None)
     if request.user.is_staff and martial_artist is None:
-        people = MartialArtist.objects.filter(active=True).select_related(
-            'sponsor', 'payment_plan'
-        ).prefetch_related('styles').order_by('last_name', 'first_name')
-        scope_message = 'All active martial artists (staff view).'
-        return render(request, 'people/index.html', {
-            'people': people,
-            'scope_message': scope_message,
-            'single_profile': None,
-        })
+        return roster(request)
     elif martial_artist is not None:
         scope_message = 'Your profile.'
         return render(request, 'people/index.html', {
@@ -37,3 +43,81 @@ def index(request):
             ),
             'single_profile': None,
         })
+
+
+def roster(request):
+    """
+    Staff roster, filtered and sorted in the database and keyset-paginated.
+    ?format=all streams every matching row as HTML and ?format=csv as CSV.
+    """
+    filter_form = RosterFilterForm(request.GET)
+    filters = filter_form.cleaned_data if filter_form.is_valid() else {'active': '1'}
+    people_roster = Roster(filters)
+    extra_query = urlencode([
+        (key, value) for key, value in request.GET.items() if key not in ('after', 'before', 'format')
+    ])
+    context = {
+        'roster': True,
+        'filter_form': filter_form,
+        'extra_query': extra_query,
+        'scope_message': 'Martial artists (staff view).',
+        'single_profile': None,
+    }
+
+    output = request.GET.get('format')
+    if output == 'csv':
+        return _stream_csv(people_roster)
+    if output == 'all':
+        return _stream_html(request, people_roster, context)
+
+    page = people_roster.page(after=request.GET.get('after'), before=request.GET.get('before'))
+    context.update({'people': page.object_list, 'page': page})
+    return render(request, 'people/index.html', context)
+
+
+def _stream_csv(people_roster):
+    writer = csv.writer(Echo())
+
+    def rows():
+        yield writer.writerow(CSV_HEADER)
+        for chunk in people_roster.chunks():
+            for person in chunk:
+                yield writer.writerow(csv_row(person))
+
+    response = StreamingHttpResponse(rows(), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="roster.csv"'
+    return response
+
+
+def _stream_html(request, people_roster, context):
+    """Render the page once around a marker, then stream table rows chunk by chunk."""
+    head, tail = render_to_string(
+        'people/index.html', {**context, 'row_marker': ROW_MARKER}, request
+    ).split(ROW_MARKER)
+    rows_template = get_template('people/roster_rows.html')
+
+    def parts():
+        yield head
+        for chunk in people_roster.chunks():
+            yield rows_template.render({'people': chunk})
+        yield tail
+
+    return StreamingHttpResponse(parts(), content_type='text/html; charset=utf-8')
+
+
+TYPEAHEAD_MODELS = {'martialartist': MartialArtist, 'sponsor': Sponsor}
+
+
+@staff_member_required(login_url='/login/')
+def name_search(request):
+    """
+    Typeahead JSON for staff: ?q=gomez&type=martialartist|sponsor&limit=10
+    returns the best name matches, typo-tolerant.
+    """
+    model = TYPEAHEAD_MODELS.get(request.GET.get('type', 'martialartist'), MartialArtist)
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 10)), 50))
+    except ValueError:
+        limit = 10
+    results = [{'id': person.pk, 'name': str(person)} for person in search(model, request.GET.get('q', ''), limit)]
+    return JsonResponse({'results': results})
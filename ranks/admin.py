@@ -1,10 +1,23 @@
 from django.contrib import admin
 from adminsortable2.admin import SortableAdminMixin
+from . import current, ladders
+from .forms import RankTypeChoiceField
 from .models import RankType
 from .models import Rank
 
+
+class RankTypeFieldMixin:
+    """Use the registry-backed rank type select (no query per row or per option)."""
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'rank_type':
+            kwargs['form_class'] = RankTypeChoiceField
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
 @admin.register(RankType)
 class RankTypeAdmin(SortableAdminMixin, admin.ModelAdmin):
+    list_select_related = ['style']
     list_display = ['ordinal', 'style', 'title', 'indicator', 'time_in_grade', 'time_in_style', 'test_required']
     list_filter = ['test_required', 'style__title', 'indicator']
     list_display_links = ['style', 'title', 'indicator']
@@ -20,8 +33,25 @@ class RankTypeAdmin(SortableAdminMixin, admin.ModelAdmin):
     def place(self, obj):
         return obj.ordinal
 
+    def _update_order(self, updated_items, extra_model_filters):
+        # Drag-and-drop reordering is a bulk_update, which sends no signals
+        updated = super()._update_order(updated_items, extra_model_filters)
+        ladders.invalidate()
+        moved = RankType.objects.filter(pk__in=[item[0] for item in updated_items])
+        current.refresh(set(moved.values_list('style_id', flat=True)))
+        return updated
+
+    def _bulk_move(self, request, queryset, method):
+        # The "move to page" actions shift ordinals with queryset.update(); like _update_order,
+        # don't depend on adminsortable2 sending post_save for every shifted row
+        styles = set(queryset.values_list('style_id', flat=True))
+        super()._bulk_move(request, queryset, method)
+        ladders.invalidate()
+        current.refresh(styles)
+
 @admin.register(Rank)
-class RankAdmin(admin.ModelAdmin):
+class RankAdmin(RankTypeFieldMixin, admin.ModelAdmin):
+    list_select_related = ['martial_artist', 'rank_type__style']
     list_display = ['martial_artist', 'rank_type', 'test_date', 'award_date', 'tested']
     list_filter = ['martial_artist', 'award_date', 'tested']
     list_display_links = ['martial_artist', 'rank_type']
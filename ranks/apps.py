@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class RanksConfig(AppConfig):
     name = 'ranks'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,61 @@
+"""
+Maintenance of CurrentRank, each martial artist's highest rank per style.
+
+ranks.signals calls refresh() inside the same transaction whenever a Rank is
+added, changed or deleted, or a RankType moves within or between styles. Bulk
+writes that skip signals (imports, grading-day promotions) call refresh() for
+the students and styles they touched. `manage.py rebuild_current_ranks`
+recomputes the whole table, e.g. after reordering rank types in the admin.
+"""
+from django.db import transaction
+
+from .models import CurrentRank, Rank
+
+RANK_COLUMNS = ('martial_artist_id', 'rank_type__style_id', 'rank_type_id', 'rank_type__ordinal', 'award_date')
+
+
+def best_ranks(rows):
+    """
+    {(martial artist id, style id): (rank type id, award date)} from
+    RANK_COLUMNS rows, keeping the highest ordinal, then the latest award.
+    """
+    best = {}
+    for artist_id, style_id, rank_type_id, ordinal, award_date in rows:
+        key = (artist_id, style_id)
+        if key not in best or (ordinal, award_date) > best[key][0]:
+            best[key] = ((ordinal, award_date), rank_type_id, award_date)
+    return {key: (rank_type_id, award_date) for key, (_, rank_type_id, award_date) in best.items()}
+
+
+def _build(best):
+    return [
+        CurrentRank(martial_artist_id=artist_id, style_id=style_id, rank_type_id=rank_type_id, award_date=award_date)
+        for (artist_id, style_id), (rank_type_id, award_date) in best.items()
+    ]
+
+
+def refresh(style_ids, artist_ids=None):
+    """Recompute current ranks in style_ids for artist_ids (all artists when None)."""
+    style_ids = {pk for pk in style_ids if pk is not None}
+    if artist_ids is not None:
+        artist_ids = {pk for pk in artist_ids if pk is not None}
+    if not style_ids or artist_ids == set():
+        return
+    ranks = Rank.objects.filter(rank_type__style_id__in=style_ids)
+    current = CurrentRank.objects.filter(style_id__in=style_ids)
+    if artist_ids is not None:
+        ranks = ranks.filter(martial_artist_id__in=artist_ids)
+        current = current.filter(martial_artist_id__in=artist_ids)
+    with transaction.atomic():
+        best = best_ranks(ranks.values_list(*RANK_COLUMNS))
+        current.delete()
+        CurrentRank.objects.bulk_create(_build(best))
+
+
+def rebuild(batch_size=1000):
+    """Recompute the whole table; returns the number of rows written."""
+    with transaction.atomic():
+        best = best_ranks(Rank.objects.values_list(*RANK_COLUMNS).iterator(chunk_size=batch_size))
+        CurrentRank.objects.all().delete()
+        CurrentRank.objects.bulk_create(_build(best), batch_size=batch_size)
+    return len(best)
@@ -0,0 +1,113 @@
+"""
+Promotion eligibility from RankType.time_in_grade, time_in_style and
+test_required.
+
+The requirements are read from the rank being worked towards and counted in
+months: a student may test for a rank once they have held their current rank
+for its time_in_grade and trained in the style for its time_in_style. Time in
+style runs from the first rank awarded in the style, or from the enrollment
+date for students with no rank in it yet.
+
+compute() takes the rank ladders from the registry (ranks.ladders) and loads
+students, their styles and their awards in three queries, whatever the number
+of students, working everything else out in memory.
+"""
+import calendar
+import datetime
+from collections import defaultdict
+
+from django.utils import timezone
+
+from people.models import MartialArtist
+
+from . import ladders as rank_ladders
+from .models import Rank
+
+
+def add_months(date, months):
+    """date plus whole months, clamped to the end of shorter months."""
+    month = date.month - 1 + months
+    year, month = date.year + month // 12, month % 12 + 1
+    return date.replace(year=year, month=month, day=min(date.day, calendar.monthrange(year, month)[1]))
+
+
+class Eligibility:
+    """Where one student stands in one style."""
+
+    def __init__(self, martial_artist, style, current, awarded, next_rank, eligible_on):
+        self.martial_artist = martial_artist
+        self.style = style
+        self.current = current
+        self.awarded = awarded
+        self.next_rank = next_rank
+        self.eligible_on = eligible_on
+
+    @property
+    def test_required(self):
+        return self.next_rank is not None and self.next_rank.test_required
+
+    def is_ready(self, as_of):
+        return self.next_rank is not None and self.eligible_on is not None and self.eligible_on <= as_of
+
+
+def compute(artists=None, style=None):
+    """
+    Eligibility for every (student, style) pair: each style a student is
+    enrolled in or holds a rank in. `artists` defaults to active students.
+    """
+    if artists is None:
+        artists = MartialArtist.objects.filter(active=True)
+    artist_ids = artists.values('pk')
+    artists = {
+        artist.pk: artist
+        for artist in artists.only('pk', 'first_name', 'middle_name', 'last_name', 'enrollment_date').order_by()
+    }
+    ladders = rank_ladders.ladders()
+    if style is not None:
+        ladders = {style.pk: ladders[style.pk]} if style.pk in ladders else {}
+    position = {
+        rank_type.pk: (style_id, index)
+        for style_id, ladder in ladders.items() for index, rank_type in enumerate(ladder)
+    }
+
+    pairs = defaultdict(lambda: {'first': None, 'current': None, 'awarded': None})
+    through = MartialArtist.styles.through.objects.filter(martialartist_id__in=artist_ids, style_id__in=list(ladders))
+    for artist_id, style_id in through.values_list('martialartist_id', 'style_id'):
+        pairs[artist_id, style_id]
+    ranks = Rank.objects.filter(martial_artist_id__in=artist_ids, rank_type_id__in=list(position))
+    for artist_id, rank_type_id, award_date in ranks.values_list(
+        'martial_artist_id', 'rank_type_id', 'award_date'
+    ).iterator():
+        style_id, index = position[rank_type_id]
+        state = pairs[artist_id, style_id]
+        if state['first'] is None or award_date < state['first']:
+            state['first'] = award_date
+        if state['current'] is None or (index, award_date) > (state['current'], state['awarded']):
+            state['current'], state['awarded'] = index, award_date
+
+    results = []
+    for (artist_id, style_id), state in pairs.items():
+        artist, ladder = artists[artist_id], ladders[style_id]
+        current = ladder[state['current']] if state['current'] is not None else None
+        next_index = state['current'] + 1 if state['current'] is not None else 0
+        next_rank = ladder[next_index] if next_index < len(ladder) else None
+        eligible_on = None
+        if next_rank is not None:
+            grade_start = state['awarded'] or artist.enrollment_date
+            style_start = state['first'] or artist.enrollment_date
+            dates = [add_months(start, months or 0) for start, months in (
+                (grade_start, next_rank.time_in_grade), (style_start, next_rank.time_in_style),
+            ) if start is not None]
+            eligible_on = max(dates) if dates else None
+        results.append(Eligibility(artist, ladder[0].style, current, state['awarded'], next_rank, eligible_on))
+    results.sort(key=lambda item: (item.style.title, item.martial_artist.last_name, item.martial_artist.first_name))
+    return results
+
+
+def ready_to_test(as_of=None, within_days=0, style=None, artists=None):
+    """Students who can move up by as_of (+ within_days), soonest first."""
+    as_of = as_of or timezone.localdate()
+    horizon = as_of + datetime.timedelta(days=within_days)
+    ready = [item for item in compute(artists, style) if item.is_ready(horizon)]
+    ready.sort(key=lambda item: (item.eligible_on, item.style.title, item.martial_artist.last_name))
+    return ready
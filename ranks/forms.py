@@ -0,0 +1,64 @@
+from django import forms
+from django.core.exceptions import ValidationError
+
+from styles.models import Style
+
+from . import ladders
+from .models import RankType
+
+
+class RankTypeChoiceField(forms.ModelChoiceField):
+    """
+    Rank type select grouped by style, built from the ladder registry
+    (ranks.ladders), so rendering and validating it runs no queries.
+    """
+
+    def __init__(self, queryset=None, **kwargs):
+        super().__init__(queryset if queryset is not None else RankType.objects.all(), **kwargs)
+
+    def _get_choices(self):
+        if hasattr(self, '_choices'):
+            return self._choices
+        empty = [('', self.empty_label)] if self.empty_label is not None else []
+        return empty + ladders.choices()
+
+    choices = property(_get_choices, forms.ChoiceField.choices.fset)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        rank_type = ladders.get(value.pk if isinstance(value, RankType) else value)
+        if rank_type is None:
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value})
+        return rank_type
+
+
+class ReadyToTestForm(forms.Form):
+    """Filters for the staff "ready to test" report (ranks.eligibility)."""
+
+    style = forms.ModelChoiceField(queryset=Style.objects.order_by('title'), required=False, empty_label='Any style')
+    within_days = forms.IntegerField(
+        min_value=0, max_value=366, required=False, label='Or within (days)',
+        widget=forms.NumberInput(attrs={'placeholder': 'Within days'}),
+    )
+
+
+class PromotionForm(forms.Form):
+    """Style and dates for a grading day (ranks.promotions)."""
+
+    style = forms.ModelChoiceField(queryset=Style.objects.order_by('title'), empty_label='Choose a style')
+    test_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    award_date = forms.DateField(
+        required=False, widget=forms.DateInput(attrs={'type': 'date'}), help_text='Defaults to the test date.'
+    )
+    # Unticked by default, so the candidate list (a GET) starts out as tested promotions
+    without_test = forms.BooleanField(required=False, label='Awarded without a test')
+    notes = forms.CharField(required=False, widget=forms.TextInput(attrs={'placeholder': 'Notes'}))
+
+
+class RankHistoryFilterForm(forms.Form):
+    """Filters for the rank history (ranks.history)."""
+
+    style = forms.ModelChoiceField(queryset=Style.objects.order_by('title'), required=False, empty_label='Any style')
+    awarded_after = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    awarded_before = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
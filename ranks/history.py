@@ -0,0 +1,113 @@
+"""
+Rank history: each student's progression, with the time spent in the
+previous grade before every award.
+
+Students are keyset-paginated by name (pages.pagination), so a page is one
+query for the students and one for their ranks. The ranks query computes the
+previous award date in the same style with a LAG() window, ordered like the
+ladder (award date, then ordinal). The window is evaluated over each
+student's whole history in the style; the award date range is applied
+afterwards, so the first rank in range still knows how long the grade before
+it was held.
+"""
+from collections import defaultdict
+
+from django.db.models import Exists, F, OuterRef, Window
+from django.db.models.functions import Lag
+
+from pages.pagination import KeysetPaginator
+from people.models import MartialArtist
+
+from .models import Rank
+
+STUDENT_KEYS = ('last_name', 'first_name', 'id')
+
+
+class History:
+    """
+    Rank history described by `filters` (style, awarded_after, awarded_before,
+    all optional), limited to `artists` when given.
+    """
+
+    def __init__(self, filters=None, artists=None, per_page=25):
+        self.filters = filters or {}
+        self.artists = artists
+        self.per_page = per_page
+
+    def ranks(self, windowed=False):
+        ranks = Rank.objects.all()
+        if self.filters.get('style'):
+            ranks = ranks.filter(rank_type__style=self.filters['style'])
+        if windowed:
+            return ranks
+        if self.filters.get('awarded_after'):
+            ranks = ranks.filter(award_date__gte=self.filters['awarded_after'])
+        if self.filters.get('awarded_before'):
+            ranks = ranks.filter(award_date__lte=self.filters['awarded_before'])
+        return ranks
+
+    def students(self):
+        students = self.artists if self.artists is not None else MartialArtist.objects.all()
+        students = students.filter(Exists(self.ranks().filter(martial_artist=OuterRef('pk'))))
+        return students.only('id', 'first_name', 'middle_name', 'last_name')
+
+    def paginator(self, per_page=None):
+        return KeysetPaginator(self.students(), STUDENT_KEYS, per_page or self.per_page)
+
+    def page(self, after=None, before=None):
+        page = self.paginator().page(after=after, before=before)
+        attach_timelines(page.object_list, self)
+        return page
+
+    def chunks(self, size=500):
+        for students in self.paginator(size).chunks():
+            attach_timelines(students, self)
+            yield students
+
+    def in_range(self, award_date):
+        after, before = self.filters.get('awarded_after'), self.filters.get('awarded_before')
+        return (after is None or award_date >= after) and (before is None or award_date <= before)
+
+
+def attach_timelines(students, history):
+    """Set student.timeline, a list of award dicts oldest first, with one query."""
+    rows = history.ranks(windowed=True).filter(
+        martial_artist_id__in=[student.pk for student in students]
+    ).annotate(
+        previous_award=Window(
+            Lag('award_date'),
+            partition_by=[F('martial_artist_id'), F('rank_type__style_id')],
+            order_by=[F('award_date').asc(), F('rank_type__ordinal').asc(), F('id').asc()],
+        ),
+    ).order_by('martial_artist_id', 'award_date', 'rank_type__ordinal', 'id').values_list(
+        'martial_artist_id', 'id', 'rank_type__style__title', 'rank_type__title', 'rank_type__indicator',
+        'award_date', 'test_date', 'tested', 'previous_award',
+    )
+    timelines = defaultdict(list)
+    for artist_id, rank_id, style, title, indicator, award_date, test_date, tested, previous in rows:
+        if history.in_range(award_date):
+            timelines[artist_id].append({
+                'id': rank_id,
+                'style': style,
+                'rank': title,
+                'indicator': indicator,
+                'award_date': award_date,
+                'test_date': test_date,
+                'tested': tested,
+                'days_in_previous_grade': (award_date - previous).days if previous else None,
+            })
+    for student in students:
+        student.timeline = timelines.get(student.pk, [])
+
+
+def as_json(student):
+    """A JSON-ready dict for one student's timeline."""
+    return {
+        'id': student.pk,
+        'name': str(student),
+        'ranks': [
+            {**award, 'award_date': award['award_date'].isoformat(),
+             'test_date': award['test_date'].isoformat() if award['test_date'] else None}
+            for award in student.timeline
+        ],
+    }
@@ -0,0 +1,124 @@
+"""
+Process-wide registry of rank ladders: every style's rank types in order.
+
+Rank types change a few times a year but are listed everywhere: RankType's
+string, the rank select on every RankInline row, eligibility. The registry
+loads styles and rank types in two queries and keeps them in each process
+until a generation token in the cache changes. ranks.signals calls
+invalidate() whenever a RankType or Style is saved or deleted, and
+RANKS_LADDER_CACHE_TIMEOUT bounds how long changes that skip signals (bulk
+reordering) can go unseen. Like the dashboards, other worker processes only
+see invalidate() through a shared cache, and they read the token at most every
+RANKS_LADDER_VERSION_CHECK_INTERVAL seconds rather than on every lookup, so a
+change can take that long to reach them.
+"""
+import copy
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+
+VERSION_KEY = 'ranks:ladders:version'
+
+_lock = threading.Lock()
+_state = None
+
+
+class _Ladders:
+
+    def __init__(self, version):
+        from styles.models import Style
+        from .models import RankType
+
+        self.version = version
+        self.loaded = self.checked = time.monotonic()
+        self.style_titles = dict(Style.objects.values_list('pk', 'title'))
+        self.ladders = defaultdict(tuple)
+        self.by_id = {}
+        for rank_type in RankType.objects.select_related('style').order_by('style_id', 'ordinal', 'pk'):
+            self.ladders[rank_type.style_id] += (rank_type,)
+            self.by_id[rank_type.pk] = rank_type
+
+
+def _cache():
+    return caches[getattr(settings, 'RANKS_CACHE_ALIAS', 'default')]
+
+
+def _version(cache):
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _current():
+    global _state
+    state = _state
+    now = time.monotonic()
+    timeout = getattr(settings, 'RANKS_LADDER_CACHE_TIMEOUT', 300)
+    interval = getattr(settings, 'RANKS_LADDER_VERSION_CHECK_INTERVAL', 5)
+    if state is not None and now - state.checked < interval and now - state.loaded <= timeout:
+        return state
+    version = _version(_cache())
+    if state is None or state.version != version or now - state.loaded > timeout:
+        with _lock:
+            if _state is state:
+                _state = _Ladders(version)
+            state = _state
+    else:
+        state.checked = now
+    return state
+
+
+def invalidate():
+    """Make every process reload the ladders on next use."""
+    global _state
+    _cache().set(VERSION_KEY, uuid.uuid4().hex, None)
+    # This process reloads right away instead of after the next version check
+    _state = None
+
+
+def ladder(style_id):
+    """The style's rank types, lowest first."""
+    return _current().ladders[style_id]
+
+
+def ladders():
+    """{style id: rank types lowest first} for every style with rank types."""
+    return dict(_current().ladders)
+
+
+def get(rank_type_id):
+    """A copy of the RankType with its style loaded, or None."""
+    try:
+        rank_type = _current().by_id.get(int(rank_type_id))
+    except (TypeError, ValueError):
+        return None
+    return copy.copy(rank_type) if rank_type is not None else None
+
+
+def style_title(style_id):
+    title = _current().style_titles.get(style_id)
+    if title is None:
+        from styles.models import Style
+        title = Style.objects.filter(pk=style_id).values_list('title', flat=True).first() or ''
+    return title
+
+
+def label(rank_type):
+    """'Yellow (9th Kyu)', or just the title without an indicator."""
+    return f'{rank_type.title} ({rank_type.indicator})' if rank_type.indicator else rank_type.title
+
+
+def choices():
+    """Select choices grouped by style title: [(style, [(pk, label), ...]), ...]."""
+    state = _current()
+    groups = [
+        (state.style_titles.get(style_id, ''), [(rank_type.pk, label(rank_type)) for rank_type in rank_types])
+        for style_id, rank_types in state.ladders.items()
+    ]
+    return sorted(groups, key=lambda group: group[0])
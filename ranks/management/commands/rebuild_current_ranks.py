@@ -0,0 +1,31 @@
+"""
+Recompute the CurrentRank table (ranks.current) from every Rank.
+
+Usage:
+  python manage.py rebuild_current_ranks
+  python manage.py rebuild_current_ranks --batch-size 5000
+
+Run it after changes that bypass signals, such as reordering rank types in
+the admin or loading fixtures.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from ranks.current import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute every martial artist's current rank per style."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk write (default 1000).')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = rebuild(batch_size=options['batch_size'])
+        elapsed = time.monotonic() - started
+        rate = count / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {count} current ranks in {elapsed:.2f}s ({rate:.0f} rows/s).'
+        ))
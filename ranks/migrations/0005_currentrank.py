@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_current_ranks(apps, schema_editor):
+    from ranks.current import RANK_COLUMNS, best_ranks
+
+    Rank = apps.get_model('ranks', 'Rank')
+    CurrentRank = apps.get_model('ranks', 'CurrentRank')
+    best = best_ranks(Rank.objects.values_list(*RANK_COLUMNS))
+    CurrentRank.objects.bulk_create([
+        CurrentRank(martial_artist_id=artist_id, style_id=style_id, rank_type_id=rank_type_id, award_date=award_date)
+        for (artist_id, style_id), (rank_type_id, award_date) in best.items()
+    ], batch_size=500)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0013_person_name_keys'),
+        ('ranks', '0004_alter_rank_id_alter_ranktype_id'),
+        ('styles', '0002_alter_style_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CurrentRank',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('award_date', models.DateField()),
+                ('martial_artist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='current_ranks', to='people.martialartist')),
+                ('rank_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ranks.ranktype')),
+                ('style', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='styles.style')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('martial_artist', 'style'), name='ranks_currentrank_unique_style')],
+            },
+        ),
+        migrations.RunPython(fill_current_ranks, migrations.RunPython.noop),
+    ]
@@ -16,7 +16,10 @@ class RankType(models.Model):
         ordering = ['ordinal']
 
     def __str__(self):
-        return self.style.title + ', ' + self.title + ' (' + self.indicator + ')'
+        # The style title comes from the ladder registry unless already loaded, so lists never query per row
+        from .ladders import label, style_title
+        style = self.style.title if RankType.style.is_cached(self) else style_title(self.style_id)
+        return f'{style}, {label(self)}'
 
 class Rank(models.Model):
     martial_artist = models.ForeignKey('people.MartialArtist', on_delete=models.CASCADE)
@@ -28,3 +31,22 @@ class Rank(models.Model):
 
     def __str__(self):
         return self.martial_artist.__str__() + ': ' + self.rank_type.__str__() + ' -- ' + self.award_date.__str__()
+
+
+class CurrentRank(models.Model):
+    """
+    A martial artist's highest rank in a style (highest ordinal, then latest
+    award), kept up to date by ranks.current so lists can show belts with a join.
+    """
+    martial_artist = models.ForeignKey('people.MartialArtist', on_delete=models.CASCADE, related_name='current_ranks')
+    style = models.ForeignKey('styles.Style', on_delete=models.CASCADE, related_name='+')
+    rank_type = models.ForeignKey(RankType, on_delete=models.CASCADE, related_name='+')
+    award_date = models.DateField()
+
+    class Meta(object):
+        constraints = [
+            models.UniqueConstraint(fields=['martial_artist', 'style'], name='ranks_currentrank_unique_style'),
+        ]
+
+    def __str__(self):
+        return f'{self.martial_artist}: {self.rank_type.title} ({self.style.title})'
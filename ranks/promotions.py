@@ -0,0 +1,58 @@
+"""
+Grading-day promotions: many Rank rows written at once.
+
+promote() checks each (martial artist, rank type) pair against the rank
+ladder registry, skips ranks a student already holds, writes the rest with one
+bulk_create in a single transaction, then refreshes CurrentRank for the style
+and invalidates the dashboards once. No per-rank signals run.
+"""
+import time
+
+from django.db import transaction
+
+from pages.dashboard import invalidate_dashboards
+from people.models import MartialArtist
+
+from . import current, ladders
+from .models import Rank
+
+
+class PromotionResult:
+
+    def __init__(self, created, skipped, elapsed):
+        self.created = created
+        self.skipped = skipped
+        self.elapsed = elapsed
+
+
+def promote(style, entries, test_date, award_date=None, tested=True, notes=None):
+    """
+    Award rank_type_id to martial_artist_id for each (martial_artist_id,
+    rank_type_id) in entries. Rank types outside `style`, unknown students and
+    ranks already held are skipped and reported.
+    """
+    started = time.monotonic()
+    award_date = award_date or test_date
+    ladder = {rank_type.pk for rank_type in ladders.ladder(style.pk)}
+    entries = {(int(artist_id), int(rank_type_id)) for artist_id, rank_type_id in entries}
+    artist_ids = {artist_id for artist_id, _ in entries}
+    known = set(MartialArtist.objects.filter(pk__in=artist_ids).order_by().values_list('pk', flat=True))
+    held = set(Rank.objects.filter(
+        martial_artist_id__in=artist_ids, rank_type_id__in=ladder
+    ).values_list('martial_artist_id', 'rank_type_id'))
+
+    ranks, skipped = [], []
+    for artist_id, rank_type_id in sorted(entries):
+        if rank_type_id not in ladder or artist_id not in known or (artist_id, rank_type_id) in held:
+            skipped.append((artist_id, rank_type_id))
+            continue
+        ranks.append(Rank(
+            martial_artist_id=artist_id, rank_type_id=rank_type_id,
+            test_date=test_date, award_date=award_date, tested=tested, notes=notes or None,
+        ))
+    if ranks:
+        with transaction.atomic():
+            Rank.objects.bulk_create(ranks)
+            current.refresh({style.pk}, {rank.martial_artist_id for rank in ranks})
+        invalidate_dashboards()
+    return PromotionResult(ranks, skipped, time.monotonic() - started)
@@ -0,0 +1,52 @@
+"""
+Keep CurrentRank (ranks.current) in step with Rank and RankType changes, and
+reload the rank ladder registry (ranks.ladders) when rank types or styles change.
+"""
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from styles.models import Style
+
+from . import current, ladders
+from .models import Rank, RankType
+
+
+@receiver(post_init, sender=Rank)
+def remember_rank(sender, instance, **kwargs):
+    # Read from __dict__ so deferred fields are not loaded just for this
+    instance._loaded_key = (instance.__dict__.get('martial_artist_id'), instance.__dict__.get('rank_type_id'))
+
+
+@receiver(post_save, sender=Rank)
+@receiver(post_delete, sender=Rank)
+def refresh_current_rank(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    keys = {instance._loaded_key, (instance.martial_artist_id, instance.rank_type_id)}
+    style_ids = RankType.objects.filter(
+        pk__in={rank_type_id for _, rank_type_id in keys}
+    ).values_list('style_id', flat=True)
+    current.refresh(set(style_ids), {artist_id for artist_id, _ in keys})
+    instance._loaded_key = (instance.martial_artist_id, instance.rank_type_id)
+
+
+@receiver(post_init, sender=RankType)
+def remember_rank_type(sender, instance, **kwargs):
+    instance._loaded_place = (instance.__dict__.get('style_id'), instance.__dict__.get('ordinal'))
+
+
+@receiver(post_save, sender=RankType)
+def refresh_reordered_style(sender, instance, created=False, raw=False, **kwargs):
+    # A new rank type has no awards yet; a moved one can change who holds which top rank
+    place = (instance.style_id, instance.ordinal)
+    if not created and not raw and place != instance._loaded_place:
+        current.refresh({instance._loaded_place[0], instance.style_id})
+    instance._loaded_place = place
+
+
+@receiver(post_save, sender=RankType)
+@receiver(post_delete, sender=RankType)
+@receiver(post_save, sender=Style)
+@receiver(post_delete, sender=Style)
+def invalidate_ladders(sender, **kwargs):
+    ladders.invalidate()
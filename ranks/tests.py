@@ -241,3 +241,313 @@ class RankModelTests(TestCase):
         self.assertEqual(self.martial_artist.rank_set.count(), 2)
         self.assertIn(rank1, self.martial_artist.rank_set.all())
         self.assertIn(rank2, self.martial_artist.rank_set.all())
+
+
+class EligibilityTests(TestCase):
+    """Test cases for promotion eligibility in ranks.eligibility"""
+
+    def setUp(self):
+        self.style = Style.objects.create(title='Karate')
+        self.white = RankType.objects.create(style=self.style, ordinal=1, title='White', indicator='10th Kyu')
+        self.yellow = RankType.objects.create(
+            style=self.style, ordinal=2, title='Yellow', indicator='9th Kyu', time_in_grade=3, time_in_style=3
+        )
+        self.orange = RankType.objects.create(
+            style=self.style, ordinal=3, title='Orange', time_in_grade=6, time_in_style=12, test_required=True
+        )
+        self.kim = MartialArtist.objects.create(first_name='Kim', last_name='Kid', enrollment_date=date(2024, 1, 10))
+        self.lee = MartialArtist.objects.create(first_name='Lee', last_name='Late', enrollment_date=date(2024, 6, 1))
+        self.kim.styles.add(self.style)
+        self.lee.styles.add(self.style)
+        Rank.objects.create(martial_artist=self.kim, rank_type=self.white, award_date=date(2024, 1, 31))
+        Rank.objects.create(martial_artist=self.kim, rank_type=self.yellow, award_date=date(2024, 5, 31))
+
+    def test_add_months_clamps_day(self):
+        """add_months keeps the day where possible and clamps it otherwise"""
+        from .eligibility import add_months
+        self.assertEqual(add_months(date(2024, 1, 31), 1), date(2024, 2, 29))
+        self.assertEqual(add_months(date(2024, 11, 15), 3), date(2025, 2, 15))
+
+    def test_compute_in_three_queries(self):
+        """Next rank and date come from time in grade and time in style"""
+        from . import ladders
+        from .eligibility import compute
+        ladders.ladders()
+        with self.assertNumQueries(3):
+            results = {item.martial_artist.first_name: item for item in compute()}
+        kim, lee = results['Kim'], results['Lee']
+        self.assertEqual(kim.current, self.yellow)
+        self.assertEqual(kim.next_rank, self.orange)
+        # 6 months in grade (Nov 30) and 12 in style from the first award (Jan 31)
+        self.assertEqual(kim.eligible_on, date(2025, 1, 31))
+        self.assertTrue(kim.test_required)
+        self.assertIsNone(lee.current)
+        self.assertEqual(lee.next_rank, self.white)
+        self.assertEqual(lee.eligible_on, date(2024, 6, 1))
+
+    def test_ready_to_test_view(self):
+        """Staff see students eligible by the horizon; others are redirected"""
+        from django.contrib.auth.models import User
+        from django.urls import reverse
+        from .eligibility import ready_to_test
+        ready = ready_to_test(as_of=date(2025, 1, 1))
+        self.assertEqual([item.martial_artist for item in ready], [self.lee])
+        ready = ready_to_test(as_of=date(2025, 1, 1), within_days=30)
+        self.assertEqual([item.martial_artist for item in ready], [self.lee, self.kim])
+        User.objects.create_user(username='member', password='testpass123')
+        self.client.login(username='member', password='testpass123')
+        self.assertEqual(self.client.get(reverse('ranks_ready')).status_code, 302)
+        User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.client.login(username='staff', password='testpass123')
+        response = self.client.get(reverse('ranks_ready'), {'style': self.style.pk})
+        self.assertContains(response, 'Kim Kid')
+        self.assertContains(response, 'Required')
+
+
+class CurrentRankTests(TestCase):
+    """Test cases for the CurrentRank table maintained by ranks.current"""
+
+    def setUp(self):
+        self.karate = Style.objects.create(title='Karate')
+        self.judo = Style.objects.create(title='Judo')
+        self.white = RankType.objects.create(style=self.karate, ordinal=1, title='White')
+        self.yellow = RankType.objects.create(style=self.karate, ordinal=2, title='Yellow')
+        self.judo_white = RankType.objects.create(style=self.judo, ordinal=1, title='Judo White')
+        self.kim = MartialArtist.objects.create(first_name='Kim', last_name='Kid')
+
+    def _current(self):
+        from .models import CurrentRank
+        return {(row.style, row.rank_type) for row in CurrentRank.objects.filter(martial_artist=self.kim)}
+
+    def test_rank_changes_update_current_rank(self):
+        """Adding, editing and deleting ranks keeps the top rank per style"""
+        white = Rank.objects.create(martial_artist=self.kim, rank_type=self.white, award_date=date(2024, 1, 1))
+        yellow = Rank.objects.create(martial_artist=self.kim, rank_type=self.yellow, award_date=date(2024, 6, 1))
+        Rank.objects.create(martial_artist=self.kim, rank_type=self.judo_white, award_date=date(2024, 2, 1))
+        self.assertEqual(self._current(), {(self.karate, self.yellow), (self.judo, self.judo_white)})
+        yellow.delete()
+        self.assertEqual(self._current(), {(self.karate, self.white), (self.judo, self.judo_white)})
+        white.rank_type = self.judo_white
+        white.save()
+        self.assertEqual(self._current(), {(self.judo, self.judo_white)})
+
+    def test_reordering_and_rebuild(self):
+        """Moving a rank type refreshes its style; the rebuild command recomputes everything"""
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import CurrentRank
+        Rank.objects.create(martial_artist=self.kim, rank_type=self.white, award_date=date(2024, 1, 1))
+        Rank.objects.create(martial_artist=self.kim, rank_type=self.yellow, award_date=date(2024, 6, 1))
+        self.white.ordinal = 3
+        self.white.save()
+        self.assertEqual(self._current(), {(self.karate, self.white)})
+        CurrentRank.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_current_ranks', stdout=out)
+        self.assertIn('Rebuilt 1 current ranks', out.getvalue())
+        self.assertEqual(self._current(), {(self.karate, self.white)})
+
+    def test_roster_shows_current_rank(self):
+        """The staff roster lists each style with the current rank"""
+        from people.roster import Roster
+        self.kim.styles.add(self.karate, self.judo)
+        Rank.objects.create(martial_artist=self.kim, rank_type=self.yellow, award_date=date(2024, 6, 1))
+        page = Roster().page()
+        self.assertEqual(page.object_list[0].style_titles, ['Judo', 'Karate (Yellow)'])
+
+
+class RankLadderTests(TestCase):
+    """Test cases for the rank ladder registry in ranks.ladders"""
+
+    def setUp(self):
+        self.style = Style.objects.create(title='Karate')
+        self.ranks = [
+            RankType.objects.create(style=self.style, ordinal=i, title=f'Rank {i}', indicator=None if i % 2 else f'{i}')
+            for i in range(1, 5)
+        ]
+
+    def test_str_without_indicator_or_queries(self):
+        """RankType.__str__ handles a missing indicator and reads the style from the registry"""
+        from . import ladders
+        ladders.ladders()
+        rank_types = list(RankType.objects.order_by('ordinal'))
+        with self.assertNumQueries(0):
+            labels = [str(rank_type) for rank_type in rank_types]
+        self.assertEqual(labels[:2], ['Karate, Rank 1', 'Karate, Rank 2 (2)'])
+
+    def test_registry_reloads_after_changes(self):
+        """Saving a rank type or style is visible through the registry"""
+        from . import ladders
+        self.assertEqual([r.title for r in ladders.ladder(self.style.pk)], ['Rank 1', 'Rank 2', 'Rank 3', 'Rank 4'])
+        self.ranks[0].title = 'White'
+        self.ranks[0].save()
+        self.style.title = 'Shotokan'
+        self.style.save()
+        self.assertEqual(ladders.ladder(self.style.pk)[0].title, 'White')
+        self.assertEqual(ladders.choices()[0][0], 'Shotokan')
+        self.assertIsNone(ladders.get('nope'))
+
+    def test_version_is_checked_at_most_once_per_interval(self):
+        """Lookups reuse the registry without reading the cache until the check interval passes"""
+        import time
+        from unittest import mock
+        from . import ladders
+        ladders.ladders()
+        with mock.patch.object(ladders, '_version', wraps=ladders._version) as version:
+            ladders.ladder(self.style.pk)
+            ladders.get(self.ranks[0].pk)
+            self.assertEqual(version.call_count, 0)
+            # Another process invalidated the ladders; this one notices after the interval
+            ladders._cache().set(ladders.VERSION_KEY, 'elsewhere', None)
+            later = time.monotonic() + 6
+            with mock.patch.object(ladders.time, 'monotonic', return_value=later):
+                state = ladders._current()
+            self.assertEqual(version.call_count, 1)
+            self.assertEqual(state.version, 'elsewhere')
+
+    def test_martial_artist_admin_queries_do_not_grow_with_ranks(self):
+        """The rank inline renders its rank type selects without per-row queries"""
+        from django.contrib.auth.models import User
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        User.objects.create_superuser(username='admin', password='testpass123')
+        self.client.login(username='admin', password='testpass123')
+        artist = MartialArtist.objects.create(first_name='Kim', last_name='Kid')
+        url = f'/admin/people/martialartist/{artist.pk}/change/'
+
+        def count(ranks):
+            for rank_type in self.ranks[:ranks]:
+                Rank.objects.create(martial_artist=artist, rank_type=rank_type, award_date=date(2024, 1, 1))
+            self.client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            return len(queries)
+
+        self.assertEqual(count(1), count(3))
+
+    def test_move_to_page_action_reloads_the_registry(self):
+        """Moving rank types to another page in the admin is visible through the registry"""
+        from unittest import mock
+        from django.contrib.auth.models import User
+        from . import ladders
+        from .admin import RankTypeAdmin
+        User.objects.create_superuser(username='admin', password='testpass123')
+        self.client.login(username='admin', password='testpass123')
+        ladders.ladders()
+        with mock.patch.object(RankTypeAdmin, 'list_per_page', 2):
+            response = self.client.post('/admin/ranks/ranktype/?p=2', {
+                'action': 'move_to_first_page', '_selected_action': [self.ranks[3].pk],
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual([r.title for r in ladders.ladder(self.style.pk)], ['Rank 4', 'Rank 1', 'Rank 2', 'Rank 3'])
+
+
+class PromotionTests(TestCase):
+    """Test cases for grading-day promotions in ranks.promotions"""
+
+    def setUp(self):
+        self.style = Style.objects.create(title='Karate')
+        self.white = RankType.objects.create(style=self.style, ordinal=1, title='White')
+        self.yellow = RankType.objects.create(style=self.style, ordinal=2, title='Yellow', time_in_grade=3)
+        self.students = [
+            MartialArtist.objects.create(first_name=name, last_name='Kid', enrollment_date=date(2024, 1, 1))
+            for name in ('Ann', 'Bo', 'Cy')
+        ]
+        for student in self.students:
+            student.styles.add(self.style)
+            Rank.objects.create(martial_artist=student, rank_type=self.white, award_date=date(2024, 1, 1))
+
+    def test_promote_writes_once_and_skips_held_ranks(self):
+        """All promotions are one insert; held ranks and other styles are skipped"""
+        from .models import CurrentRank
+        from .promotions import promote
+        from . import ladders
+        ladders.ladders()
+        other = RankType.objects.create(style=Style.objects.create(title='Judo'), ordinal=1, title='Judo White')
+        entries = [(s.pk, self.yellow.pk) for s in self.students] + [(self.students[0].pk, self.white.pk),
+                                                                    (self.students[1].pk, other.pk)]
+        ladders.ladders()
+        with self.assertNumQueries(10):  # 2 lookups, insert, 3 current rank queries, 2 savepoints and releases
+            result = promote(self.style, entries, test_date=date(2024, 6, 1))
+        self.assertEqual(len(result.created), 3)
+        self.assertEqual(len(result.skipped), 2)
+        self.assertEqual(Rank.objects.filter(rank_type=self.yellow, test_date=date(2024, 6, 1)).count(), 3)
+        self.assertEqual(CurrentRank.objects.filter(rank_type=self.yellow).count(), 3)
+
+    def test_promote_view(self):
+        """Staff see eligible candidates with the next rank preselected and promote them"""
+        from django.contrib.auth.models import User
+        from django.urls import reverse
+        User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.client.login(username='staff', password='testpass123')
+        url = reverse('ranks_promote')
+        response = self.client.get(url, {'style': self.style.pk, 'test_date': '2024-06-01'})
+        self.assertEqual(len(response.context['candidates']), 3)
+        self.assertContains(response, f'<option value="{self.yellow.pk}" selected>Yellow</option>', html=True)
+        response = self.client.post(url, {
+            'style': self.style.pk, 'test_date': '2024-06-01',
+            'promote': [self.students[0].pk, self.students[1].pk],
+            f'rank_{self.students[0].pk}': self.yellow.pk, f'rank_{self.students[1].pk}': self.yellow.pk,
+        })
+        self.assertContains(response, 'Promoted 2 students')
+        self.assertEqual([item.martial_artist for item in response.context['candidates']], [self.students[2]])
+        self.assertTrue(Rank.objects.get(martial_artist=self.students[0], rank_type=self.yellow).tested)
+
+
+class RankHistoryTests(TestCase):
+    """Test cases for the rank history in ranks.history"""
+
+    def setUp(self):
+        self.style = Style.objects.create(title='Karate')
+        self.white = RankType.objects.create(style=self.style, ordinal=1, title='White')
+        self.yellow = RankType.objects.create(style=self.style, ordinal=2, title='Yellow')
+        self.orange = RankType.objects.create(style=self.style, ordinal=3, title='Orange')
+        self.students = [
+            MartialArtist.objects.create(first_name=name, last_name='Kid', enrollment_date=date(2024, 1, 1))
+            for name in ('Ann', 'Bo', 'Cy')
+        ]
+        for student in self.students:
+            Rank.objects.create(martial_artist=student, rank_type=self.white, award_date=date(2024, 1, 1))
+            Rank.objects.create(martial_artist=student, rank_type=self.yellow, award_date=date(2024, 4, 1))
+        Rank.objects.create(martial_artist=self.students[0], rank_type=self.orange, award_date=date(2024, 9, 1))
+
+    def test_time_in_grade_across_date_filter(self):
+        """Days in the previous grade count from awards outside the date range, in two queries"""
+        from .history import History
+        history = History({'awarded_after': date(2024, 3, 1)}, per_page=2)
+        with self.assertNumQueries(2):
+            page = history.page()
+            students = list(page)
+        self.assertEqual([student.first_name for student in students], ['Ann', 'Bo'])
+        self.assertEqual([award['rank'] for award in students[0].timeline], ['Yellow', 'Orange'])
+        self.assertEqual([award['days_in_previous_grade'] for award in students[0].timeline], [91, 153])
+        self.assertEqual([student.first_name for student in history.page(after=page.next_cursor)], ['Cy'])
+
+    def test_non_staff_see_only_their_own_history(self):
+        """A linked user gets only their own timeline from the JSON view"""
+        from django.contrib.auth.models import User
+        from django.urls import reverse
+        user = User.objects.create_user(username='ann', password='testpass123')
+        self.students[0].user = user
+        self.students[0].save()
+        self.client.login(username='ann', password='testpass123')
+        response = self.client.get(reverse('ranks_history'), {'format': 'json'})
+        results = response.json()['results']
+        self.assertEqual([result['id'] for result in results], [self.students[0].pk])
+        self.assertEqual(results[0]['ranks'][1]['award_date'], '2024-04-01')
+
+    def test_export_streams_json(self):
+        """The export streams every matching student as one JSON array"""
+        import json
+        from django.contrib.auth.models import User
+        from django.urls import reverse
+        User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.client.login(username='staff', password='testpass123')
+        response = self.client.get(reverse('ranks_history'), {'format': 'export', 'style': self.style.pk})
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(data), 3)
+        self.assertEqual(data[0]['ranks'][-1]['rank'], 'Orange')
+        response = self.client.get(reverse('ranks_history'), {'awarded_before': '2024-02-01'})
+        self.assertContains(response, 'Rank history')
+        self.assertEqual(len(response.context['students']), 3)
@@ -4,4 +4,7 @@ from . import views
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('ready/', views.ready, name='ranks_ready'),
+    path('promote/', views.promote_view, name='ranks_promote'),
+    path('history/', views.history, name='ranks_history'),
 ]
@@ -1,6 +1,19 @@
+import json
+
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.utils import timezone
+from django.utils.http import urlencode
+
+from people.models import MartialArtist
 
+from . import ladders
+from .eligibility import ready_to_test
+from .forms import PromotionForm, RankHistoryFilterForm, ReadyToTestForm
+from .history import History, as_json
+from .promotions import promote
 from .models import Rank
 
 
@@ -32,3 +45,109 @@ def index(request):
         'scope_message': scope_message,
         'martial_artist': martial_artist,
     })
+
+
+@staff_member_required(login_url='/login/')
+def ready(request):
+    """
+    Staff report of students who have met the time requirements for their
+    next rank, optionally including those who will within ?within_days=N.
+    """
+    form = ReadyToTestForm(request.GET)
+    filters = form.cleaned_data if form.is_valid() else {}
+    today = timezone.localdate()
+    students = ready_to_test(as_of=today, within_days=filters.get('within_days') or 0, style=filters.get('style'))
+    return render(request, 'ranks/ready.html', {
+        'form': form,
+        'students': students,
+        'today': today,
+    })
+
+
+@staff_member_required(login_url='/login/')
+def promote_view(request):
+    """
+    Grading-day promotions for staff: choose a style and test date, then tick
+    the candidates (students eligible by that date, with their next rank
+    preselected) and award every rank in one write.
+    """
+    data = request.POST if request.method == 'POST' else (request.GET or None)
+    form = PromotionForm(data, initial={'test_date': timezone.localdate()})
+    result = None
+    candidates, ladder = [], ()
+    if form.is_valid():
+        style, test_date = form.cleaned_data['style'], form.cleaned_data['test_date']
+        if request.method == 'POST':
+            entries = [
+                (artist_id, request.POST.get(f'rank_{artist_id}'))
+                for artist_id in request.POST.getlist('promote')
+                if artist_id.isdigit() and (request.POST.get(f'rank_{artist_id}') or '').isdigit()
+            ]
+            result = promote(
+                style, entries, test_date,
+                award_date=form.cleaned_data['award_date'],
+                tested=not form.cleaned_data['without_test'],
+                notes=form.cleaned_data['notes'],
+            )
+        candidates = ready_to_test(as_of=test_date, style=style)
+        ladder = ladders.ladder(style.pk)
+    return render(request, 'ranks/promote.html', {
+        'form': form,
+        'candidates': candidates,
+        'ladder': ladder,
+        'result': result,
+    })
+
+
+@login_required(login_url='/login/')
+def history(request):
+    """
+    Rank progression per student with the time held in each previous grade,
+    paginated by student and filterable by style and award date range.
+    Staff see everyone, other users their own linked profile.
+    ?format=json returns the page as JSON, ?format=export streams every
+    matching student as one JSON array.
+    """
+    martial_artist = getattr(request.user, 'martial_artist_profile', None)
+    if request.user.is_staff and martial_artist is None:
+        artists = None
+    elif martial_artist is not None:
+        artists = MartialArtist.objects.filter(pk=martial_artist.pk)
+    else:
+        artists = MartialArtist.objects.none()
+    filter_form = RankHistoryFilterForm(request.GET)
+    rank_history = History(filter_form.cleaned_data if filter_form.is_valid() else {}, artists=artists)
+
+    output = request.GET.get('format')
+    if output == 'export':
+        return _stream_json(rank_history)
+    page = rank_history.page(after=request.GET.get('after'), before=request.GET.get('before'))
+    extra_query = urlencode([
+        (key, value) for key, value in request.GET.items() if key not in ('after', 'before', 'format')
+    ])
+    if output == 'json':
+        return JsonResponse({
+            'results': [as_json(student) for student in page],
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        })
+    return render(request, 'ranks/history.html', {
+        'form': filter_form,
+        'page': page,
+        'students': page.object_list,
+        'extra_query': extra_query,
+    })
+
+
+def _stream_json(rank_history):
+    def parts():
+        separator = '['
+        for students in rank_history.chunks():
+            for student in students:
+                yield separator + json.dumps(as_json(student))
+                separator = ',\n'
+        yield ']\n' if separator != '[' else '[]\n'
+
+    response = StreamingHttpResponse(parts(), content_type='application/json')
+    response['Content-Disposition'] = 'attachment; filename="rank-history.json"'
+    return response
@@ -32,6 +32,10 @@ echo "==> Installing dependencies (SQLite-only, no mysqlclient)..."
 echo "==> Running migrations..."
 ./venv/bin/python manage.py migrate
 
+echo "==> Vendoring Bootstrap and fonts into pages/static/pages/vendor/..."
+./venv/bin/python manage.py vendor_static \
+  || echo "    Could not download them; pages use the CDN copies until 'python manage.py vendor_static' succeeds."
+
 echo ""
 echo "Setup complete. To run the app:"
 echo "  source venv/bin/activate"